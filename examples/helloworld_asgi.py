@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# encoding: utf8
+#
+# Copyright © Burak Arslan <burak at arskom dot com dot tr>,
+#             Arskom Ltd. http://www.arskom.com.tr
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    1. Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#    2. Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#    3. Neither the name of the owner nor the names of its contributors may be
+#       used to endorse or promote products derived from this software without
+#       specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+'''
+This is the HelloWorld example from helloworld_http.py, exposed both as an ASGI
+and a WSGI application so that the two transports can be compared under the
+same load. It needs Python 3.5 or newer.
+
+To serve it with an asyncio server: ::
+
+    $ uvicorn --workers 1 helloworld_asgi:asgi_application
+
+To serve it with a WSGI server: ::
+
+    $ gunicorn --workers 1 --threads 8 helloworld_asgi:wsgi_application
+
+Then point your favourite load generator to it, e.g.: ::
+
+    $ ab -n 10000 -c 100 'http://127.0.0.1:8000/say_hello?name=Dave&times=3'
+
+The ``say_hello_later`` method simulates waiting on an external service. It
+doesn't tie up a thread while doing so under ASGI, so that's where the
+difference shows.
+'''
+
+
+import asyncio
+import logging
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.http import HttpRpc
+from spyne.service import ServiceBase
+from spyne.model.complex import Array
+from spyne.model.primitive import UnsignedInteger
+from spyne.model.primitive import String
+from spyne.server.asgi import AsgiApplication
+from spyne.server.wsgi import WsgiApplication
+
+
+class HelloWorldService(ServiceBase):
+    @srpc(String, UnsignedInteger, _returns=Array(String))
+    def say_hello(name, times):
+        return ['Hello, %s' % name] * times
+
+    @srpc(String, UnsignedInteger, _returns=Array(String))
+    async def say_hello_later(name, times):
+        await asyncio.sleep(0.01)
+
+        return ['Hello, %s' % name] * times
+
+
+application = Application([HelloWorldService], 'spyne.examples.hello.asgi',
+                                  in_protocol=HttpRpc(validator='soft'),
+                                  out_protocol=JsonDocument(ignore_wrappers=True))
+
+asgi_application = AsgiApplication(application)
+
+wsgi_application = WsgiApplication(application)
+
+
+if __name__=='__main__':
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+
+    uvicorn.run(asgi_application, host='127.0.0.1', port=8000)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# encoding: utf8
+#
+# Copyright © Burak Arslan <burak at arskom dot com dot tr>,
+#             Arskom Ltd. http://www.arskom.com.tr
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    1. Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#    2. Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#    3. Neither the name of the owner nor the names of its contributors may be
+#       used to endorse or promote products derived from this software without
+#       specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+'''
+Measures how many calls per second the http client can make against a local
+WSGI server, with and without keeping connections alive: ::
+
+    $ python http_client_benchmark.py 5000
+'''
+
+
+import sys
+import time
+import logging
+import threading
+
+from werkzeug.serving import make_server
+from werkzeug.serving import WSGIRequestHandler
+
+from spyne.application import Application
+from spyne.client.http import HttpClient
+from spyne.decorator import srpc
+from spyne.protocol.soap import Soap11
+from spyne.service import ServiceBase
+from spyne.model.primitive import Unicode
+from spyne.server.wsgi import WsgiApplication
+
+
+class EchoService(ServiceBase):
+    @srpc(Unicode, _returns=Unicode)
+    def echo(s):
+        return s
+
+
+class KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # the response headers and body are written separately.
+    disable_nagle_algorithm = True
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def run(client, num_calls):
+    start = time.time()
+    for i in range(num_calls):
+        client.service.echo('hello')
+
+    return num_calls / (time.time() - start)
+
+
+def main(num_calls):
+    application = Application([EchoService], 'spyne.examples.bench',
+                                in_protocol=Soap11(), out_protocol=Soap11())
+
+    server = make_server('127.0.0.1', 0, WsgiApplication(application),
+                                   threaded=True, request_handler=KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    url = 'http://127.0.0.1:%d/' % server.port
+
+    # with pool_size=0, every connection is closed after its response is read.
+    for pool_size in (0, 4):
+        client = HttpClient(url, application, pool_size=pool_size)
+        print("pool_size=%d: %.1f calls/sec, %d connections" % (pool_size,
+                            run(client, num_calls), client.pool.created))
+        client.close()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+
+    num_calls = 2000
+    if len(sys.argv) > 1:
+        num_calls = int(sys.argv[1])
+
+    main(num_calls)
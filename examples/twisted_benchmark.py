@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# encoding: utf8
+#
+# Copyright © Burak Arslan <burak at arskom dot com dot tr>,
+#             Arskom Ltd. http://www.arskom.com.tr
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    1. Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#    2. Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#    3. Neither the name of the owner nor the names of its contributors may be
+#       used to endorse or promote products derived from this software without
+#       specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+'''
+Measures how fast a local Twisted server sends large JSON and XML responses,
+with different write sizes. The "split" responses are cut in 64-byte chunks,
+like the output of a streaming protocol would be: ::
+
+    $ python twisted_benchmark.py 20
+'''
+
+
+import sys
+import time
+import logging
+import threading
+
+try:
+    from urllib2 import build_opener
+except ImportError:
+    from urllib.request import build_opener
+
+from twisted.internet import reactor
+from twisted.web.server import Site
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.soap import Soap11
+from spyne.service import ServiceBase
+from spyne.model.complex import Iterable
+from spyne.model.primitive import Integer
+from spyne.model.primitive import Unicode
+from spyne.server.twisted import TwistedWebResource
+
+
+def make_service():
+    class RangeService(ServiceBase):
+        @srpc(Integer, _returns=Iterable(Unicode))
+        def get_range(n):
+            for i in range(n):
+                yield u'item %d' % i
+
+    return RangeService
+
+
+def _split(ctx):
+    data = ''.join(ctx.out_string)
+    ctx.out_string = (data[i:i + 64] for i in range(0, len(data), 64))
+
+
+def run(url, num_calls):
+    opener = build_opener()
+
+    size = 0
+    start = time.time()
+    for i in range(num_calls):
+        size += len(opener.open(url).read())
+
+    return size / (time.time() - start) / 1e6
+
+
+def main(num_calls):
+    ports = {}
+    for name, out_protocol in (('json', JsonDocument()), ('xml', Soap11()),
+                                                 ('split', JsonDocument())):
+        service = make_service()
+        if name == 'split':
+            service.event_manager.add_listener('method_return_string', _split)
+
+        application = Application([service], 'spyne.examples.bench',
+                              in_protocol=HttpRpc(), out_protocol=out_protocol)
+
+        for write_size in (1, 8 * 1024, 64 * 1024):
+            resource = TwistedWebResource(application, block_length=write_size)
+            port = reactor.listenTCP(0, Site(resource), interface='127.0.0.1')
+            ports[name, write_size] = port.getHost().port
+
+    thread = threading.Thread(target=reactor.run,
+                                        kwargs={'installSignalHandlers': False})
+    thread.daemon = True
+    thread.start()
+
+    for (name, write_size), port in sorted(ports.items()):
+        url = 'http://127.0.0.1:%d/get_range?n=20000' % port
+        print("%s, write_size=%d: %.1f MB/sec" % (name, write_size,
+                                                        run(url, num_calls)))
+
+    reactor.callFromThread(reactor.stop)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+
+    num_calls = 10
+    if len(sys.argv) > 1:
+        num_calls = int(sys.argv[1])
+
+    main(num_calls)
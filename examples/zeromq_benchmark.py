@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# encoding: utf8
+#
+# Copyright © Burak Arslan <burak at arskom dot com dot tr>,
+#             Arskom Ltd. http://www.arskom.com.tr
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#    1. Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#    2. Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#    3. Neither the name of the owner nor the names of its contributors may be
+#       used to endorse or promote products derived from this software without
+#       specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER BE LIABLE FOR ANY DIRECT,
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY
+# OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+'''
+Measures the throughput of the ZeroMQ server transport over ipc://, with a
+single REP socket and with a pool of worker threads behind a ROUTER/DEALER
+queue: ::
+
+    $ python zeromq_benchmark.py 2000
+
+Each call sleeps for a millisecond to stand in for blocking work like a
+database query. Pass "--processes" to also run workers in separate processes
+that connect to the pool's backend endpoint.
+'''
+
+
+import sys
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+
+import zmq
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.protocol.soap import Soap11
+from spyne.service import ServiceBase
+from spyne.model.primitive import Unicode
+from spyne.server.zeromq import ZeroMQServer
+from spyne.server.zeromq import ZeroMQThreadPoolServer
+from spyne.client.zeromq import ZeroMQClient
+
+
+class EchoService(ServiceBase):
+    @srpc(Unicode, _returns=Unicode)
+    def echo(s):
+        time.sleep(0.001)
+        return s
+
+
+application = Application([EchoService], 'spyne.examples.bench',
+                                in_protocol=Soap11(), out_protocol=Soap11())
+
+
+def run(url, num_calls, num_clients):
+    def _work():
+        client = ZeroMQClient(url, application)
+        for i in range(num_calls // num_clients):
+            client.service.echo('hello')
+
+    clients = [threading.Thread(target=_work) for _ in range(num_clients)]
+
+    start = time.time()
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+
+    return num_calls / (time.time() - start)
+
+
+def _serve_worker(backend_url):
+    ZeroMQServer(application, backend_url, connect=True,
+                                       zmq_context=zmq.Context()).serve_forever()
+
+
+def main(num_calls, processes):
+    tmpdir = tempfile.mkdtemp()
+    num_clients = 8
+
+    url = 'ipc://%s/rep' % tmpdir
+    server = ZeroMQServer(application, url)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    print("single REP socket: %.1f calls/sec" % run(url, num_calls, num_clients))
+
+    url = 'ipc://%s/router' % tmpdir
+    backend_url = 'ipc://%s/dealer' % tmpdir
+    server = ZeroMQThreadPoolServer(application, url, pool_size=8,
+                                                     backend_url=backend_url)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    print("ROUTER/DEALER, 8 threads: %.1f calls/sec" %
+                                          run(url, num_calls, num_clients))
+
+    client = ZeroMQClient(url, application)
+    start = time.time()
+    client.map('echo', ['hello'] * num_calls, concurrency=16)
+    print("ROUTER/DEALER, 8 threads, one pipelining client: %.1f calls/sec" %
+                                            (num_calls / (time.time() - start)))
+    client.close()
+
+    if processes:
+        workers = [multiprocessing.Process(target=_serve_worker,
+                                             args=(backend_url,))
+                                 for _ in range(multiprocessing.cpu_count())]
+        for p in workers:
+            p.daemon = True
+            p.start()
+
+        time.sleep(0.5)
+        print("ROUTER/DEALER, 8 threads + %d processes: %.1f calls/sec" %
+                        (len(workers), run(url, num_calls, num_clients)))
+
+        for p in workers:
+            p.terminate()
+
+    server.stop()
+    thread.join()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+
+    num_calls = 2000
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) > 0:
+        num_calls = int(args[0])
+
+    main(num_calls, '--processes' in sys.argv)
@@ -226,6 +226,15 @@ class MethodContext(object):
         """The pull interface to the outgoing bytestream. It's a sequence of
         strings (which could also be a generator)."""
 
+        self.out_string_length = None
+        """The total length of ``out_string`` in bytes, when the protocol knows
+        it without consuming ``out_string``. Code that replaces ``out_string``
+        must reset this to None or set it to the new length."""
+
+        self.memo_key = None
+        """The key that ``out_string`` is going to be memoized with, or None.
+        See :class:`spyne.util.cache.MemoCache`."""
+
         #self.out_stream = None
         #"""The push interface to the outgoing bytestream. It's a file-like
         #object."""
@@ -319,7 +328,8 @@ class MethodDescriptor(object):
                  out_header=None, faults=None,
                  port_type=None, no_ctx=False, udp=None, class_key=None,
                  aux=None, patterns=None, body_style=None, args=None,
-                 operation_name=None, no_self=None, translations=None, when=None):
+                 operation_name=None, no_self=None, translations=None, when=None,
+                 executor=None, http_cache=None, memo=None):
 
         self.__real_function = function
         """The original callable for the user code."""
@@ -409,6 +419,18 @@ class MethodDescriptor(object):
         self.body_style = body_style
         """One of (BODY_STYLE_EMPTY, BODY_STYLE_BARE, BODY_STYLE_WRAPPED)."""
 
+        self.executor = executor
+        """The :class:`spyne.util.pool.WorkerPool` that asynchronous transports
+        use to run this method, or None."""
+
+        self.http_cache = http_cache
+        """The :class:`spyne.server.http.HttpCache` instance that declares the
+        responses of this method cacheable, or None."""
+
+        self.memo = memo
+        """The :class:`spyne.util.cache.MemoCache` instance that memoizes the
+        serialized responses of this method, or None."""
+
         self.args = args
         """A sequence of the names of the exposed arguments, or None."""
 
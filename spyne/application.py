@@ -25,12 +25,27 @@ logger_client = logging.getLogger('.'.join([__name__, 'client']))
 from spyne import BODY_STYLE_EMPTY
 from spyne import BODY_STYLE_BARE
 from spyne import BODY_STYLE_WRAPPED
+from spyne.model import PushBase
 from spyne.model.fault import Fault
 from spyne.interface import Interface
 from spyne import EventManager
 from spyne.util.appreg import register_application
 from spyne.error import ResourceNotFoundError
+from spyne.util import _bytes_chunks
 
+try:
+    from inspect import iscoroutine
+    from asyncio import isfuture
+
+except ImportError:
+    def _is_native_awaitable(obj):
+        return False
+
+else:
+    def _is_native_awaitable(obj):
+        # other awaitables, e.g. twisted deferreds, are left for the transport
+        # to handle as regular return values.
+        return iscoroutine(obj) or isfuture(obj)
 
 
 def get_fault_string_from_exception(e):
@@ -69,7 +84,9 @@ class Application(object):
 
     Supported events:
         * ``method_call``:
-            Called right before the service method is executed
+            Called right before the service method is executed, or before the
+            response is served from a cache of the transport. Listeners can
+            reject the call by raising an exception.
 
         * ``method_return_object``:
             Called right after the service method is executed
@@ -78,6 +95,15 @@ class Application(object):
             Called when an exception occurred in a service method, before the
             exception is serialized.
 
+        * ``method_memo_hit``:
+            Called when the response is served from the memo cache of the
+            method, instead of executing the service method. ``method_call``
+            is fired before it.
+
+        * ``method_memo_miss``:
+            Called when the method has a memo cache but the response is not in
+            it, right before the service method is executed.
+
         * ``method_context_created``:
             Called from the constructor of the MethodContext instance.
 
@@ -131,6 +157,13 @@ class Application(object):
         as a native python object. If the function throws an exception, it
         returns None and sets the exception object to ctx.out_error.
 
+        If the user function returns a coroutine (e.g. it's an ``async def``
+        function) or an asyncio future, it's returned as is and no return
+        events are fired. It's then the transport's job to wait for it on its
+        event loop and pass the outcome to :func:`process_return_object` or
+        :func:`process_exception`. Other awaitables like twisted Deferreds are
+        treated as regular return values.
+
         Overriding this method would break event management. So this is not
         meant to be overridden unless you know what you're doing.
         """
@@ -141,23 +174,122 @@ class Application(object):
             if ctx.service_class is not None:
                 ctx.service_class.event_manager.fire_event('method_call', ctx)
 
+            # the listeners of method_call may reject the request, so cached
+            # responses are only looked up once they are done.
+            if ctx.transport.itself.get_cached_response(ctx):
+                return
+
+            if ctx.descriptor.memo is not None and \
+                                           ctx.transport.itself.uses_out_string:
+                if self.get_memoized_response(ctx):
+                    return
+
             # call the method
-            ctx.out_object = self.call_wrapper(ctx)
+            if ctx.descriptor.executor is None:
+                retval = self.call_wrapper(ctx)
+            else:
+                retval = ctx.transport.itself.call_in_executor(
+                                ctx.descriptor.executor, self.call_wrapper, ctx)
+            if _is_native_awaitable(retval):
+                return retval
 
-            # out object is always an iterable of return values. see
-            # MethodContext docstrings for more info
-            if ctx.descriptor.body_style is not BODY_STYLE_WRAPPED or \
-                                len(ctx.descriptor.out_message._type_info) <= 1:
-                # the return value should already be wrapped by a sequence.
-                ctx.out_object = [ctx.out_object]
+            self.process_return_object(ctx, retval)
 
-            # fire events
-            self.event_manager.fire_event('method_return_object', ctx)
-            if ctx.service_class is not None:
-                ctx.service_class.event_manager.fire_event(
-                                                    'method_return_object', ctx)
+        except Exception as e:
+            self.process_exception(ctx, e)
+
+    def get_memoized_response(self, ctx):
+        """Looks the response to the given context up in the memo cache of its
+        method. Returns True and sets ``ctx.out_string``, the outgoing header
+        and the response code and headers of the transport when it's found.
+        Otherwise, sets ``ctx.memo_key`` so that the response is memoized by
+        :func:`memoize_response` once it's serialized, and returns False."""
 
-        except Fault as e:
+        memo = ctx.descriptor.memo
+        try:
+            key = memo.get_key(ctx)
+        except TypeError as e:
+            logger.debug("Response not memoizable: %r", e)
+            return False
+
+        entry = memo.entries.get(key)
+        if entry is None:
+            memo.count_miss()
+            ctx.memo_key = key
+            self.__fire_memo_event('method_memo_miss', ctx)
+            return False
+
+        memo.count_hit()
+        (ctx.out_string, ctx.out_string_length, resp_code, resp_headers,
+                                        ctx.out_header, ctx.out_header_doc) = entry
+
+        # restore what the user code set on the transport as well.
+        if resp_code is not None:
+            ctx.transport.resp_code = resp_code
+        if resp_headers is not None:
+            ctx.transport.resp_headers.update(resp_headers)
+
+        self.__fire_memo_event('method_memo_hit', ctx)
+        return True
+
+    def memoize_response(self, ctx):
+        """Puts ``ctx.out_string`` in the memo cache of the method, along with
+        the outgoing header and the response code and headers of the transport.
+        Called by the transport once the response is serialized. Does nothing
+        unless ``ctx.memo_key`` is set."""
+
+        key, ctx.memo_key = ctx.memo_key, None
+        if key is None or ctx.out_error is not None:
+            return
+
+        out_string = _bytes_chunks(list(ctx.out_string))
+        length = sum([len(s) for s in out_string])
+
+        resp_code = getattr(ctx.transport, 'resp_code', None)
+        resp_headers = getattr(ctx.transport, 'resp_headers', None)
+        if resp_headers is not None:
+            resp_headers = dict(resp_headers)
+
+        ctx.descriptor.memo.entries.put(key, (out_string, length, resp_code,
+                                resp_headers, ctx.out_header, ctx.out_header_doc))
+
+        ctx.out_string = out_string
+        ctx.out_string_length = length
+
+    def __fire_memo_event(self, event, ctx):
+        self.event_manager.fire_event(event, ctx)
+        if ctx.service_class is not None:
+            ctx.service_class.event_manager.fire_event(event, ctx)
+
+    def process_return_object(self, ctx, retval):
+        """Sets ``ctx.out_object`` from the return value of the user function
+        and fires the ``method_return_object`` events."""
+
+        ctx.out_object = retval
+
+        # streamed responses are serialized piece by piece, they can't be
+        # memoized.
+        if isinstance(retval, PushBase):
+            ctx.memo_key = None
+
+        # out object is always an iterable of return values. see
+        # MethodContext docstrings for more info
+        if ctx.descriptor.body_style is not BODY_STYLE_WRAPPED or \
+                            len(ctx.descriptor.out_message._type_info) <= 1:
+            # the return value should already be wrapped by a sequence.
+            ctx.out_object = [ctx.out_object]
+
+        # fire events
+        self.event_manager.fire_event('method_return_object', ctx)
+        if ctx.service_class is not None:
+            ctx.service_class.event_manager.fire_event(
+                                                'method_return_object', ctx)
+
+    def process_exception(self, ctx, e):
+        """Sets ``ctx.out_error`` from the exception raised by the user function
+        and fires the ``method_exception_object`` events."""
+
+        if isinstance(e, Fault):
             if e.faultcode == 'Client' or e.faultcode.startswith('Client.'):
                 logger_client.exception(e)
             else:
@@ -165,22 +297,16 @@ class Application(object):
 
             ctx.out_error = e
 
-            # fire events
-            self.event_manager.fire_event('method_exception_object', ctx)
-            if ctx.service_class is not None:
-                ctx.service_class.event_manager.fire_event(
-                                               'method_exception_object', ctx)
-
-        except Exception as e:
+        else:
             logger.exception(e)
 
             ctx.out_error = Fault('Server', get_fault_string_from_exception(e))
 
-            # fire events
-            self.event_manager.fire_event('method_exception_object', ctx)
-            if ctx.service_class is not None:
-                ctx.service_class.event_manager.fire_event(
-                                                'method_exception_object', ctx)
+        # fire events
+        self.event_manager.fire_event('method_exception_object', ctx)
+        if ctx.service_class is not None:
+            ctx.service_class.event_manager.fire_event(
+                                            'method_exception_object', ctx)
 
     def call_wrapper(self, ctx):
         """This method calls the call_wrapper method in the service definition.
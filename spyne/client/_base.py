@@ -19,6 +19,10 @@
 
 """Contains the ClientBase class and its helper objects."""
 
+import threading
+
+from copy import copy
+
 from spyne._base import MethodContext
 from spyne.model.primitive import string_encoding
 
@@ -33,14 +37,22 @@ class Service(object):
     def __init__(self, rpc_class, url, app, *args, **kwargs):
         self.__app = app
         self.__url = url
+        self.__procedures = {}
         self.out_header = None
         self.rpc_class = rpc_class
         self.args = args
         self.kwargs = kwargs
 
     def __getattr__(self, key):
-        return self.rpc_class(self.__url, self.__app, key, self.out_header,
-                                                    *self.args, **self.kwargs)
+        # remote procedures are reused so that they resolve their method only
+        # once. one that was made for another out_header is replaced.
+        retval = self.__procedures.get(key)
+        if retval is None or retval.out_header is not self.out_header:
+            retval = self.rpc_class(self.__url, self.__app, key,
+                                   self.out_header, *self.args, **self.kwargs)
+            self.__procedures[key] = retval
+
+        return retval
 
 class RemoteProcedureBase(object):
     """Abstract base class that handles all (de)serialization.
@@ -59,12 +71,39 @@ class RemoteProcedureBase(object):
     def __init__(self, url, app, name, out_header=None):
         self.url = url
         self.app = app
+        self.name = name
+        self.out_header = out_header
+
+        self.ctx = None
+        """The context of the most recent call, e.g. for reading the response
+        headers. Calls themselves only work with their own context."""
+
+        self.__call_handles = None
+
+    @property
+    def contexts(self):
+        """A new list of method contexts on every access. The contexts belong
+        to the call at hand, so the same instance can be called more than once,
+        also from different threads. The method descriptors are looked up on
+        first access only."""
 
         initial_ctx = MethodContext(self)
-        initial_ctx.method_request_string = name
-        initial_ctx.out_header = out_header
+        initial_ctx.method_request_string = self.name
+        initial_ctx.out_header = self.out_header
+
+        if self.__call_handles is None:
+            retval = initial_ctx.out_protocol.generate_method_contexts(
+                                                                    initial_ctx)
+            self.__call_handles = [c.descriptor for c in retval]
+            return retval
+
+        retval = []
+        for d in self.__call_handles:
+            c = copy(initial_ctx)
+            c.descriptor = d
+            retval.append(c)
 
-        self.contexts = initial_ctx.out_protocol.generate_method_contexts(initial_ctx)
+        return retval
 
     def __call__(self, *args, **kwargs):
         """Serializes its arguments, sends them, receives and deserializes the
@@ -81,21 +120,19 @@ class RemoteProcedureBase(object):
 
         assert ctx.out_object is None
 
-        request_raw_class = ctx.descriptor.in_message
-        request_type_info = request_raw_class._type_info
-        request_raw = request_raw_class()
+        # the protocol builds the request message instance from this list, so
+        # there's no need to build one here.
+        keys = ctx.descriptor.in_message._type_info.keys()
 
-        for i in range(len(request_type_info)):
-            if i < len(args):
-                setattr(request_raw, request_type_info.keys()[i], args[i])
-            else:
-                setattr(request_raw, request_type_info.keys()[i], None)
+        retval = list(args[:len(keys)])
+        retval.extend([None] * (len(keys) - len(retval)))
 
-        for k in request_type_info:
-            if k in kwargs:
-                setattr(request_raw, k, kwargs[k])
+        if len(kwargs) > 0:
+            for i, k in enumerate(keys):
+                if k in kwargs:
+                    retval[i] = kwargs[k]
 
-        ctx.out_object = list(request_raw)
+        ctx.out_object = retval
 
     def get_out_string(self, ctx):
         """Serializes the output document to a bytestream."""
@@ -113,7 +150,9 @@ class RemoteProcedureBase(object):
                 ctx.service_class.event_manager.fire_event(
                                         'method_exception_document', ctx)
 
+        ctx.out_string_length = None
         ctx.out_protocol.create_out_string(ctx, string_encoding)
+        out_string = ctx.out_string
 
         if ctx.service_class != None:
             if ctx.out_error is None:
@@ -123,8 +162,14 @@ class RemoteProcedureBase(object):
                 ctx.service_class.event_manager.fire_event(
                                             'method_exception_string', ctx)
 
+        # the length reported by the protocol is no good if an event handler
+        # replaced the stream.
+        if ctx.out_string is not out_string:
+            ctx.out_string_length = None
+
         if ctx.out_string is None:
             ctx.out_string = [""]
+            ctx.out_string_length = 0
 
     def get_in_object(self, ctx):
         """Deserializes the response bytestream first as a document and then
@@ -163,6 +208,57 @@ class ClientBase(object):
     def __init__(self, url, app):
         self.factory = Factory(app)
 
+    def map(self, method_name, args, concurrency=4):
+        """Calls the remote method named ``method_name`` once for every item in
+        ``args``, running up to ``concurrency`` calls at the same time in
+        separate threads. Meant for transports whose calls block.
+
+        An item can be a tuple of positional arguments or a dict of keyword
+        arguments. Anything else is passed as the only argument.
+
+        Returns the results in the order of ``args``. When a call fails, the
+        exception it raised (a :class:`spyne.model.fault.Fault` in most cases)
+        takes the place of its result, so one failing call doesn't hide the
+        results of the others.
+        """
+
+        args = list(args)
+        retval = [None] * len(args)
+        indexes = iter(range(len(args)))
+        lock = threading.Lock()
+
+        def _work():
+            while True:
+                with lock:
+                    i = next(indexes, None)
+                if i is None:
+                    return
+
+                try:
+                    retval[i] = self._call(method_name, args[i])
+                except Exception as e:
+                    retval[i] = e
+
+        threads = [threading.Thread(target=_work)
+                                 for _ in range(min(concurrency, len(args)))]
+        for t in threads:
+            t.daemon = True
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        return retval
+
+    def _call(self, method_name, args):
+        method = getattr(self.service, method_name)
+
+        if isinstance(args, tuple):
+            return method(*args)
+        if isinstance(args, dict):
+            return method(**args)
+        return method(args)
+
     def set_options(self, **kwargs):
         """Sets call options.
 
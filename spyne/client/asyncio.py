@@ -0,0 +1,305 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The asyncio Http client transport. It talks HTTP/1.1 over plain asyncio
+streams and keeps a pool of persistent connections. Remote calls return
+awaitables: ::
+
+    client = AsyncioHttpClient('http://localhost:8000/', app)
+    result = await client.service.some_call(42)
+
+This module needs Python 3.5 or newer.
+"""
+
+from __future__ import absolute_import
+
+import asyncio
+
+from urllib.parse import urlsplit
+
+from spyne.client import Service
+from spyne.client import ClientBase
+from spyne.client import RemoteProcedureBase
+from spyne.client.http import HttpError
+
+
+class HttpResponseError(Exception):
+    """Raised when the server's response can't be parsed as http."""
+
+
+class _ClosedBeforeResponse(ConnectionResetError):
+    """Raised when the server closes the connection without sending a single
+    byte of the response."""
+
+
+class AsyncioConnectionPool(object):
+    """A pool of persistent connections to a single http endpoint.
+
+    :param url: The endpoint url.
+    :param size: Maximum number of idle connections to keep around. The number
+        of connections that are in use at the same time is not limited.
+    """
+
+    def __init__(self, url, size=4):
+        parsed = urlsplit(url)
+
+        self.host = parsed.hostname
+        self.ssl = (parsed.scheme == 'https')
+        self.port = parsed.port or (443 if self.ssl else 80)
+        self.path = parsed.path or '/'
+        if parsed.query:
+            self.path = '%s?%s' % (self.path, parsed.query)
+
+        if parsed.port is None:
+            self.host_header = self.host
+        else:
+            self.host_header = '%s:%d' % (self.host, self.port)
+
+        self.size = size
+
+        self.created = 0
+        """Number of connections created so far."""
+
+        self._idle = []
+
+    async def get(self):
+        """Returns a ``(reader, writer, reused)`` tuple."""
+
+        while len(self._idle) > 0:
+            reader, writer = self._idle.pop()
+            if not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+
+        self.created += 1
+        reader, writer = await asyncio.open_connection(self.host, self.port,
+                                                                 ssl=self.ssl)
+        return reader, writer, False
+
+    def put(self, reader, writer):
+        """Returns a connection to the pool. The connection must not have a
+        pending response."""
+
+        if len(self._idle) < self.size:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        """Closes all idle connections."""
+
+        idle, self._idle = self._idle, []
+        for reader, writer in idle:
+            writer.close()
+
+
+async def _read_head(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise _ClosedBeforeResponse("connection closed by the server")
+
+    try:
+        version, code, reason = (status_line.split(None, 2) + [b''])[:3]
+        code = int(code)
+    except ValueError:
+        raise HttpResponseError(status_line)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+
+        k, _, v = line.decode('latin1').partition(':')
+        headers[k.strip().lower()] = v.strip()
+
+    return version, code, reason.strip().decode('latin1'), headers
+
+
+async def _read_response(reader, method='POST'):
+    """Reads an http response from the given stream. Returns the status code,
+    the reason phrase, the list of body chunks and whether the server is going
+    to close the connection."""
+
+    version, code, reason, headers = await _read_head(reader)
+
+    # interim responses have no body and are followed by the actual one.
+    while 100 <= code < 200:
+        try:
+            version, code, reason, headers = await _read_head(reader)
+
+        except _ClosedBeforeResponse:
+            # the server has seen the request, so it must not be retried.
+            raise ConnectionResetError("connection closed by the server "
+                                                  "after an interim response")
+
+    will_close = headers.get('connection', '').lower() == 'close' or \
+                                                        version == b'HTTP/1.0'
+
+    body = []
+    if code in (204, 304) or method == 'HEAD':
+        # these never have a body, whatever the headers say.
+        pass
+
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                # skip the trailer
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+
+            body.append(await reader.readexactly(size))
+            await reader.readline()
+
+    elif 'content-length' in headers:
+        length = int(headers['content-length'])
+        if length > 0:
+            body.append(await reader.readexactly(length))
+
+    else:
+        body.append(await reader.read())
+        will_close = True
+
+    return code, reason, body, will_close
+
+
+class _RemoteProcedure(RemoteProcedureBase):
+    def __init__(self, url, app, name, out_header=None, pool=None,
+                                                                 timeout=None):
+        super(_RemoteProcedure, self).__init__(url, app, name, out_header)
+
+        self.pool = pool
+        self.timeout = timeout
+
+    async def __call__(self, *args, **kwargs):
+        # there's no point in having a client making the same request more than
+        # once, so if there's more than just one context, it is a bug.
+        # the comma-in-assignment trick is a general way of getting the first
+        # and the only variable from an iterable. so if there's more than one
+        # element in the iterable, it'll fail miserably.
+        ctx, = self.contexts
+        self.ctx = ctx
+
+        # sets ctx.out_object
+        self.get_out_object(ctx, args, kwargs)
+
+        # sets ctx.out_string
+        self.get_out_string(ctx)
+
+        # the request may have to be sent again, so it's kept until the
+        # response arrives.
+        body = [(s if isinstance(s, bytes) else s.encode('utf8'))
+                                                    for s in ctx.out_string]
+        head = ('POST %s HTTP/1.1\r\n'
+                'Host: %s\r\n'
+                'Content-Type: %s\r\n'
+                'Content-Length: %d\r\n'
+                '\r\n') % (self.pool.path, self.pool.host_header,
+                    ctx.out_protocol.mime_type, sum([len(s) for s in body]))
+
+        code, reason, in_string = await asyncio.wait_for(
+                   self.__send([head.encode('latin1')] + body), self.timeout)
+
+        ctx.in_string = in_string
+
+        # this sets ctx.in_error if there's an error, and ctx.in_object if
+        # there's none.
+        self.get_in_object(ctx)
+
+        if not (ctx.in_error is None):
+            raise ctx.in_error
+        elif code >= 400:
+            raise HttpError(code, reason)
+        else:
+            return ctx.in_object
+
+    async def __send(self, chunks):
+        pool = self.pool
+
+        while True:
+            reader, writer, reused = await pool.get()
+            try:
+                for chunk in chunks:
+                    writer.write(chunk)
+                    # wait while the transport's write buffer is full.
+                    await writer.drain()
+
+                code, reason, body, will_close = await _read_response(reader)
+
+            except _ClosedBeforeResponse:
+                writer.close()
+
+                # the server may have closed an idle connection before reading
+                # the request. retry with a new one. other errors may come
+                # after the request was processed, so they're not retried.
+                if not reused:
+                    raise
+                continue
+
+            except:
+                # includes cancellation by the timeout. the connection is in an
+                # unknown state, so it can't be reused.
+                writer.close()
+                raise
+
+            if will_close:
+                writer.close()
+            else:
+                pool.put(reader, writer)
+
+            return code, reason, body
+
+
+class AsyncioHttpClient(ClientBase):
+    """A client that talks to the given url from an asyncio event loop.
+    Calls to ``self.service`` methods return coroutines.
+
+    :param url: The endpoint url.
+    :param app: The application instance the client belongs to.
+    :param pool_size: Maximum number of idle connections to keep open.
+    :param timeout: Maximum number of seconds a call can take, or None.
+    """
+
+    def __init__(self, url, app, pool_size=4, timeout=None):
+        super(AsyncioHttpClient, self).__init__(url, app)
+
+        self.pool = AsyncioConnectionPool(url, pool_size)
+        self.service = Service(_RemoteProcedure, url, app, pool=self.pool,
+                                                               timeout=timeout)
+
+    async def map(self, method_name, args, concurrency=4):
+        """Same as :func:`spyne.client.ClientBase.map`, except that the calls
+        run concurrently in the event loop instead of in threads. Must be
+        awaited."""
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _call(a):
+            async with semaphore:
+                return await self._call(method_name, a)
+
+        return await asyncio.gather(*[_call(a) for a in args],
+                                                        return_exceptions=True)
+
+    def close(self):
+        """Closes the idle connections in the pool."""
+
+        self.pool.close()
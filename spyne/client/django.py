@@ -38,31 +38,32 @@ class _RemoteProcedure(RemoteProcedureBase):
         # the comma-in-assignment trick is a general way of getting the first
         # and the only variable from an iterable. so if there's more than one
         # element in the iterable, it'll fail miserably.
-        self.ctx, = self.contexts
+        ctx, = self.contexts
+        self.ctx = ctx
 
         # sets ctx.out_object
-        self.get_out_object(self.ctx, args, kwargs)
+        self.get_out_object(ctx, args, kwargs)
 
         # sets ctx.out_string
-        self.get_out_string(self.ctx)
+        self.get_out_string(ctx)
 
-        out_string = ''.join(self.ctx.out_string)
+        out_string = ''.join(ctx.out_string)
         # Hack
         client = Client()
         response = client.post(self.url, content_type='text/xml', data=out_string)
         code = response.status_code
-        self.ctx.in_string = [response.content]
+        ctx.in_string = [response.content]
 
         # this sets ctx.in_error if there's an error, and ctx.in_object if
         # there's none.
-        self.get_in_object(self.ctx)
+        self.get_in_object(ctx)
 
-        if not (self.ctx.in_error is None):
-            raise self.ctx.in_error
+        if not (ctx.in_error is None):
+            raise ctx.in_error
         elif code >= 400:
-            raise self.ctx.in_error
+            raise ctx.in_error
         else:
-            return self.ctx.in_object
+            return ctx.in_object
 
 
 class DjangoTestClient(ClientBase):
@@ -17,61 +17,306 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The HTTP (urllib2) client transport."""
+"""The HTTP (httplib) client transport. It keeps a pool of persistent
+HTTP/1.1 connections per client."""
+
+import errno
+import socket
+import threading
 
 try:
-    from urllib2 import Request
-    from urllib2 import urlopen
-    from urllib2 import HTTPError
+    from httplib import HTTPConnection
+    from httplib import HTTPSConnection
+    from httplib import BadStatusLine
+    from urlparse import urlsplit
 
 except ImportError: # Python 3
-    from urllib.request import Request
-    from urllib.request import urlopen
-    from urllib.error import HTTPError
+    from http.client import HTTPConnection
+    from http.client import HTTPSConnection
+    from http.client import BadStatusLine
+    from urllib.parse import urlsplit
+
+try:
+    from http.client import RemoteDisconnected
+except ImportError: # Python 2
+    RemoteDisconnected = None
 
 from spyne.client import Service
 from spyne.client import ClientBase
 from spyne.client import RemoteProcedureBase
 
+
+class HttpError(Exception):
+    """Raised when the server responds with an error status code but the
+    response body is not a fault.
+
+    :param code: The http status code of the response.
+    """
+
+    def __init__(self, code, reason=''):
+        super(HttpError, self).__init__(code, reason)
+
+        self.code = code
+        self.reason = reason
+
+
+class HttpConnectionPool(object):
+    """A pool of persistent connections to a single http endpoint.
+
+    :param url: The endpoint url.
+    :param size: Maximum number of idle connections to keep around. The number
+        of connections that are in use at the same time is not limited.
+    :param timeout: Socket timeout in seconds, or None.
+    """
+
+    def __init__(self, url, size=4, timeout=None):
+        parsed = urlsplit(url)
+
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.path = parsed.path or '/'
+        if parsed.query:
+            self.path = '%s?%s' % (self.path, parsed.query)
+
+        if parsed.scheme == 'https':
+            self.connection_class = HTTPSConnection
+        else:
+            self.connection_class = HTTPConnection
+
+        self.size = size
+        self.timeout = timeout
+
+        self.created = 0
+        """Number of connections created so far."""
+
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns an ``(connection, reused)`` tuple."""
+
+        with self._lock:
+            if len(self._idle) > 0:
+                return self._idle.pop(), True
+
+            self.created += 1
+
+        conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+        conn.connect()
+
+        # requests are written in more than one piece. don't let Nagle's
+        # algorithm hold them back.
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        return conn, False
+
+    def put(self, conn):
+        """Returns a connection to the pool. The connection must not have a
+        pending response."""
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+
+        conn.close()
+
+    def close(self):
+        """Closes all idle connections."""
+
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for conn in idle:
+            conn.close()
+
+
+def _is_closed_before_send(e):
+    """Returns True when the given exception, raised while sending a request,
+    means the server had already closed the connection."""
+
+    return not isinstance(e, socket.timeout) and \
+                                    e.errno in (errno.EPIPE, errno.ECONNRESET)
+
+
+def _is_closed_before_response(e):
+    """Returns True when the given ``BadStatusLine`` means the server closed
+    the connection without sending a single byte of the response."""
+
+    if RemoteDisconnected is not None:
+        return isinstance(e, RemoteDisconnected)
+
+    # python 2 passes either repr('') or an explanation.
+    return e.line in ("''", '') or e.line.startswith('No status line received')
+
+
+def _iter_body(out_string, sent, keep):
+    """Yields the chunks in ``sent`` first, then the ones that are left in
+    ``out_string``. The latter are appended to ``sent`` when ``keep`` is True
+    so that the request can be sent again."""
+
+    for chunk in list(sent):
+        yield chunk
+
+    for chunk in out_string:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf8')
+        if keep:
+            sent.append(chunk)
+        yield chunk
+
+
+def _iter_response(response, block_length):
+    while True:
+        data = response.read(block_length)
+        if not data:
+            break
+        yield data
+
+
 class _RemoteProcedure(RemoteProcedureBase):
+    def __init__(self, url, app, name, out_header=None, pool=None,
+                                                           block_length=8192):
+        super(_RemoteProcedure, self).__init__(url, app, name, out_header)
+
+        self.pool = pool
+        self.block_length = block_length
+
     def __call__(self, *args, **kwargs):
         # there's no point in having a client making the same request more than
         # once, so if there's more than just one context, it is a bug.
         # the comma-in-assignment trick is a general way of getting the first
         # and the only variable from an iterable. so if there's more than one
         # element in the iterable, it'll fail miserably.
-        self.ctx, = self.contexts
+        ctx, = self.contexts
+        self.ctx = ctx
 
         # sets ctx.out_object
-        self.get_out_object(self.ctx, args, kwargs)
+        self.get_out_object(ctx, args, kwargs)
 
         # sets ctx.out_string
-        self.get_out_string(self.ctx)
+        self.get_out_string(ctx)
+
+        out_string = ctx.out_string
+        length = ctx.out_string_length
+        if length is None and isinstance(out_string, (list, tuple)):
+            length = sum([len(s) for s in out_string])
 
-        out_string = ''.join(self.ctx.out_string) # FIXME: just send the iterable to the http stream.
-        request = Request(self.url, out_string)
-        code = 200
+        headers = {'Content-Type': ctx.out_protocol.mime_type}
+        if length is None:
+            # the request is sent while it's being serialized.
+            headers['Transfer-Encoding'] = 'chunked'
+        else:
+            headers['Content-Length'] = str(length)
+
+        conn, response = self.__send(out_string, headers, length is None)
         try:
-            response = urlopen(request)
-            self.ctx.in_string = [response.read()]
+            code = response.status
+            reason = response.reason
+            ctx.in_string = _iter_response(response, self.block_length)
+
+            # this sets ctx.in_error if there's an error, and ctx.in_object if
+            # there's none.
+            self.get_in_object(ctx)
+
+            # the connection can only be reused after the response is read
+            # completely.
+            response.read()
 
-        except HTTPError as e:
-            code = e.code
-            self.ctx.in_string = [e.read()]
+        except:
+            conn.close()
+            raise
 
-        # this sets ctx.in_error if there's an error, and ctx.in_object if
-        # there's none.
-        self.get_in_object(self.ctx)
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.put(conn)
 
-        if not (self.ctx.in_error is None):
-            raise self.ctx.in_error
+        if not (ctx.in_error is None):
+            raise ctx.in_error
         elif code >= 400:
-            raise self.ctx.in_error
+            raise HttpError(code, reason)
         else:
-            return self.ctx.in_object
+            return ctx.in_object
+
+    def __send(self, out_string, headers, chunked):
+        pool = self.pool
+
+        # lists can be sent again as they are. other iterables are consumed,
+        # so on reused connections, the chunks are kept until the response
+        # arrives in case the request needs to be sent again.
+        replayable = isinstance(out_string, (list, tuple))
+        if not replayable:
+            out_string = iter(out_string)
+        sent = []
+
+        # the server may have closed an idle connection from the pool. the
+        # request is only retried with another connection when it's certain
+        # that the server didn't get to process it. timeouts are never retried.
+        while True:
+            conn, reused = pool.get()
+            try:
+                conn.putrequest('POST', pool.path, skip_accept_encoding=True)
+                for k, v in headers.items():
+                    conn.putheader(k, v)
+                conn.endheaders()
+
+                if replayable:
+                    body = _iter_body(out_string, (), False)
+                else:
+                    body = _iter_body(out_string, sent, reused)
+
+                for chunk in body:
+                    if not chunked:
+                        conn.send(chunk)
+                    elif len(chunk) > 0:
+                        conn.send(b''.join([('%x\r\n' % len(chunk)).encode(
+                                                'ascii'), chunk, b'\r\n']))
+
+                if chunked:
+                    conn.send(b'0\r\n\r\n')
+
+            except socket.error as e:
+                conn.close()
+                if reused and _is_closed_before_send(e):
+                    continue
+                raise
+
+            except:
+                conn.close()
+                raise
+
+            try:
+                return conn, conn.getresponse()
+
+            except BadStatusLine as e:
+                conn.close()
+                if reused and _is_closed_before_response(e):
+                    continue
+                raise
+
+            except:
+                conn.close()
+                raise
+
 
 class HttpClient(ClientBase):
-    def __init__(self, url, app):
+    """A client that talks to the given url using a pool of persistent
+    connections.
+
+    :param url: The endpoint url.
+    :param app: The application instance the client belongs to.
+    :param pool_size: Maximum number of idle connections to keep open.
+    :param timeout: Socket timeout in seconds, or None.
+    """
+
+    def __init__(self, url, app, pool_size=4, timeout=None):
         super(HttpClient, self).__init__(url, app)
 
-        self.service = Service(_RemoteProcedure, url, app)
+        self.pool = HttpConnectionPool(url, pool_size, timeout)
+        self.service = Service(_RemoteProcedure, url, app, pool=self.pool)
+
+    def close(self):
+        """Closes the idle connections in the pool."""
+
+        self.pool.close()
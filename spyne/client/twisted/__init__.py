@@ -103,33 +103,34 @@ class _RemoteProcedure(RemoteProcedureBase):
         # the comma-in-assignment trick is a general way of getting the first
         # and the only variable from an iterable. so if there's more than one
         # element in the iterable, it'll fail miserably.
-        self.ctx, = self.contexts
+        ctx, = self.contexts
+        self.ctx = ctx
 
-        self.get_out_object(self.ctx, args, kwargs)
-        self.get_out_string(self.ctx)
+        self.get_out_object(ctx, args, kwargs)
+        self.get_out_string(ctx)
 
-        self.ctx.in_string = []
+        ctx.in_string = []
 
         agent = Agent(reactor)
         d = agent.request(
             'POST', self.url,
             Headers({'User-Agent': ['Spyne Twisted Http Client']}),
-            _Producer(self.ctx.out_string)
+            _Producer(ctx.out_string)
         )
 
         def _process_response(_, response):
             # this sets ctx.in_error if there's an error, and ctx.in_object if
             # there's none.
-            self.get_in_object(self.ctx)
+            self.get_in_object(ctx)
 
-            if self.ctx.in_error is not None:
-                raise self.ctx.in_error
+            if ctx.in_error is not None:
+                raise ctx.in_error
             elif response.code >= 400:
                 raise werror.Error(response.code)
-            return self.ctx.in_object
+            return ctx.in_object
 
         def _cb_request(response):
-            p = _Protocol(self.ctx)
+            p = _Protocol(ctx)
             response.deliverBody(p)
             return p.deferred.addCallback(_process_response, response)
 
@@ -17,7 +17,15 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The ZeroMQ (zmq.REQ) client transport."""
+"""The ZeroMQ client transport. It keeps a single ``zmq.DEALER`` socket per
+client and tags every request with an id, so it works with both
+:class:`spyne.server.zeromq.ZeroMQServer` and
+:class:`spyne.server.zeromq.ZeroMQThreadPoolServer`.
+"""
+
+import threading
+
+from itertools import count
 
 import zmq
 
@@ -27,28 +35,183 @@ from spyne.client import ClientBase
 
 context = zmq.Context()
 
+
+class RequestTimeout(Exception):
+    """Raised when the server does not respond in time."""
+
+
 class _RemoteProcedure(RemoteProcedureBase):
+    def __init__(self, url, app, name, out_header=None, client=None):
+        super(_RemoteProcedure, self).__init__(url, app, name, out_header)
+
+        self.client = client
+
     def __call__(self, *args, **kwargs):
-        self.ctx = self.contexts[0]
+        ctx = self.prepare(args, kwargs)
+
+        client = self.client
+        with client.lock:
+            request_id = client.send(ctx.out_string)
+            in_string = client.recv(request_id)
+
+        return self.process_response(ctx, in_string)
+
+    def prepare(self, args, kwargs):
+        """Returns a new method context with the serialized request in
+        ``ctx.out_string``."""
+
+        ctx, = self.contexts
+        self.ctx = ctx
 
-        self.get_out_object(self.ctx, args, kwargs)
-        self.get_out_string(self.ctx)
-        out_string = ''.join(self.ctx.out_string)
+        self.get_out_object(ctx, args, kwargs)
+        self.get_out_string(ctx)
 
-        socket = context.socket(zmq.REQ)
-        socket.connect(self.url)
-        socket.send(out_string)
+        return ctx
 
-        self.ctx.in_string = [socket.recv()]
-        self.get_in_object(self.ctx)
+    def process_response(self, ctx, in_string):
+        """Deserializes the given response message. Returns the result of the
+        call or raises the error it contains."""
 
-        if not (self.ctx.in_error is None):
-            raise self.ctx.in_error
+        ctx.in_string = [in_string]
+        self.get_in_object(ctx)
+
+        if not (ctx.in_error is None):
+            raise ctx.in_error
         else:
-            return self.ctx.in_object
+            return ctx.in_object
+
 
 class ZeroMQClient(ClientBase):
-    def __init__(self, url, app):
+    """The ZeroMQ client transport.
+
+    The socket is connected on first use and kept open until :func:`close` is
+    called. Calls from different threads take turns on it, use :func:`map`
+    to have many calls in flight at once.
+
+    :param url: The endpoint url.
+    :param app: The application instance the client belongs to.
+    :param timeout: Maximum number of seconds to wait for a response, or None
+        to wait forever. Calls that time out raise :class:`RequestTimeout`.
+        Their late responses are discarded.
+    :param zmq_context: The ZeroMQ context. Defaults to the module-level one.
+    """
+
+    def __init__(self, url, app, timeout=None, zmq_context=None):
         super(ZeroMQClient, self).__init__(url, app)
 
-        self.service = Service(_RemoteProcedure, url, app)
+        self.url = url
+        self.timeout = timeout
+        self.zmq_context = zmq_context or context
+
+        self.lock = threading.RLock()
+        """Serializes access to the socket."""
+
+        self.socket = None
+        self._request_ids = count()
+
+        self.service = Service(_RemoteProcedure, url, app, client=self)
+
+    def connect(self):
+        if self.socket is None:
+            self.socket = self.zmq_context.socket(zmq.DEALER)
+            self.socket.setsockopt(zmq.LINGER, 0)
+            self.socket.connect(self.url)
+
+        return self.socket
+
+    def close(self):
+        """Closes the socket. Responses to pending requests are lost."""
+
+        with self.lock:
+            if self.socket is not None:
+                self.socket.close()
+                self.socket = None
+
+    def send(self, out_string):
+        """Sends a request message and returns its id."""
+
+        request_id = ('%x' % next(self._request_ids)).encode('ascii')
+
+        # the REP socket on the other end sends the frames before the empty
+        # delimiter frame back as they are.
+        self.connect().send_multipart([request_id, b'', b''.join(out_string)])
+
+        return request_id
+
+    def recv(self, request_id=None):
+        """Waits for the response to the given request and returns it. When
+        ``request_id`` is None, returns an ``(id, response)`` tuple for the
+        first response that arrives. Discards responses to requests that timed
+        out earlier."""
+
+        socket = self.connect()
+        timeout = None
+        if self.timeout is not None:
+            timeout = int(self.timeout * 1000)
+
+        while True:
+            if not socket.poll(timeout):
+                raise RequestTimeout(self.url)
+
+            frames = socket.recv_multipart()
+            if len(frames) != 3 or frames[1] != b'':
+                continue
+
+            if request_id is None:
+                return frames[0], frames[2]
+            if frames[0] == request_id:
+                return frames[2]
+
+    def map(self, method_name, args, concurrency=16):
+        """Same as :func:`spyne.client.ClientBase.map`, except that up to
+        ``concurrency`` requests are pipelined on the client's socket instead
+        of being made from separate threads."""
+
+        args = list(args)
+        retval = [None] * len(args)
+        pending = {}
+
+        def _recv_one():
+            request_id, in_string = self.recv()
+            if not (request_id in pending):
+                return
+
+            i, proc, ctx = pending.pop(request_id)
+            try:
+                retval[i] = proc.process_response(ctx, in_string)
+            except Exception as e:
+                retval[i] = e
+
+        with self.lock:
+            sent = 0
+            try:
+                for i, a in enumerate(args):
+                    while len(pending) >= concurrency:
+                        _recv_one()
+
+                    proc = getattr(self.service, method_name)
+                    try:
+                        if isinstance(a, tuple):
+                            ctx = proc.prepare(a, {})
+                        elif isinstance(a, dict):
+                            ctx = proc.prepare((), a)
+                        else:
+                            ctx = proc.prepare((a,), {})
+
+                        pending[self.send(ctx.out_string)] = (i, proc, ctx)
+
+                    except Exception as e:
+                        retval[i] = e
+
+                    sent = i + 1
+
+                while len(pending) > 0:
+                    _recv_one()
+
+            except RequestTimeout as e:
+                for i, proc, ctx in pending.values():
+                    retval[i] = e
+                for i in range(sent, len(args)):
+                    retval[i] = e
+
+        return retval
@@ -227,6 +227,13 @@ def rpc(*params, **kparams):
     :param _udp: Short for UserDefinedProperties, you can use this to mark the
         method with arbitrary metadata.
     :param _aux: The auxiliary backend to run this method. ``None`` if primary.
+    :param _executor: A :class:`spyne.util.pool.WorkerPool` instance that
+        asynchronous transports use to run this method without blocking their
+        event loop. ``None`` runs it in the transport's own thread.
+    :param _http_cache: A :class:`spyne.server.http.HttpCache` instance that
+        declares the responses of this method cacheable by the http transports.
+    :param _memo: A :class:`spyne.util.cache.MemoCache` instance that memoizes
+        the serialized responses of this method.
     :param _throws: A sequence of exceptions that this function can throw. No
         real functionality besides publishing this information in interface
         documents.
@@ -247,6 +254,9 @@ def rpc(*params, **kparams):
             _no_self = kparams.get('_no_self', True)
             _udp = kparams.get('_udp', None)
             _aux = kparams.get('_aux', None)
+            _executor = kparams.get('_executor', None)
+            _http_cache = kparams.get('_http_cache', None)
+            _memo = kparams.get('_memo', None)
             _pattern = kparams.get("_pattern",None)
             _patterns = kparams.get("_patterns",[])
             _args = kparams.get("_args",None)
@@ -310,7 +320,8 @@ def rpc(*params, **kparams):
                 class_key=function_name, aux=_aux, patterns=_patterns,
                 body_style=body_style, args=_args,
                 operation_name=_operation_name, no_self=_no_self,
-                translations=_translations, when=_when,
+                translations=_translations, when=_when, executor=_executor,
+                http_cache=_http_cache, memo=_memo,
             )
 
             return retval
@@ -82,6 +82,14 @@ class InternalError(Fault):
         super(InternalError, self).__init__('Server', "InternalError: An unknown error has occured.")
 
 
+class ServiceUnavailableError(Fault):
+    """Raised when the server is too busy to process the request."""
+
+    def __init__(self, faultstring="Service temporarily unavailable"):
+        super(ServiceUnavailableError, self).__init__(
+                                    'Server.ServiceUnavailable', faultstring)
+
+
 class ResourceNotFoundError(Fault):
     """Raised when requested resource is not found."""
 
@@ -275,6 +275,8 @@ class Interface(object):
                     method.out_header = s.__out_header__
                 if method.aux is None:
                     method.aux = s.__aux__
+                if method.executor is None:
+                    method.executor = s.__executor__
                 if method.aux is not None:
                     method.aux.methods.append(generate_method_id(s, method))
 
@@ -201,6 +201,10 @@ class Wsdl11(XmlSchema):
 
         self.url = REGEX_WSDL.sub('', url)
 
+        # the document can be built more than once, e.g. for different urls.
+        self.port_type_dict = {}
+        self.service_elt_dict = {}
+
         service_name = self.interface.get_name()
 
         # create wsdl root node
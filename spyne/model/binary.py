@@ -31,6 +31,7 @@ from base64 import urlsafe_b64encode
 from base64 import urlsafe_b64decode
 from binascii import hexlify
 from binascii import unhexlify
+from binascii import Error as BinasciiError
 
 if six.PY2:
     from cStringIO import StringIO
@@ -48,6 +49,67 @@ class BINARY_ENCODING_USE_DEFAULT: pass
 class BINARY_ENCODING_URLSAFE_BASE64: pass
 
 
+BASE64_ENCODE_BLOCK_SIZE = 0xC000
+"""Number of raw bytes that are base64-encoded at once. It must be a multiple of
+3 so that padding characters never appear in the middle of a chunked base64
+stream."""
+
+BASE64_DECODE_BLOCK_SIZE = 0x10000
+"""Number of base64 characters that are decoded at once."""
+
+
+def _base64_encode_iter(chunks, encoder=b64encode):
+    """Encodes an iterable of byte strings to base64, yielding the encoded data
+    in blocks of at most :const:`BASE64_ENCODE_BLOCK_SIZE` raw bytes.
+
+    Leftover bytes from each incoming chunk are carried over to the next one,
+    so that every block (except the last one) is 3-byte-aligned and the
+    concatenation of the yielded blocks is a valid base64 string.
+    """
+
+    block = BASE64_ENCODE_BLOCK_SIZE
+    rem = b''
+    for chunk in chunks:
+        if len(rem) > 0:
+            chunk = rem + chunk
+
+        end = len(chunk) - len(chunk) % 3
+        for i in range(0, end, block):
+            yield encoder(chunk[i:min(i + block, end)])
+
+        rem = chunk[end:]
+
+    if len(rem) > 0:
+        yield encoder(rem)
+
+
+def _base64_decode_iter(value, decoder=b64decode):
+    """Decodes a base64 string, or an iterable of base64 string fragments,
+    yielding the decoded data in blocks. Whitespace is ignored.
+    """
+
+    if isinstance(value, (six.text_type, six.binary_type)):
+        value = (value,)
+
+    block = BASE64_DECODE_BLOCK_SIZE
+    rem = b''
+    for chunk in value:
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('ascii')
+
+        for i in range(0, len(chunk), block):
+            data = rem + b''.join(chunk[i:i + block].split())
+
+            end = len(data) - len(data) % 4
+            if end > 0:
+                yield decoder(data[:end])
+            rem = data[end:]
+
+    if len(rem) > 0:
+        # this is never valid base64, let the decoder complain about it.
+        yield decoder(rem)
+
+
 class ByteArray(SimpleModel):
     """Canonical container for arbitrary data. Every protocol has a different
     way of encapsulating this type. E.g. xml-based protocols encode this as
@@ -98,13 +160,13 @@ class ByteArray(SimpleModel):
 
     @classmethod
     def to_base64(cls, value):
-        return b64encode(_bytes_join(value))
+        return b''.join(_base64_encode_iter(value))
 
     @classmethod
     def from_base64(cls, value):
         try:
-            return [b64decode(_bytes_join(value))]
-        except TypeError as e:
+            return list(_base64_decode_iter(value))
+        except (TypeError, BinasciiError) as e:
             raise ValidationError(value)
 
     @classmethod
@@ -158,6 +220,11 @@ class File(SimpleModel):
         One of (None, 'base64', 'hex')
         """
 
+        spool_threshold = 0x100000
+        """Incoming encoded data that decodes to more than this many bytes is
+        written to a temporary file instead of being kept in memory. ``None``
+        means never spool."""
+
     class Value(object):
         """The class for values marked as ``File``.
 
@@ -212,25 +279,43 @@ class File(SimpleModel):
 
     @classmethod
     def to_base64(cls, value):
+        """Returns a generator that yields the base64 encoding of the given
+        ``File.Value`` in 3-byte-aligned blocks."""
+
         if value is None:
-            raise StopIteration()
+            return iter(())
 
-        assert value.path, "You need to write data to persistent storage first " \
-                           "if you want to read it back."
-        f = open(value.path, 'rb')
+        if value.data is not None:
+            return _base64_encode_iter(value.data)
 
-        data = f.read(0x4000) # this needs to be a multiple of 4 (for base64)
-        while len(data) > 0:
-            yield base64.b64encode(data)
-            data = f.read(0x4000)
+        # the handle is ignored unless path is None, as documented in Value.
+        if value.path is None:
+            assert value.handle is not None, "You need to write data to " \
+                        "persistent storage first if you want to read it back."
+            f = value.handle
+            f.seek(0)
 
-        f.close()
+        else:
+            f = open(value.path, 'rb')
+
+        return _base64_encode_iter(_file_chunks(f, value.path is not None))
 
     @classmethod
     def from_base64(cls, value):
+        """Decodes the given base64 string (or sequence of base64 string
+        fragments) block by block. The decoded data is kept in memory until its
+        size exceeds ``cls.Attributes.spool_threshold``, after which it's
+        written to a temporary file that is returned as ``File.Value.handle``.
+        """
+
         if value is None:
             return None
-        return File.Value(data=[base64.b64decode(value)])
+
+        try:
+            return _spool(_base64_decode_iter(value),
+                                                  cls.Attributes.spool_threshold)
+        except (TypeError, BinasciiError) as e:
+            raise ValidationError(value)
 
     def __repr__(self):
         return "File(name=%r, path=%r, type=%r, data=%r)" % (self.name,
@@ -240,6 +325,43 @@ class File(SimpleModel):
     def store_as(cls, what):
         return cls.customize(store_as=what)
 
+def _file_chunks(f, close=True):
+    data = f.read(BASE64_ENCODE_BLOCK_SIZE)
+    while len(data) > 0:
+        yield data
+        data = f.read(BASE64_ENCODE_BLOCK_SIZE)
+
+    if close:
+        f.close()
+
+
+def _spool(chunks, threshold):
+    """Collects the given chunks in memory while their total size is below
+    ``threshold``, writes them to an anonymous temporary file otherwise.
+    Returns a :class:`File.Value` instance in both cases."""
+
+    data = []
+    size = 0
+    f = None
+    for chunk in chunks:
+        size += len(chunk)
+        if f is None:
+            data.append(chunk)
+            if threshold is not None and size > threshold:
+                f = tempfile.TemporaryFile()
+                for d in data:
+                    f.write(d)
+                data = None
+        else:
+            f.write(chunk)
+
+    if f is None:
+        return File.Value(data=data)
+
+    f.seek(0)
+    return File.Value(handle=f)
+
+
 # **DEPRECATED!** Use ByteArray or File instead.
 class Attachment(ModelBase):
     __type_name__ = 'base64Binary'
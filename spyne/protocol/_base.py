@@ -32,11 +32,13 @@ from spyne.const.http import HTTP_404
 from spyne.const.http import HTTP_405
 from spyne.const.http import HTTP_413
 from spyne.const.http import HTTP_500
+from spyne.const.http import HTTP_503
 
 from spyne.error import Fault
 from spyne.error import ResourceNotFoundError
 from spyne.error import RequestTooLongError
 from spyne.error import RequestNotAllowed
+from spyne.error import ServiceUnavailableError
 from spyne.error import InvalidCredentialsError
 
 from spyne.model import ModelBase
@@ -139,6 +141,7 @@ class ProtocolBase(object):
             AnyHtml: any_html_to_string,
             DateTime: datetime_to_string,
             Duration: duration_to_string,
+            File: file_to_string,
             ByteArray: byte_array_to_string,
             Attachment: attachment_to_string,
             ComplexModelBase: complex_model_base_to_string,
@@ -266,6 +269,8 @@ class ProtocolBase(object):
             return HTTP_405
         if isinstance(fault, InvalidCredentialsError):
             return HTTP_401
+        if isinstance(fault, ServiceUnavailableError):
+            return HTTP_503
         if isinstance(fault, Fault) and (fault.faultcode.startswith('Client.')
                                                 or fault.faultcode == 'Client'):
             return HTTP_400
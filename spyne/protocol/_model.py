@@ -36,6 +36,7 @@ from spyne.model.binary import File
 from spyne.model.binary import Attachment
 from spyne.model.binary import binary_encoding_handlers
 from spyne.model.binary import binary_decoding_handlers
+from spyne.model.binary import BINARY_ENCODING_BASE64
 from spyne.model.binary import BINARY_ENCODING_USE_DEFAULT
 from spyne.model.primitive import _time_re
 from spyne.model.primitive import _duration_re
@@ -63,7 +64,7 @@ __all__ = [
     'duration_to_string', 'duration_from_string',
     'boolean_to_string', 'boolean_from_string',
     'byte_array_to_string', 'byte_array_from_string', 'byte_array_to_string_iterable',
-    'file_from_string', 'file_to_string_iterable',
+    'file_from_string', 'file_to_string', 'file_to_string_iterable',
     'attachment_to_string', 'attachment_from_string',
     'complex_model_base_to_string', 'complex_model_base_from_string',
     'simple_model_to_string_iterable', 'complex_model_to_string_iterable',
@@ -110,7 +111,7 @@ def unicode_to_string(cls, value):
 
 def unicode_from_string(cls, value):
     retval = value
-    if isinstance(value, str):
+    if isinstance(value, six.binary_type):
         if cls.Attributes.encoding is None:
             retval = six.text_type(value, errors=cls.Attributes.unicode_errors)
         else:
@@ -430,8 +431,22 @@ def file_from_string(cls, value, suggested_encoding=None):
     if encoding is BINARY_ENCODING_USE_DEFAULT:
         encoding = suggested_encoding
 
+    if encoding is BINARY_ENCODING_BASE64:
+        return cls.from_base64(value)
+
     return File.Value(data=binary_decoding_handlers[encoding](value))
 
+def file_to_string(cls, value, suggested_encoding=None):
+    encoding = cls.Attributes.encoding
+    if encoding is BINARY_ENCODING_USE_DEFAULT:
+        encoding = suggested_encoding
+
+    if encoding is BINARY_ENCODING_BASE64:
+        return b''.join(cls.to_base64(value))
+
+    return binary_encoding_handlers[encoding](
+                                      file_to_string_iterable(None, cls, value))
+
 
 def _file_to_iter(f):
     data = f.read(65536)
@@ -147,6 +147,7 @@ from spyne.util import six
 
 from collections import deque
 from collections import defaultdict
+from weakref import WeakKeyDictionary
 
 from spyne.error import ValidationError
 from spyne.error import ResourceNotFoundError
@@ -171,6 +172,193 @@ from spyne.model import Unicode
 from spyne.protocol import ProtocolBase
 
 
+FLAT_KEY_CACHE_SIZE = 1024
+"""Maximum number of array-indexed keys (e.g. ``'b[3]_c'``) that are cached per
+class by :class:`_FlatKeyIndex`."""
+
+
+class _FlatKey(object):
+    """A compiled flat dict key. It holds everything that
+    :func:`SimpleDictDocument.simple_dict_to_object` needs to assign a value to
+    the nested object hierarchy without looking anything up."""
+
+    __slots__ = ['member', 'steps', 'indexes', 'is_file', 'is_binary',
+                                                  'decode_unicode', 'is_array']
+
+    def __init__(self, member, steps, indexes=()):
+        self.member = member
+        """The :class:`spyne.model.complex._SimpleTypeInfoElement` instance."""
+
+        self.steps = steps
+        """A sequence of ``(key, class, is_array)`` tuples, one for every
+        complex object on the path to the member."""
+
+        self.indexes = indexes
+        """Array indexes parsed from the key, as a tuple of integers."""
+
+        t = member.type
+        self.is_file = issubclass(t, File)
+        self.is_binary = issubclass(t, ByteArray)
+        self.decode_unicode = issubclass(t, Unicode) and \
+                                                     not issubclass(t, String)
+        self.is_array = t.Attributes.max_occurs > 1
+
+    def with_indexes(self, indexes):
+        return _FlatKey(self.member, self.steps, indexes)
+
+
+class _FlatKeyIndex(object):
+    """Maps flat dict keys to :class:`_FlatKey` instances for the given class.
+    Plain keys are compiled upfront, array-indexed ones are compiled on first
+    sight and cached."""
+
+    def __init__(self, cls, sti):
+        self.sti = sti
+        self.keys = {}
+        self.num_indexed = 0
+
+        fti = cls.get_flat_type_info(cls)
+        for k, member in sti.items():
+            steps = []
+            ctype_info = fti
+            for pkey in member.path[:-1]:
+                ncls = ctype_info[pkey]
+                if issubclass(ncls, Array):
+                    ncls, = ncls._type_info.values()
+
+                steps.append((pkey, ncls, ncls.Attributes.max_occurs > 1))
+                ctype_info = ncls.get_flat_type_info(ncls)
+
+            self.keys[k] = _FlatKey(member, tuple(steps))
+
+    def get(self, key):
+        retval = self.keys.get(key, None)
+        if retval is not None or not ('[' in key):
+            return retval
+
+        retval = self.keys.get(RE_HTTP_ARRAY_INDEX.sub("", key), None)
+        if retval is None:
+            return None
+
+        retval = retval.with_indexes(tuple(
+                            [int(i) for i in RE_HTTP_ARRAY_INDEX.findall(key)]))
+
+        if self.num_indexed < FLAT_KEY_CACHE_SIZE:
+            self.keys[key] = retval
+            self.num_indexed += 1
+
+        return retval
+
+    def resolve(self, doc):
+        """Returns a list of ``(key, value, flat_key)`` triplets for known keys
+        in the given flat dict. Array-indexed keys come last, sorted by their
+        indexes, so that array elements are created in order."""
+
+        retval = []
+        indexed = []
+        for k, v in doc.items():
+            fkey = self.get(k)
+            if fkey is None:
+                logger.debug("discarding field %r" % k)
+            elif len(fkey.indexes) > 0:
+                indexed.append((k, v, fkey))
+            else:
+                retval.append((k, v, fkey))
+
+        if len(indexed) > 0:
+            indexed.sort(key=lambda x: x[2].indexes)
+            retval.extend(indexed)
+
+        return retval
+
+
+_flat_key_indexes = WeakKeyDictionary()
+
+def _get_flat_key_index(cls, hier_delim):
+    sti = cls.get_simple_type_info(cls, hier_delim)
+
+    indexes = _flat_key_indexes.get(cls, None)
+    if indexes is None:
+        indexes = _flat_key_indexes[cls] = {}
+
+    # the index is rebuilt whenever get_simple_type_info returns a new dict.
+    # append_field and insert_field clear its memo for all classes.
+    retval = indexes.get(hier_delim, None)
+    if retval is None or retval.sti is not sti:
+        retval = indexes[hier_delim] = _FlatKeyIndex(cls, sti)
+
+    return retval
+
+
+_OP_SIMPLE, _OP_SIMPLE_ARRAY, _OP_COMPLEX_ARRAY, _OP_COMPLEX = range(4)
+
+
+class _FlatPlan(object):
+    """Precomputed instructions to flatten instances of the given complex class.
+
+    Members of nested non-array complex objects are hoisted to the top level
+    with their key relative to the class and the attribute path to reach them,
+    so that only arrays (and recursive types) need recursion at runtime.
+
+    Every element of ``ops`` is a ``(op, key, path, attr, type, field_type)``
+    tuple where ``path`` is a sequence of ``(attr, skip_if_none)`` pairs that
+    lead to the object that contains ``attr``.
+    """
+
+    def __init__(self, cls, fti, hier_delim):
+        self.fti = fti
+        self.ops = []
+        self._compile(cls, hier_delim, (), (), set())
+
+    def _compile(self, cls, hier_delim, prefix, path, stack):
+        stack.add(cls)
+
+        for k, v in cls.get_flat_type_info(cls).items():
+            key = hier_delim.join(prefix + (k,))
+
+            if issubclass(v, Array) or v.Attributes.max_occurs > 1:
+                if issubclass(v, Array):
+                    subtype, = v._type_info.values()
+                else:
+                    subtype = v
+
+                if issubclass(subtype, SimpleModel):
+                    self.ops.append((_OP_SIMPLE_ARRAY, key, path, k, subtype, v))
+                else:
+                    self.ops.append((_OP_COMPLEX_ARRAY, key, path, k, subtype, v))
+
+            elif issubclass(v, ComplexModelBase):
+                if v in stack:
+                    self.ops.append((_OP_COMPLEX, key, path, k, v, v))
+                else:
+                    self._compile(v, hier_delim, prefix + (k,),
+                                path + ((k, v.Attributes.min_occurs == 0),), stack)
+
+            else:
+                self.ops.append((_OP_SIMPLE, key, path, k, v, v))
+
+        stack.discard(cls)
+
+
+_flat_plans = WeakKeyDictionary()
+
+def _get_flat_plan(cls, hier_delim):
+    fti = cls.get_flat_type_info(cls)
+
+    plans = _flat_plans.get(cls, None)
+    if plans is None:
+        plans = _flat_plans[cls] = {}
+
+    # the plan is rebuilt whenever get_flat_type_info returns a new dict.
+    # append_field and insert_field clear its memo for all classes, so this
+    # also catches fields added to nested classes.
+    retval = plans.get(hier_delim, None)
+    if retval is None or retval.fti is not fti:
+        retval = plans[hier_delim] = _FlatPlan(cls, fti, hier_delim)
+
+    return retval
+
+
 def _check_freq_dict(cls, d, fti=None):
     if fti is None:
         fti = cls.get_flat_type_info(cls)
@@ -285,21 +473,20 @@ class SimpleDictDocument(DictDocument):
         """
 
 
+        validate = validator is self.SOFT_VALIDATION
+
         # this is for validating cls.Attributes.{min,max}_occurs
-        frequencies = defaultdict(lambda: defaultdict(int))
-        validate_freq = inst_class.Attributes.validate_freq
-        if validator is self.SOFT_VALIDATION and validate_freq:
+        frequencies = None
+        if validate and inst_class.Attributes.validate_freq:
+            frequencies = defaultdict(lambda: defaultdict(int))
             _fill(inst_class, frequencies)
 
         retval = inst_class.get_deserialization_instance()
-        simple_type_info = inst_class.get_simple_type_info(inst_class)
-        for orig_k, v in sorted(doc.items(), key=lambda k: k[0]):
-            k = RE_HTTP_ARRAY_INDEX.sub("", orig_k)
+        index = _get_flat_key_index(inst_class, hier_delim)
 
-            member = simple_type_info.get(k, None)
-            if member is None:
-                logger.debug("discarding field %r" % k)
-                continue
+        for orig_k, v, fkey in index.resolve(doc):
+            member = fkey.member
+            mtype = member.type
 
             # extract native values from the list of strings in the flat dict
             # entries.
@@ -307,35 +494,33 @@ class SimpleDictDocument(DictDocument):
             for v2 in v:
                 # some wsgi implementations pass unicode strings, some pass str
                 # strings. we get unicode here when we can and should.
-                if v2 is not None and req_enc is not None \
-                                        and not issubclass(member.type, String) \
-                                        and issubclass(member.type, Unicode) \
-                                        and not isinstance(v2, unicode):
+                if fkey.decode_unicode and v2 is not None \
+                                        and req_enc is not None \
+                                        and not isinstance(v2, six.text_type):
                     v2 = v2.decode(req_enc)
 
-                if (validator is self.SOFT_VALIDATION and not
-                                  member.type.validate_string(member.type, v2)):
+                if validate and not mtype.validate_string(mtype, v2):
                     raise ValidationError((orig_k, v2))
 
-                if issubclass(member.type, File):
+                if fkey.is_file:
                     if isinstance(v2, File.Value):
                         native_v2 = v2
                     else:
-                        native_v2 = self.from_string(member.type, v2,
+                        native_v2 = self.from_string(mtype, v2,
                                                    self.default_binary_encoding)
 
-                elif issubclass(member.type, ByteArray):
-                    native_v2 = self.from_string(member.type, v2,
+                elif fkey.is_binary:
+                    native_v2 = self.from_string(mtype, v2,
                                                    self.default_binary_encoding)
                 else:
                     try:
-                        native_v2 = self.from_string(member.type, v2)
+                        native_v2 = self.from_string(mtype, v2)
                     except ValidationError as e:
                         raise ValidationError(str(e),
-                            "Validation failed for %r.%r: %%r" % (inst_class, k))
+                            "Validation failed for %r.%r: %%r" %
+                                                         (inst_class, orig_k))
 
-                if (validator is self.SOFT_VALIDATION and not
-                           member.type.validate_native(member.type, native_v2)):
+                if validate and not mtype.validate_native(mtype, native_v2):
                     raise ValidationError((orig_k, v2))
 
                 value.append(native_v2)
@@ -343,68 +528,56 @@ class SimpleDictDocument(DictDocument):
             # assign the native value to the relevant class in the nested object
             # structure.
             cinst = retval
-            ctype_info = inst_class.get_flat_type_info(inst_class)
-
-            idx, nidx = 0, 0
-            pkey = member.path[0]
-            cfreq_key = inst_class, idx
-
-            indexes = deque(RE_HTTP_ARRAY_INDEX.findall(orig_k))
-            validates = deque()
+            cfreq_key = inst_class, 0
+            indexes = deque(fkey.indexes)
 
-            for pkey in member.path[:-1]:
+            for pkey, ncls, is_array in fkey.steps:
                 nidx = 0
-                ncls, ninst = ctype_info[pkey], getattr(cinst, pkey, None)
-                if issubclass(ncls, Array):
-                    ncls, = ncls._type_info.values()
-
-                mo = ncls.Attributes.max_occurs
+                ninst = getattr(cinst, pkey, None)
                 if ninst is None:
                     ninst = ncls.get_deserialization_instance()
-                    if mo > 1:
+                    if is_array:
                         ninst = [ninst]
                     cinst._safe_set(pkey, ninst, ncls)
-                    frequencies[cfreq_key][pkey] += 1
+                    if frequencies is not None:
+                        frequencies[cfreq_key][pkey] += 1
 
-                if mo > 1:
-                    if len(indexes) == 0:
-                        nidx = 0
-                    else:
-                        nidx = int(indexes.popleft())
+                if is_array:
+                    if len(indexes) > 0:
+                        nidx = indexes.popleft()
 
                     if nidx > len(ninst):
                         raise ValidationError(orig_k,
-                                            "%%r Invalid array index %d." % idx)
+                                           "%%r Invalid array index %d." % nidx)
 
                     if nidx == len(ninst):
                         ninst.append(ncls.get_deserialization_instance())
-                        frequencies[cfreq_key][pkey] += 1
+                        if frequencies is not None:
+                            frequencies[cfreq_key][pkey] += 1
 
                     cinst = ninst[nidx]
 
                 else:
                     cinst = ninst
 
-                cfreq_key = cfreq_key + (ncls, nidx)
-                idx = nidx
-                ctype_info = ncls._type_info
+                if frequencies is not None:
+                    cfreq_key = cfreq_key + (ncls, nidx)
 
-            frequencies[cfreq_key][member.path[-1]] += len(value)
+            if frequencies is not None:
+                frequencies[cfreq_key][member.path[-1]] += len(value)
 
-            if member.type.Attributes.max_occurs > 1:
+            if fkey.is_array:
                 _v = getattr(cinst, member.path[-1], None)
                 if _v is None:
-                    cinst._safe_set(member.path[-1], value, member.type)
+                    cinst._safe_set(member.path[-1], value, mtype)
                 else:
                     _v.extend(value)
-                logger.debug("\tset array   %r(%r) = %r" %
-                                                    (member.path, pkey, value))
+                logger.debug("\tset array   %r = %r" % (member.path, value))
             else:
-                cinst._safe_set(member.path[-1], value[0], member.type)
-                logger.debug("\tset default %r(%r) = %r" %
-                                                    (member.path, pkey, value))
+                cinst._safe_set(member.path[-1], value[0], mtype)
+                logger.debug("\tset default %r = %r" % (member.path, value))
 
-        if validator is self.SOFT_VALIDATION and validate_freq:
+        if frequencies is not None:
             for k, d in frequencies.items():
                 _check_freq_dict(k[-2], d)
 
@@ -420,57 +593,82 @@ class SimpleDictDocument(DictDocument):
         if retval is None:
             retval = {}
 
-        if prefix is None:
-            prefix = []
+        for k, v in self.object_to_simple_pairs(inst_cls, value, hier_delim,
+                                       prefix, subvalue_eater=subvalue_eater):
+            if k in retval:
+                raise ValueError("%r.%s conflicts with previous value %r" %
+                                                       (inst_cls, k, retval[k]))
+            retval[k] = v
 
-        if value is None and inst_cls.Attributes.min_occurs == 0:
-            return retval
+        return retval
 
-        if issubclass(inst_cls, ComplexModelBase):
-            fti = inst_cls.get_flat_type_info(inst_cls)
+    def object_to_simple_pairs(self, inst_cls, value, hier_delim="_",
+                                 prefix=None, subvalue_eater=lambda prot,v,t:v):
+        """Same as :func:`object_to_simple_dict`, but returns a generator of
+        ``(key, value)`` pairs instead of building a dict.
+        """
 
-            for k, v in fti.items():
-                new_prefix = list(prefix)
-                new_prefix.append(k)
-                subvalue = getattr(value, k, None)
+        if prefix is not None and len(prefix) > 0:
+            prefix = hier_delim.join(prefix)
+        else:
+            prefix = None
 
-                if (issubclass(v, Array) or v.Attributes.max_occurs > 1) and \
-                                                           subvalue is not None:
-                    if issubclass(v, Array):
-                        subtype, = v._type_info.values()
-                    else:
-                        subtype = v
+        return self._object_to_simple_pairs(inst_cls, value, hier_delim,
+                                                         prefix, subvalue_eater)
 
-                    if issubclass(subtype, SimpleModel):
-                        key = hier_delim.join(new_prefix)
-                        l = []
-                        for ssv in subvalue:
-                            l.append(subvalue_eater(self, ssv, subtype))
-                        retval[key] = l
+    def _object_to_simple_pairs(self, inst_cls, value, hier_delim, prefix,
+                                                                subvalue_eater):
+        if value is None and inst_cls.Attributes.min_occurs == 0:
+            return
+
+        if not issubclass(inst_cls, ComplexModelBase):
+            if prefix is None:
+                prefix = ''
+            yield prefix, subvalue_eater(self, value, inst_cls)
+            return
+
+        for op, key, path, attr, t, v in _get_flat_plan(inst_cls,
+                                                              hier_delim).ops:
+            if prefix is not None:
+                key = hier_delim.join((prefix, key))
+
+            parent, skip = value, False
+            for k, skip_if_none in path:
+                parent = getattr(parent, k, None)
+                if parent is None and skip_if_none:
+                    skip = True
+                    break
+
+            if skip:
+                continue
 
-                    else:
-                        last_prefix = new_prefix[-1]
-                        for i, ssv in enumerate(subvalue):
-                            new_prefix[-1] = '%s[%d]' % (last_prefix, i)
-                            self.object_to_simple_dict(subtype, ssv, hier_delim,
-                                        retval, new_prefix, parent=inst_cls,
-                                        subvalue_eater=subvalue_eater)
+            subvalue = getattr(parent, attr, None)
 
-                else:
-                    self.object_to_simple_dict(v, subvalue, hier_delim,
-                                            retval, new_prefix, parent=inst_cls,
-                                            subvalue_eater=subvalue_eater)
+            if op is _OP_SIMPLE:
+                if subvalue is None and t.Attributes.min_occurs == 0:
+                    continue
 
-        else:
-            key = hier_delim.join(prefix)
+                yield key, subvalue_eater(self, subvalue, t)
 
-            if key in retval:
-                raise ValueError("%r.%s conflicts with previous value %r" %
-                                                    (inst_cls, key, retval[key]))
+            elif op is _OP_COMPLEX:
+                for r in self._object_to_simple_pairs(t, subvalue, hier_delim,
+                                                         key, subvalue_eater):
+                    yield r
 
-            retval[key] = subvalue_eater(self, value, inst_cls)
+            elif subvalue is None:
+                # arrays are flattened as regular fields when they're empty.
+                for r in self._object_to_simple_pairs(v, subvalue, hier_delim,
+                                                         key, subvalue_eater):
+                    yield r
 
-        return retval
+            elif op is _OP_SIMPLE_ARRAY:
+                yield key, [subvalue_eater(self, ssv, t) for ssv in subvalue]
+
+            else:
+                for i, ssv in enumerate(subvalue):
+                    for r in self._object_to_simple_pairs(t, ssv, hier_delim,
+                                        '%s[%d]' % (key, i), subvalue_eater):
+                        yield r
 
 
 class HierDictDocument(DictDocument):
@@ -28,6 +28,8 @@ import pytz
 import tempfile
 from spyne.util import six
 
+from io import BytesIO
+
 if six.PY3:
     from http.cookies import SimpleCookie
 else:
@@ -40,35 +42,81 @@ from spyne.model.primitive import DateTime
 from spyne.protocol.dictdoc import SimpleDictDocument
 
 
-try:
-    from io import StringIO
-except ImportError: # Python 2
-    try:
-        from cStringIO import StringIO
-    except ImportError:
-        from StringIO import StringIO
-
-
 TEMPORARY_DIR = None
 STREAM_READ_BLOCK_SIZE = 0x4000
 SWAP_DATA_TO_FILE_THRESHOLD = 512 * 1024
 
 
-def get_stream_factory(dir=None, delete=True):
+class SpooledUploadFile(object):
+    """A file-like object that keeps the uploaded data in memory until its size
+    exceeds ``max_size`` bytes. It's rolled over to a
+    :class:`tempfile.NamedTemporaryFile` in ``dir`` after that.
+
+    :param max_size: Maximum number of bytes to keep in memory. Pass ``0`` to
+        always write to disk.
+    :param dir: Directory to store the temporary file in. Pointing this to a
+        tmpfs mount is a good idea for busy servers.
+    :param delete: The ``delete`` argument to the
+        :class:`tempfile.NamedTemporaryFile`.
+    """
+
+    def __init__(self, max_size, dir=None, delete=True):
+        self.max_size = max_size
+        self.dir = dir
+        self.delete = delete
+
+        self.size = 0
+        """Number of bytes written to this file."""
+
+        self.rolled = False
+        """True when the data was written to disk."""
+
+        self._file = BytesIO()
+
+    def write(self, data):
+        if not self.rolled and self.size + len(data) > self.max_size:
+            self.rollover()
+
+        self.size += len(data)
+        self._file.write(data)
+
+    def rollover(self):
+        if self.rolled:
+            return
+
+        mem = self._file
+        self._file = tempfile.NamedTemporaryFile('wb+', dir=self.dir,
+                                                             delete=self.delete)
+        self._file.write(mem.getvalue())
+        self._file.seek(mem.tell())
+        self.rolled = True
+
+    @property
+    def name(self):
+        """Path to the temporary file, ``None`` if the data is still in
+        memory."""
+
+        if self.rolled:
+            return self._file.name
+
+    def getvalue(self):
+        if self.rolled:
+            raise ValueError("Data is not in memory, use read() instead.")
+        return self._file.getvalue()
+
+    def __getattr__(self, key):
+        return getattr(self._file, key)
+
+
+def get_stream_factory(dir=None, delete=True,
+                                        threshold=SWAP_DATA_TO_FILE_THRESHOLD):
     def stream_factory(total_content_length, filename, content_type,
                                                            content_length=None):
-        if total_content_length >= SWAP_DATA_TO_FILE_THRESHOLD or \
-                                                                delete == False:
-            if delete == False:
-                # You need python >= 2.6 for this.
-                retval = tempfile.NamedTemporaryFile('wb+', dir=dir,
-                                                                  delete=delete)
-            else:
-                retval = tempfile.NamedTemporaryFile('wb+', dir=dir)
-        else:
-            retval = StringIO()
+        if delete == False:
+            # The user wants to keep the files around, so they must be on disk.
+            return SpooledUploadFile(0, dir=dir, delete=delete)
 
-        return retval
+        return SpooledUploadFile(threshold, dir=dir, delete=delete)
 
     return stream_factory
 
@@ -102,6 +150,9 @@ class HttpRpc(SimpleDictDocument):
     :param tmp_delete_on_close: The ``delete`` argument to the
         :class:`tempfile.NamedTemporaryFile`.
         See: http://docs.python.org/2/library/tempfile.html#tempfile.NamedTemporaryFile.
+    :param tmp_spool_threshold: File uploads smaller than this many bytes are
+        kept in memory. Larger ones are written to a temporary file in
+        ``tmp_dir``. Ignored when ``tmp_delete_on_close`` is ``False``.
     :param ignore_uncap: As HttpRpc can't serialize complex models, it throws a
         server exception when the return type of the user function is Complex.
         Passing ``True`` to this argument prevents that by ignoring the return
@@ -116,11 +167,13 @@ class HttpRpc(SimpleDictDocument):
 
     def __init__(self, app=None, validator=None, mime_type=None,
                     tmp_dir=None, tmp_delete_on_close=True, ignore_uncap=False,
-                                                            parse_cookie=True):
+                    parse_cookie=True,
+                    tmp_spool_threshold=SWAP_DATA_TO_FILE_THRESHOLD):
         super(HttpRpc, self).__init__(app, validator, mime_type,
                                                       ignore_uncap=ignore_uncap)
 
         self.tmp_dir = tmp_dir
+        self.__tmp_spool_threshold = tmp_spool_threshold
         self.tmp_delete_on_close = tmp_delete_on_close
         self.parse_cookie = parse_cookie
 
@@ -130,11 +183,22 @@ class HttpRpc(SimpleDictDocument):
     def set_tmp_delete_on_close(self, val):
         self.__tmp_delete_on_close = val
         self.stream_factory = get_stream_factory(self.tmp_dir,
-                                                     self.__tmp_delete_on_close)
+                           self.__tmp_delete_on_close, self.__tmp_spool_threshold)
 
     tmp_delete_on_close = property(get_tmp_delete_on_close,
                                                         set_tmp_delete_on_close)
 
+    def get_tmp_spool_threshold(self):
+        return self.__tmp_spool_threshold
+
+    def set_tmp_spool_threshold(self, val):
+        self.__tmp_spool_threshold = val
+        self.stream_factory = get_stream_factory(self.tmp_dir,
+                           self.__tmp_delete_on_close, self.__tmp_spool_threshold)
+
+    tmp_spool_threshold = property(get_tmp_spool_threshold,
+                                                        set_tmp_spool_threshold)
+
     def set_validator(self, validator):
         if validator == 'soft' or validator is self.SOFT_VALIDATION:
             self.validator = self.SOFT_VALIDATION
@@ -237,8 +301,10 @@ class HttpRpc(SimpleDictDocument):
                 if isinstance(ctx.out_header, (list, tuple)):
                     out_header = ctx.out_header[0]
 
-                ctx.out_header_doc = self.object_to_simple_dict(header_class,
-                                   out_header, subvalue_eater=_header_to_string)
+                # the transport only iterates over the headers, so there's no
+                # need to build a dict.
+                ctx.out_header_doc = list(self.object_to_simple_pairs(
+                     header_class, out_header, subvalue_eater=_header_to_string))
 
         else:
             ctx.transport.mime_type = 'text/plain'
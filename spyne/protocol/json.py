@@ -51,6 +51,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from spyne.util import six
+from spyne.util import _bytes_join
 
 from itertools import chain
 
@@ -154,7 +155,7 @@ class JsonDocument(HierDictDocument):
         """Sets ``ctx.in_document``  using ``ctx.in_string``."""
 
         try:
-            in_string = ''.join(ctx.in_string)
+            in_string = _bytes_join(ctx.in_string)
             if not isinstance(in_string, six.text_type):
                 if in_string_encoding is None:
                     in_string_encoding = self.default_string_encoding
@@ -126,7 +126,7 @@ def collapse_swa(content_type, envelope):
             http://www.w3.org/Submission/soap11mtom10/
 
     :param  content_type: value of the Content-Type header field, parsed by
-                          cgi.parse_header() function
+                          spyne.util.http.parse_header() function
     :param  envelope:     body of the HTTP message, a soap envelope
     '''
 
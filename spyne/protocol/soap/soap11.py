@@ -38,10 +38,10 @@ import logging
 logger = logging.getLogger(__name__)
 logger_invalid = logging.getLogger(__name__ + ".invalid")
 
-import cgi
 
 import spyne.const.xml_ns as ns
 
+from copy import copy
 from itertools import chain
 
 from lxml import etree
@@ -55,6 +55,8 @@ from spyne.const.xml_ns import DEFAULT_NS
 from spyne.const.http import HTTP_405
 from spyne.const.http import HTTP_500
 from spyne.error import RequestNotAllowed
+from spyne.util import _bytes_join
+from spyne.util.http import parse_header
 from spyne.model import ComplexModelBase
 from spyne.model.fault import Fault
 from spyne.model.primitive import Date
@@ -98,7 +100,7 @@ def _from_soap(in_envelope_xml, xmlids=None):
 
 
 def _parse_xml_string(xml_string, parser, charset=None):
-    string = ''.join(xml_string)
+    string = _bytes_join(xml_string)
     if charset:
         string = string.decode(charset)
 
@@ -184,6 +186,28 @@ class Soap11(XmlDocument):
         self._from_string_handlers[Date] = date_from_string_iso
         self._from_string_handlers[DateTime] = datetime_from_string_iso
 
+        self.__envelope = (None, None)
+
+    def gen_envelope(self):
+        """Returns a new, empty soap envelope element that declares all the
+        namespaces in the interface.
+
+        Building an element with a big namespace map is not cheap, so this
+        copies a cached one instead. The cached element is rebuilt when the
+        namespace map of the interface changes."""
+
+        key = frozenset(self.app.interface.nsmap.items())
+
+        # the key and the element are kept in one tuple so that other threads
+        # never see one without the other.
+        envelope_key, envelope = self.__envelope
+        if envelope_key != key:
+            envelope = etree.Element('{%s}Envelope' % ns.soap_env,
+                                                                nsmap=dict(key))
+            self.__envelope = (key, envelope)
+
+        return copy(envelope)
+
     def create_in_document(self, ctx, charset=None):
         if ctx.transport.type == 'wsgi':
             # according to the soap via http standard, soap requests must only
@@ -196,7 +220,7 @@ class Soap11(XmlDocument):
                         "You must issue a POST request with the Content-Type "
                         "header properly set.")
 
-            content_type = cgi.parse_header(content_type)
+            content_type = parse_header(content_type)
             collapse_swa(content_type, ctx.in_string)
 
         ctx.in_document = _parse_xml_string(ctx.in_string,
@@ -278,8 +302,7 @@ class Soap11(XmlDocument):
 
         # construct the soap response, and serialize it
         nsmap = self.app.interface.nsmap
-        ctx.out_document = etree.Element('{%s}Envelope' % ns.soap_env,
-                                                                    nsmap=nsmap)
+        ctx.out_document = self.gen_envelope()
         if ctx.out_error is not None:
             # FIXME: There's no way to alter soap response headers for the user.
             ctx.out_body_doc = out_body_doc = etree.SubElement(ctx.out_document,
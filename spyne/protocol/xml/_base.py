@@ -54,6 +54,7 @@ from spyne.model import XmlAttribute
 from spyne.model import ComplexModelBase
 from spyne.model import Fault
 from spyne.model import ByteArray
+from spyne.model import File
 from spyne.model import AnyHtml
 from spyne.model import AnyXml
 from spyne.model import AnyDict
@@ -208,6 +209,7 @@ class XmlDocument(ProtocolBase):
             AnyHtml: html_to_parent_element,
             EnumBase: enum_to_parent_element,
             ModelBase: base_to_parent_element,
+            File: byte_array_to_parent_element,
             ByteArray: byte_array_to_parent_element,
             Attachment: attachment_to_parent_element,
             XmlAttribute: xmlattribute_to_parent_element,
@@ -223,6 +225,7 @@ class XmlDocument(ProtocolBase):
             ModelBase: base_from_element,
             Unicode: unicode_from_element,
             Iterable: iterable_from_element,
+            File: byte_array_from_element,
             ByteArray: byte_array_from_element,
             Attachment: attachment_from_element,
             ComplexModelBase: complex_from_element,
@@ -446,10 +449,12 @@ class XmlDocument(ProtocolBase):
         if charset is None:
             charset = self.encoding
 
-        ctx.out_string = [etree.tostring(ctx.out_document,
+        out_string = etree.tostring(ctx.out_document,
                                           encoding=charset,
                                           pretty_print=self.pretty_print,
-                                          xml_declaration=self.xml_declaration)]
+                                          xml_declaration=self.xml_declaration)
+        ctx.out_string = [out_string]
+        ctx.out_string_length = len(out_string)
 
         if self.log_messages:
             logger.debug('%sResponse%s %s' % (LIGHT_RED, END_COLOR,
@@ -43,6 +43,15 @@ class ServerBase(object):
     """The transport type, which is a URI string to its definition by
     convention."""
 
+    supports_awaitables = False
+    """Whether this transport runs an event loop that can wait for awaitables
+    returned by user functions."""
+
+    uses_out_string = True
+    """Whether this transport sends ``ctx.out_string`` to its peer. Memoized
+    responses are only served to transports that do, as a memo cache hit
+    doesn't produce a ``ctx.out_object``."""
+
     def __init__(self, app):
         self.app = app
         self.app.transport = self.transport
@@ -94,14 +103,52 @@ class ServerBase(object):
 
     def get_out_object(self, ctx):
         """Calls the matched user function by passing it the ``ctx.in_object``
-        to set ``ctx.out_object``."""
+        to set ``ctx.out_object``.
+
+        When the user function returns a coroutine or an asyncio future, it's
+        returned to the caller if the transport supports awaitables, see
+        :attr:`supports_awaitables`. Otherwise, ``ctx.out_error`` is set.
+        """
 
         if ctx.in_error is None:
             # event firing is done in the spyne.application.Application
-            self.app.process_request(ctx)
+            retval = self.app.process_request(ctx)
+
+            if retval is not None and not self.supports_awaitables:
+                if hasattr(retval, 'close'):
+                    retval.close()
+
+                self.app.process_exception(ctx, TypeError(
+                    "%r returned an awaitable but the %r transport can't wait "
+                            "for it." % (ctx.method_request_string, self)))
+
+                return None
+
+            return retval
+
         else:
             raise ctx.in_error
 
+    def get_cached_response(self, ctx):
+        """Called by :func:`spyne.application.Application.process_request`
+        after the ``method_call`` events are fired. Returns True when the
+        response to the given context was taken from a cache of the transport,
+        in which case the user function is not called.
+
+        The default implementation does nothing and returns False.
+        """
+
+        return False
+
+    def call_in_executor(self, executor, func, *args):
+        """Runs ``func(*args)`` in the given
+        :class:`spyne.util.pool.WorkerPool`. Asynchronous transports override
+        this to return something their event loop can wait for. The default
+        implementation just calls the function in the current thread.
+        """
+
+        return func(*args)
+
     @coroutine
     def get_out_string(self, ctx):
         """Uses the ``ctx.out_object`` to set ``ctx.out_document`` and later
@@ -135,7 +182,9 @@ class ServerBase(object):
                 ctx.service_class.event_manager.fire_event(
                                             'method_exception_document', ctx)
 
+        ctx.out_string_length = None
         ctx.out_protocol.create_out_string(ctx)
+        out_string = ctx.out_string
 
         if ctx.service_class != None:
             if ctx.out_error is None:
@@ -145,8 +194,17 @@ class ServerBase(object):
                 ctx.service_class.event_manager.fire_event(
                                             'method_exception_string', ctx)
 
+        # the length reported by the protocol is no good if an event handler
+        # replaced the stream.
+        if ctx.out_string is not out_string:
+            ctx.out_string_length = None
+
         if ctx.out_string is None:
             ctx.out_string = [""]
+            ctx.out_string_length = 0
+
+        if ctx.memo_key is not None:
+            self.app.memoize_response(ctx)
 
     def serve_forever():
         """Implement your event loop here, if needed."""
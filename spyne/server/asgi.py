@@ -0,0 +1,321 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+
+"""The ``spyne.server.asgi`` module contains a server transport that exposes
+the application as an `ASGI <https://asgi.readthedocs.io>`_ callable, so that
+it can be served by asyncio servers like uvicorn or hypercorn: ::
+
+    asgi_app = AsgiApplication(Application(...))
+
+Service methods can be ``async def`` functions, their return values are
+awaited on the server's event loop before being serialized.
+
+This module needs Python 3.5 or newer. It is EXPERIMENTAL. Your mileage may
+vary. Patches are welcome.
+"""
+
+
+import logging
+logger = logging.getLogger(__name__)
+
+import asyncio
+
+from io import BytesIO
+
+from spyne.error import RequestTooLongError
+from spyne.server.wsgi import WsgiApplication
+from spyne.server.wsgi import WsgiMethodContext
+from spyne.server.wsgi import WsgiTransportContext
+from spyne.server.wsgi import _is_wsdl_request
+from spyne.util.http import parse_header
+
+
+def _gen_asgi_headers(headers):
+    """Converts a list of wsgi-style ``(name, value)`` header pairs to ASGI
+    headers. Repeated headers like ``Set-Cookie`` are kept as they are."""
+
+    return [(k.lower().encode('latin1'), str(v).encode('latin1'))
+                                                             for k, v in headers]
+
+
+def _next_chunk(iterator):
+    """Returns the next non-empty chunk from the given iterator, or None when
+    it's exhausted."""
+
+    for chunk in iterator:
+        if len(chunk) > 0:
+            return chunk
+
+
+def _scope_to_environ(scope, body):
+    """Returns a WSGI environment that's built from the given ASGI http scope
+    and the list of request body chunks."""
+
+    server = scope.get('server') or ('localhost', 80)
+    data = b''.join(body)
+
+    # ASGI paths are decoded as utf8, wsgi paths as latin1. (PEP 3333)
+    retval = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8')
+                                                             .decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+        'CONTENT_LENGTH': str(len(data)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(data),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'asgi.scope': scope,
+    }
+
+    client = scope.get('client')
+    if client is not None:
+        retval['REMOTE_ADDR'] = client[0]
+
+    for k, v in scope.get('headers', ()):
+        k = k.decode('latin1').upper().replace('-', '_')
+        v = v.decode('latin1')
+
+        if k == 'CONTENT_TYPE':
+            retval[k] = v
+        elif k != 'CONTENT_LENGTH':
+            k = 'HTTP_' + k
+            if k in retval:
+                v = '%s,%s' % (retval[k], v)
+            retval[k] = v
+
+    return retval
+
+
+class AsgiTransportContext(WsgiTransportContext):
+    """The class that is used in the transport attribute of the
+    :class:`AsgiMethodContext` class."""
+
+    def __init__(self, parent, transport, req_env, content_type):
+        super(AsgiTransportContext, self).__init__(parent, transport, req_env,
+                                                                   content_type)
+
+        self.scope = req_env.get('asgi.scope', None)
+        """The ASGI connection scope."""
+
+
+class AsgiMethodContext(WsgiMethodContext):
+    """The ASGI-Specific method context. ASGI-Specific information is stored in
+    the transport attribute using the :class:`AsgiTransportContext` class.
+    """
+
+    def __init__(self, transport, req_env, content_type):
+        super(AsgiMethodContext, self).__init__(transport, req_env, content_type)
+
+        self.transport = AsgiTransportContext(self, transport, req_env,
+                                                                   content_type)
+        """Holds the ASGI-specific information"""
+
+
+class AsgiApplication(WsgiApplication):
+    """An ASGI callable that serves the given application over http.
+
+    The ASGI scope and the request body are presented to the protocols as a
+    WSGI environment, so everything that works with :class:`WsgiApplication`,
+    like :class:`spyne.protocol.http.HttpRpc` with url patterns and file
+    uploads, works here as well. The request body is read from the event loop
+    before processing starts and the response is sent as one
+    ``http.response.body`` message per ``ctx.out_string`` chunk. Response
+    bodies that aren't lists are consumed in the event loop's default executor.
+
+    Supports the same events as :class:`WsgiApplication`.
+    """
+
+    supports_awaitables = True
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.handle_lifespan(receive, send)
+
+        if scope['type'] != 'http':
+            raise ValueError("Unsupported ASGI scope type %r" % scope['type'])
+
+        try:
+            body = await self.read_body(scope, receive)
+
+        except RequestTooLongError as e:
+            req_env = _scope_to_environ(scope, [])
+            return await self.handle_asgi_error(req_env, e, send)
+
+        req_env = _scope_to_environ(scope, body)
+        if _is_wsdl_request(req_env):
+            return await self.send_wsgi_response(send,
+                    lambda start_response: WsgiApplication.__call__(self,
+                                                      req_env, start_response))
+
+        return await self.handle_asgi_rpc(req_env, body, send)
+
+    def call_in_executor(self, executor, func, *args):
+        return executor.wrap_future(asyncio.get_event_loop(), func, *args)
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, scope, receive):
+        """Returns the request body as a list of chunks. Raises
+        :class:`spyne.error.RequestTooLongError` as soon as it's clear that the
+        request body is longer than ``max_content_length``."""
+
+        for k, v in scope.get('headers', ()):
+            if k.lower() == b'content-length':
+                if int(v) > self.max_content_length:
+                    raise RequestTooLongError()
+                break
+
+        retval = []
+        length = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+
+            chunk = message.get('body', b'')
+            if len(chunk) > 0:
+                length += len(chunk)
+                if length > self.max_content_length:
+                    raise RequestTooLongError()
+                retval.append(chunk)
+
+            if not message.get('more_body', False):
+                break
+
+        return retval
+
+    async def send_wsgi_response(self, send, wsgi_call):
+        """Sends the response of the given wsgi call over the given ASGI send
+        callable. ``wsgi_call`` is called with a ``start_response`` callable
+        and must return an iterable of strings."""
+
+        response = []
+
+        def start_response(status, headers):
+            response.append((status, headers))
+
+        out_string = wsgi_call(start_response)
+
+        # lists are already serialized. other iterables may serialize the
+        # response as they're consumed, so they're consumed in a worker thread
+        # so as not to block the event loop.
+        in_executor = not isinstance(out_string, (list, tuple))
+        out_string = iter(out_string)
+        loop = asyncio.get_event_loop()
+
+        async def next_chunk():
+            if in_executor:
+                return await loop.run_in_executor(None, _next_chunk,
+                                                                     out_string)
+            return _next_chunk(out_string)
+
+        # the body has to be iterated before sending the headers so that
+        # generator bodies get a chance to set them.
+        chunk = await next_chunk()
+
+        status, headers = response[0]
+        await send({
+            'type': 'http.response.start',
+            'status': int(status[:3]),
+            'headers': _gen_asgi_headers(headers),
+        })
+
+        while chunk is not None:
+            await self._send_chunk(send, chunk)
+            chunk = await next_chunk()
+
+        await send({'type': 'http.response.body', 'body': b'',
+                                                            'more_body': False})
+
+    async def _send_chunk(self, send, chunk):
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf8')
+
+        await send({'type': 'http.response.body', 'body': chunk,
+                                                             'more_body': True})
+
+    async def handle_asgi_error(self, req_env, error, send):
+        ctx = AsgiMethodContext(self, req_env, self.app.out_protocol.mime_type)
+        ctx.in_error = ctx.out_error = error
+
+        return await self.send_wsgi_response(send,
+                    lambda start_response: self.handle_error(ctx, [], error,
+                                                               start_response))
+
+    async def handle_asgi_rpc(self, req_env, body, send):
+        initial_ctx = AsgiMethodContext(self, req_env,
+                                                self.app.out_protocol.mime_type)
+
+        self.event_manager.fire_event('wsgi_call', initial_ctx)
+
+        initial_ctx.in_string = self.decode_in_string(body,
+                                        req_env.get('HTTP_CONTENT_ENCODING'))
+        in_string_charset = None
+        content_type = req_env.get("CONTENT_TYPE")
+        if content_type is not None:
+            in_string_charset = parse_header(content_type)[1].get('charset',
+                                                                          None)
+
+        contexts = self.generate_contexts(initial_ctx, in_string_charset)
+        p_ctx, others = contexts[0], contexts[1:]
+
+        if p_ctx.in_error:
+            return await self.send_wsgi_response(send,
+                    lambda start_response: self.handle_error(p_ctx, others,
+                                              p_ctx.in_error, start_response))
+
+        self.get_in_object(p_ctx)
+        if p_ctx.in_error:
+            logger.error(p_ctx.in_error)
+            return await self.send_wsgi_response(send,
+                    lambda start_response: self.handle_error(p_ctx, others,
+                                              p_ctx.in_error, start_response))
+
+        ret = self.get_out_object(p_ctx)
+        if ret is not None:
+            try:
+                self.app.process_return_object(p_ctx, await ret)
+            except Exception as e:
+                self.app.process_exception(p_ctx, e)
+
+        if p_ctx.out_error:
+            return await self.send_wsgi_response(send,
+                    lambda start_response: self.handle_error(p_ctx, others,
+                                              p_ctx.out_error, start_response))
+
+        return await self.send_wsgi_response(send,
+                    lambda start_response: self.handle_rpc_return(p_ctx, others,
+                                                               start_response))
@@ -45,12 +45,30 @@ from spyne.model.fault import Fault
 from spyne.protocol.soap import Soap11
 from spyne.protocol.http import HttpRpc
 from spyne.server.http import HttpBase, HttpMethodContext
+from spyne.server.http import HttpTransportContext
 from spyne.server.wsgi import WsgiApplication
 
 
 logger = logging.getLogger(__name__)
 
 
+class DjangoHttpTransportContext(HttpTransportContext):
+    """The class that is used in the transport attribute of the
+    :class:`DjangoHttpMethodContext` class."""
+
+    def get_request_method(self):
+        return self.req.method
+
+    def get_request_header(self, name):
+        return self.req.META.get('HTTP_' + name.upper().replace('-', '_'))
+
+
+class DjangoHttpMethodContext(HttpMethodContext):
+    """The Django-specific method context."""
+
+    default_transport_context = DjangoHttpTransportContext
+
+
 class DjangoApplication(WsgiApplication):
     """You should use this for regular RPC."""
 
@@ -106,8 +124,12 @@ class StreamingDjangoApplication(DjangoApplication):
 class DjangoServer(HttpBase):
     """Server talking in Django request/response objects."""
 
-    def __init__(self, app, chunked=False):
-        super(DjangoServer, self).__init__(app, chunked=chunked)
+    def __init__(self, app, chunked=False, max_content_length=2 * 1024 * 1024,
+                block_length=8 * 1024, compression=False, compression_level=6,
+                compression_min_length=1024):
+        super(DjangoServer, self).__init__(app, chunked, max_content_length,
+                            block_length, compression, compression_level,
+                            compression_min_length)
         self._wsdl = None
 
     def handle_rpc(self, request, *args, **kwargs):
@@ -141,6 +163,8 @@ class DjangoServer(HttpBase):
                                     get_fault_string_from_exception(e))
             return self.handle_error(p_ctx, others, p_ctx.out_error)
 
+        self.set_cached_response(p_ctx)
+
         have_protocol_headers = (isinstance(p_ctx.out_protocol, HttpRpc) and
                                  p_ctx.out_header_doc is not None)
 
@@ -150,10 +174,13 @@ class DjangoServer(HttpBase):
         if p_ctx.descriptor and p_ctx.descriptor.mtom:
             raise NotImplementedError
 
+        self.compress_out_string(p_ctx,
+                                  request.META.get('HTTP_ACCEPT_ENCODING'))
+
         if self.chunked:
             response = StreamingHttpResponse(p_ctx.out_string)
         else:
-            return HttpResponse(''.join(p_ctx.out_string))
+            response = HttpResponse(''.join(p_ctx.out_string))
 
         p_ctx.close()
 
@@ -161,7 +188,7 @@ class DjangoServer(HttpBase):
 
     def handle_wsdl(self, request, *args, **kwargs):
         """Return services WSDL."""
-        ctx = HttpMethodContext(self, request,
+        ctx = DjangoHttpMethodContext(self, request,
                                 'text/xml; charset=utf-8')
 
         if self.doc.wsdl11 is None:
@@ -196,6 +223,8 @@ class DjangoServer(HttpBase):
                 p_ctx.out_protocol.fault_to_http_response_code(error)
 
         self.get_out_string(p_ctx)
+        self.compress_out_string(p_ctx,
+                           p_ctx.transport.req.META.get('HTTP_ACCEPT_ENCODING'))
         resp = HttpResponse(''.join(p_ctx.out_string))
         return self.response(resp, p_ctx, others, error)
 
@@ -206,10 +235,11 @@ class DjangoServer(HttpBase):
         :returns: generated contexts
         """
 
-        initial_ctx = HttpMethodContext(self, request,
+        initial_ctx = DjangoHttpMethodContext(self, request,
                                         self.app.out_protocol.mime_type)
 
-        initial_ctx.in_string = request.body
+        initial_ctx.in_string = self.decode_in_string([request.body],
+                                    request.META.get('HTTP_CONTENT_ENCODING'))
         in_string_charset = request.encoding or settings.DEFAULT_CHARSET
 
         return self.generate_contexts(initial_ctx, in_string_charset)
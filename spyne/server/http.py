@@ -17,11 +17,128 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
+import logging
+logger = logging.getLogger(__name__)
+
+import zlib
+import hashlib
+import itertools
 
 from spyne import TransportContext
 from spyne import MethodContext
+from spyne.error import InvalidInputError
+from spyne.error import RequestTooLongError
 from spyne.server import ServerBase
-from spyne.const.http import gen_body_redirect, HTTP_301, HTTP_302
+from spyne.util import _bytes_chunks
+from spyne.util.cache import LruCache
+from spyne.util.cache import get_canonical_key
+from spyne.const.http import gen_body_redirect, HTTP_301, HTTP_302, HTTP_304
+
+
+def _gen_etag(data):
+    return '"%s"' % hashlib.md5(data).hexdigest()
+
+
+def _etag_matches(if_none_match, etag):
+    """Tells whether the value of an If-None-Match header matches the given
+    entity tag, using the weak comparison function of RFC 7232."""
+
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    if etag.startswith('W/'):
+        etag = etag[2:]
+
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+
+    return False
+
+
+def _parse_accept_encoding(value):
+    """Returns a dict that maps the codings in the given Accept-Encoding header
+    value to their quality values."""
+
+    retval = {}
+    for part in value.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        q = 1.0
+        for param in params.split(';'):
+            k, _, v = param.partition('=')
+            if k.strip().lower() == 'q':
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+
+        retval[coding] = q
+
+    return retval
+
+
+def _compress(chunks, encoding, level):
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    else:
+        compressor = zlib.compressobj(level)
+
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf8')
+
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def _decompress(chunks, encoding, block_length, max_length):
+    # this is checked here so that the error is raised while reading the
+    # request, where Faults are handled.
+    if not (encoding in HttpBase.CONTENT_ENCODINGS):
+        raise InvalidInputError("Unsupported content encoding", encoding)
+
+    # 32 + MAX_WBITS detects both the gzip and the zlib header.
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    length = 0
+
+    try:
+        for chunk in chunks:
+            # decompress a block at a time, so that a small request can't make
+            # us allocate a huge buffer.
+            while chunk:
+                data = decompressor.decompress(chunk, block_length)
+                chunk = decompressor.unconsumed_tail
+
+                length += len(data)
+                if length > max_length:
+                    raise RequestTooLongError()
+
+                if data:
+                    yield data
+
+        data = decompressor.flush()
+
+    except zlib.error as e:
+        raise InvalidInputError("Invalid compressed request body", str(e))
+
+    if length + len(data) > max_length:
+        raise RequestTooLongError()
+
+    if data:
+        yield data
 
 
 class HttpTransportContext(TransportContext):
@@ -49,6 +166,29 @@ class HttpTransportContext(TransportContext):
         self.wsdl_error = None
         """The error when handling WSDL requests."""
 
+        self.http_cache_key = None
+        """The key of the response in the http cache of the method, or None if
+        the response is not going to be cached."""
+
+        self.upload_bytes = 0
+        """Total number of bytes of the files uploaded with this request."""
+
+        self.upload_bytes_spooled = 0
+        """Number of bytes of the files uploaded with this request that were
+        written to temporary files on disk."""
+
+    def get_request_method(self):
+        """Returns the http request method, e.g. ``'GET'``. Transports that
+        can't tell return None."""
+
+        return None
+
+    def get_request_header(self, name):
+        """Returns the value of the request header with the given name, or None
+        when it's missing. Transports that can't tell always return None."""
+
+        return None
+
     def get_mime_type(self):
         return self.resp_headers.get('Content-Type', None)
 
@@ -101,14 +241,295 @@ class HttpMethodContext(MethodContext):
     """Assigning an out protocol overrides the mime type of the transport."""
 
 
+class HttpCache(object):
+    """Declares the responses of a method cacheable. Pass an instance as the
+    ``_http_cache`` argument to the ``@rpc`` decorator: ::
+
+        class SomeService(ServiceBase):
+            @rpc(Integer, _returns=Unicode, _http_cache=HttpCache(max_age=60))
+            def get_name(ctx, id):
+                return lookup_name(id)
+
+    The http transports then send ``Cache-Control`` and ``ETag`` headers with
+    the responses to GET and HEAD requests. Conditional GET requests whose
+    ``If-None-Match`` header matches a response that's younger than
+    ``max_age`` get a ``304 Not Modified`` response without the user code being
+    called. Other requests are not cached.
+
+    The ``method_call`` events are fired for cached responses as well, so their
+    listeners can still reject the request. Requests that carry an
+    ``Authorization`` or a ``Cookie`` header get their own cache entries, their
+    responses are never stored and are always marked ``private``.
+
+    Only use this for methods that don't have side effects. Only the response
+    body is cached, not the headers or the response code set by user code.
+
+    :param max_age: Number of seconds the response is considered fresh.
+    :param private: When True, the response is only cacheable by the client,
+        not by shared caches.
+    :param vary_by_args: When False, the response is assumed to be the same
+        regardless of the arguments.
+    :param store: When True, serialized responses to anonymous requests are
+        kept in memory and returned to any client without calling the user
+        code, as long as they're fresh.
+    :param size: Maximum number of responses to keep track of.
+    """
+
+    def __init__(self, max_age=0, private=False, vary_by_args=True,
+                                                       store=False, size=256):
+        self.max_age = max_age
+        self.private = private
+        self.vary_by_args = vary_by_args
+        self.store = store
+
+        self.entries = LruCache(size, ttl=max_age)
+        """Maps cache keys to ``(etag, out_string, length)`` tuples.
+        ``out_string`` is None when ``store`` is False."""
+
+        self.private_cache_control = 'private, max-age=%d' % max_age
+        if private:
+            self.cache_control = self.private_cache_control
+        else:
+            self.cache_control = 'public, max-age=%d' % max_age
+
+    def get_key(self, ctx):
+        """Returns the cache key for the response to the given context. Raises
+        ``TypeError`` when the input can't be used as a cache key."""
+
+        retval = (ctx.descriptor.key, ctx.out_protocol)
+        if self.vary_by_args:
+            retval += (get_canonical_key(ctx.in_header),
+                                          get_canonical_key(ctx.in_object))
+
+        return retval
+
+
 class HttpBase(ServerBase):
     transport = 'http://schemas.xmlsoap.org/soap/http'
 
+    CONTENT_ENCODINGS = ('gzip', 'deflate')
+    """Response content codings, in order of preference."""
+
     def __init__(self, app, chunked=False,
                 max_content_length=2 * 1024 * 1024,
-                block_length=8 * 1024):
+                block_length=8 * 1024,
+                compression=False, compression_level=6,
+                compression_min_length=1024):
         super(HttpBase, self).__init__(app)
 
         self.chunked = chunked
         self.max_content_length = max_content_length
         self.block_length = block_length
+
+        self.compression = compression
+        """When True, responses are compressed if the client accepts gzip or
+        deflate content coding."""
+
+        self.compression_level = compression_level
+        """The zlib compression level, from 1 (fastest) to 9 (smallest)."""
+
+        self.compression_min_length = compression_min_length
+        """Responses shorter than this many bytes are not compressed."""
+
+    def get_content_encoding(self, accept_encoding):
+        """Returns the content coding to use for the response, given the value
+        of the request's Accept-Encoding header, or None if the response is
+        not going to be compressed."""
+
+        if not self.compression or not accept_encoding:
+            return None
+
+        accepted = _parse_accept_encoding(accept_encoding)
+        default_q = accepted.get('*', 0.0)
+
+        retval, retval_q = None, 0.0
+        for encoding in self.CONTENT_ENCODINGS:
+            q = accepted.get(encoding, default_q)
+            if q > retval_q:
+                retval, retval_q = encoding, q
+
+        return retval
+
+    def compress_out_string(self, ctx, accept_encoding):
+        """Replaces ``ctx.out_string`` with a compressed stream, when the
+        client accepts it and the response is long enough. The stream is
+        compressed chunk by chunk as it's consumed. Only enough of the original
+        chunks to decide whether to compress are read upfront.
+
+        Sets the Content-Encoding and Vary response headers and returns the
+        content coding used, or None if the response was left alone."""
+
+        if ctx.out_string is None:
+            return None
+
+        resp_headers = ctx.transport.resp_headers
+        if 'Content-Encoding' in resp_headers:
+            return None
+
+        encoding = self.get_content_encoding(accept_encoding)
+        if encoding is None:
+            return None
+
+        if ctx.out_string_length is not None and \
+                         ctx.out_string_length < self.compression_min_length:
+            return None
+
+        out_string = iter(ctx.out_string)
+        head = []
+        length = 0
+        for chunk in out_string:
+            head.append(chunk)
+            length += len(chunk)
+            if length >= self.compression_min_length:
+                break
+
+        else:
+            ctx.out_string = head
+            return None
+
+        ctx.out_string = _compress(itertools.chain(head, out_string), encoding,
+                                                        self.compression_level)
+        ctx.out_string_length = None
+
+        resp_headers['Content-Encoding'] = encoding
+        resp_headers['Vary'] = 'Accept-Encoding'
+        resp_headers.pop('Content-Length', None)
+
+        return encoding
+
+    def decode_in_string(self, in_string, content_encoding):
+        """Returns an iterable that decompresses the given request body
+        according to the given Content-Encoding header value. Iterating it
+        raises :class:`spyne.error.InvalidInputError` for content codings that
+        are not supported or invalid data, and
+        :class:`spyne.error.RequestTooLongError` when the decompressed body is
+        longer than ``max_content_length``."""
+
+        if not content_encoding:
+            return in_string
+
+        content_encoding = content_encoding.strip().lower()
+        if content_encoding == 'identity':
+            return in_string
+
+        return _decompress(in_string, content_encoding, self.block_length,
+                                                       self.max_content_length)
+
+    def get_cached_response(self, ctx):
+        """Looks the response to the given context up in the http cache of its
+        method. Only responses to GET and HEAD requests are cached.
+
+        Returns True when the response was served from the cache, in which case
+        ``ctx.out_string`` and the response headers are set and the user code
+        must not be called. Returns False otherwise.
+        """
+
+        if ctx.descriptor is None or ctx.descriptor.http_cache is None:
+            return False
+
+        if not (ctx.transport.get_request_method() in ('GET', 'HEAD')):
+            return False
+
+        cache = ctx.descriptor.http_cache
+        try:
+            key = cache.get_key(ctx)
+        except TypeError as e:
+            logger.debug("Response not cacheable: %r", e)
+            return False
+
+        # responses to requests that identify the client are not shared with
+        # other clients.
+        identity = self.__get_identity(ctx)
+        if identity is not None:
+            key += (identity,)
+
+        entry = cache.entries.get(key)
+        if entry is None:
+            ctx.transport.http_cache_key = key
+            return False
+
+        etag, out_string, length = entry
+        if self.__set_cache_headers(ctx, cache, etag, identity):
+            return True
+
+        if out_string is None:
+            ctx.transport.http_cache_key = key
+            return False
+
+        ctx.out_string = out_string
+        ctx.out_string_length = length
+
+        return True
+
+    def set_cached_response(self, ctx):
+        """Puts ``ctx.out_string`` in the http cache of the method, when it was
+        looked up there with :func:`get_cached_response` and wasn't found.
+        Meant to be called once ``ctx.out_string`` is set. The response is
+        read completely at this point."""
+
+        key = ctx.transport.http_cache_key
+        if key is None or ctx.out_error is not None:
+            return
+
+        ctx.transport.http_cache_key = None
+        cache = ctx.descriptor.http_cache
+
+        out_string = _bytes_chunks(list(ctx.out_string))
+        digest = hashlib.md5()
+        length = 0
+        for chunk in out_string:
+            digest.update(chunk)
+            length += len(chunk)
+
+        # compression can alter the representation, so the tag is weak.
+        etag = 'W/"%s"' % digest.hexdigest()
+
+        identity = self.__get_identity(ctx)
+        if cache.store and identity is None:
+            cache.entries.put(key, (etag, out_string, length))
+        else:
+            cache.entries.put(key, (etag, None, length))
+
+        ctx.out_string = out_string
+        ctx.out_string_length = length
+
+        self.__set_cache_headers(ctx, cache, etag, identity)
+
+    @staticmethod
+    def __get_identity(ctx):
+        """Returns a digest of the credentials in the request, or None when
+        there are none. The credentials themselves are not kept in the cache."""
+
+        auth = ctx.transport.get_request_header('Authorization')
+        cookie = ctx.transport.get_request_header('Cookie')
+        if auth is None and cookie is None:
+            return None
+
+        digest = hashlib.sha256()
+        for s in (auth, cookie):
+            if s is None:
+                s = ''
+            if not isinstance(s, bytes):
+                s = s.encode('utf8')
+            # the length prefix keeps the two values apart.
+            digest.update(str(len(s)).encode('ascii') + b':' + s)
+
+        return digest.hexdigest()
+
+    def __set_cache_headers(self, ctx, cache, etag, identity):
+        resp_headers = ctx.transport.resp_headers
+        if identity is None:
+            resp_headers['Cache-Control'] = cache.cache_control
+        else:
+            # shared caches must not serve this response to other clients.
+            resp_headers['Cache-Control'] = cache.private_cache_control
+        resp_headers['ETag'] = etag
+
+        if_none_match = ctx.transport.get_request_header('If-None-Match')
+        if _etag_matches(if_none_match, etag):
+            ctx.transport.resp_code = HTTP_304
+            ctx.out_string = []
+            ctx.out_string_length = 0
+            return True
+
+        return False
@@ -94,6 +94,13 @@ class _FunctionCall(object):
         self.__ostr = ostr
         self.__locale = locale
 
+        # this is what ctx.transport.itself points to. memoized responses
+        # don't have an out_object to return.
+        self.uses_out_string = ostr
+
+    def get_cached_response(self, ctx):
+        return self.__server.get_cached_response(ctx)
+
     def __call__(self, *args, **kwargs):
         initial_ctx = MethodContext(self)
         initial_ctx.method_request_string = self.__key
@@ -138,6 +145,10 @@ class _FunctionCall(object):
             if ctx.out_error:
                 raise ctx.out_error
 
+            elif cnt == 0 and self.__ostr:
+                self.__server.get_out_string(ctx)
+                _retval = ctx.out_string
+
             else:
                 if len(ctx.descriptor.out_message._type_info) == 0:
                     _retval = None
@@ -148,10 +159,6 @@ class _FunctionCall(object):
                 else:
                     _retval = ctx.out_object
 
-                if cnt == 0 and self.__ostr:
-                    self.__server.get_out_string(ctx)
-                    _retval = ctx.out_string
-
             if cnt == 0:
                 retval = _retval
             else:
@@ -0,0 +1,293 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.server.prefork`` module contains a pre-forking http server for
+wsgi applications. The application, the interface documents and the validation
+schema are built once in the master process and the workers share them
+copy-on-write. So is the wsdl, when the public url of the service is given: ::
+
+    wsgi_app = WsgiApplication(Application(...))
+    PreforkServer(wsgi_app, '0.0.0.0', 8000, workers=8,
+                  public_url='http://example.com/').serve_forever()
+
+The master respawns workers that die. Send it ``SIGHUP`` to restart all
+workers gracefully, ``SIGTERM`` or ``SIGINT`` to stop. Workers finish the
+request at hand before exiting. This is a restart, not a reload: the new
+workers are forked from the same master, so they serve the application that
+was imported before the first fork. Restart the master to pick up code
+changes.
+
+The workers use the stdlib's ``wsgiref`` server, so each one handles a single
+request at a time. This only works on platforms that have ``os.fork()``.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import gc
+import os
+import errno
+import select
+import signal
+import time
+
+try:
+    from urllib.parse import urlsplit
+except ImportError: # Python 2
+    from urlparse import urlsplit
+
+from io import BytesIO
+from multiprocessing import Array
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+
+class PreforkServer(object):
+    """Serves the given wsgi application from ``workers`` forked processes
+    listening on the same socket.
+
+    :param wsgi_app: The wsgi callable, normally a
+        :class:`spyne.server.wsgi.WsgiApplication` instance.
+    :param host: The address to listen on.
+    :param port: The port to listen on.
+    :param workers: Number of worker processes.
+    :param handler_class: The ``wsgiref`` request handler class.
+    :param poll_interval: How often, in seconds, the master and the workers
+        check for signals.
+    :param public_url: The url the wsdl is requested from, as the wsgi
+        application sees it, e.g. ``'http://example.com/'``. The wsdl is
+        built for this url before the fork. When ``None``, the wsdl is built
+        lazily by every worker, as its contents depend on the url of the
+        request.
+    """
+
+    def __init__(self, wsgi_app, host='127.0.0.1', port=8000, workers=4,
+                       handler_class=WSGIRequestHandler, poll_interval=0.5,
+                       public_url=None):
+        self.wsgi_app = wsgi_app
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.handler_class = handler_class
+        self.poll_interval = poll_interval
+        self.public_url = public_url
+
+        self.request_counts = Array('L', workers)
+        """Number of requests served by each worker slot. It lives in shared
+        memory, so it's up to date in the master process as well. During a
+        restart, an old and a new worker share a slot, so it's only updated
+        under its lock."""
+
+        self.workers = {}
+        """Maps worker pids to worker slots."""
+
+        self.server = None
+        self._alive = False
+        self._restart = False
+
+    @property
+    def request_count(self):
+        """Total number of requests served by all workers."""
+
+        return sum(self.request_counts[:])
+
+    def warm_up(self):
+        """Builds everything that's otherwise built lazily on first request,
+        so that workers don't have to do it after the fork.
+
+        The default implementation requests the wsdl document for
+        :attr:`public_url` through the wsgi application, if it has one. The
+        address in the wsdl is the one clients use, so it's not built from
+        the address the server binds to."""
+
+        if self.public_url is None:
+            return
+
+        doc = getattr(self.wsgi_app, 'doc', None)
+        if doc is None or doc.wsdl11 is None:
+            return
+
+        def start_response(status, headers):
+            logger.debug("Warm-up wsdl request: %s", status)
+
+        url = urlsplit(self.public_url)
+        if url.port is not None:
+            port = str(url.port)
+        elif url.scheme == 'https':
+            port = '443'
+        else:
+            port = '80'
+
+        b''.join(self.wsgi_app({
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': url.path or '/',
+            'QUERY_STRING': 'wsdl',
+            'HTTP_HOST': url.netloc,
+            'SERVER_NAME': url.hostname,
+            'SERVER_PORT': port,
+            'SERVER_PROTOCOL': 'HTTP/1.0',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': url.scheme,
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': BytesIO(),
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }, start_response))
+
+    def bind(self):
+        self.server = make_server(self.host, self.port, self.wsgi_app,
+                                            handler_class=self.handler_class)
+        self.port = self.server.server_port
+
+    def serve_forever(self):
+        if self.server is None:
+            self.bind()
+
+        self.warm_up()
+
+        # keep the garbage collector from touching, and thus un-sharing, the
+        # pages with the objects that were created so far.
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        self._alive = True
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        for slot in range(self.num_workers):
+            self._spawn(slot)
+
+        logger.info("Serving on http://%s:%d with %d workers.", self.host,
+                                                self.port, self.num_workers)
+
+        try:
+            while self._alive:
+                if self._restart:
+                    self._restart = False
+                    self._replace_workers()
+
+                self._reap()
+                time.sleep(self.poll_interval)
+
+        finally:
+            self._stop_workers()
+            self.server.server_close()
+
+    def _handle_stop(self, signum, frame):
+        self._alive = False
+
+    def _handle_restart(self, signum, frame):
+        self._restart = True
+
+    def _spawn(self, slot):
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid != 0:
+            self.workers[pid] = slot
+            return pid
+
+        # worker process
+        status = 0
+        try:
+            self._work(slot, master_pid)
+        except Exception as e:
+            logger.exception(e)
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _work(self, slot, master_pid):
+        self._alive = True
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        counts = self.request_counts
+        wsgi_app = self.wsgi_app
+
+        lock = counts.get_lock()
+
+        def counting_app(req_env, start_response):
+            with lock:
+                counts[slot] += 1
+            return wsgi_app(req_env, start_response)
+
+        self.server.set_app(counting_app)
+        self.server.timeout = self.poll_interval
+
+        # also quit when the master is gone.
+        while self._alive and os.getppid() == master_pid:
+            try:
+                self.server.handle_request()
+
+            except (select.error, OSError, IOError) as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as e:
+                if e.errno == errno.ECHILD:
+                    return
+                raise
+
+            if pid == 0:
+                return
+
+            slot = self.workers.pop(pid, None)
+            if slot is not None and self._alive:
+                logger.warning("Worker %d (slot %d) exited with status %d, "
+                                          "respawning.", pid, slot, status)
+                self._spawn(slot)
+
+    def _replace_workers(self):
+        logger.info("Restarting workers.")
+
+        old = list(self.workers.items())
+        for pid, slot in old:
+            del self.workers[pid]
+            self._spawn(slot)
+            self._kill(pid)
+
+    def _stop_workers(self):
+        pids = list(self.workers)
+        self.workers.clear()
+
+        for pid in pids:
+            self._kill(pid)
+
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except OSError as e:
+                if e.errno != errno.ECHILD:
+                    raise
+
+    def _kill(self, pid):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
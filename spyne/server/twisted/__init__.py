@@ -18,4 +18,5 @@
 #
 
 from spyne.server.twisted.http import TwistedWebResource
+from spyne.server.twisted.http import TwistedHttpRequest
 from spyne.server.twisted.websocket import TwistedWebSocketResource
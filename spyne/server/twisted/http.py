@@ -49,13 +49,23 @@ logger = logging.getLogger(__name__)
 from inspect import isgenerator
 
 from spyne.error import InternalError
+from spyne.error import RequestTooLongError
 from twisted.python.log import err
 from twisted.internet.interfaces import IPullProducer
+from twisted.internet.interfaces import IPushProducer
 from twisted.internet.defer import Deferred
+
+try:
+    import asyncio
+    from twisted.internet.defer import ensureDeferred
+except ImportError:
+    ensureDeferred = None
+from twisted.internet.error import ConnectionLost
 from twisted.internet.protocol import Factory
 from twisted.web.iweb import UNKNOWN_LENGTH
 from twisted.web.resource import Resource
 from twisted.web.server import NOT_DONE_YET
+from twisted.web.server import Request
 from twisted.python import log
 
 # FIXME: Switch to:
@@ -74,7 +84,9 @@ from spyne import TransportContext
 from spyne.auxproc import process_contexts
 from spyne.const.ansi_color import LIGHT_GREEN
 from spyne.const.ansi_color import END_COLOR
+from spyne.const.http import HTTP_304
 from spyne.const.http import HTTP_404
+from spyne.const.http import HTTP_413
 from spyne.model import PushBase
 from spyne.model.complex import ComplexModel
 from spyne.model.fault import Fault
@@ -84,6 +96,21 @@ from spyne.server.http import HttpMethodContext
 from spyne.server.http import HttpTransportContext
 
 
+def _awaitable_to_deferred(awaitable):
+    """Returns a Deferred that fires with the outcome of the given coroutine
+    or asyncio future. Under the asyncio reactor, it's run as an asyncio task,
+    so it can wait for anything asyncio can. Otherwise, coroutines are run
+    by twisted and can only wait for Deferreds and other coroutines."""
+
+    from twisted.internet import reactor
+
+    loop = getattr(reactor, '_asyncioEventloop', None)
+    if loop is not None:
+        return Deferred.fromFuture(asyncio.ensure_future(awaitable, loop=loop))
+
+    return ensureDeferred(awaitable)
+
+
 def _reconstruct_url(request):
     server_name = request.getRequestHostname()
     server_port = request.getHost().port
@@ -99,48 +126,142 @@ def _reconstruct_url(request):
 
 
 class _Producer(object):
-    implements(IPullProducer)
+    """Writes an iterable of strings to a consumer, coalescing small chunks
+    into blocks of at least ``write_size`` bytes.
+
+    When registered as a push producer, it writes until the consumer pauses it
+    or the body runs out. When registered as a pull producer, it writes one
+    block every time the consumer asks for more.
+    """
+
+    implements(IPushProducer, IPullProducer)
 
     deferred = None
 
-    def __init__(self, body, consumer):
-        """:param body: an iterable of strings"""
+    def __init__(self, body, consumer, write_size=8 * 1024, length=None):
+        """:param body: an iterable of strings. Only the length of lists and
+        tuples is computed upfront, other iterables are consumed lazily.
+        :param length: The length of the body, if it's already known."""
 
-        # check to see if we can determine the length
-        try:
-            len(body) # iterator?
+        if length is not None:
+            self.length = length
+        elif isinstance(body, (list, tuple)):
             self.length = sum([len(fragment) for fragment in body])
-            self.body = iter(body)
-
-        except TypeError:
+        else:
             self.length = UNKNOWN_LENGTH
-            self.body = body
 
+        self.body = iter(body)
+        self.consumer = consumer
+        self.write_size = write_size
+
+        self.streaming = False
+        self.paused = False
         self.deferred = Deferred()
 
-        self.consumer = consumer
+    def start(self, streaming=True):
+        """Registers the producer with the consumer and starts writing."""
 
-    def resumeProducing(self):
-        try:
-            chunk = next(self.body)
+        self.streaming = streaming
+        self.consumer.registerProducer(self, streaming)
+
+        # the consumer pauses streaming producers it's not ready for, and pulls
+        # from non-streaming ones itself.
+        if streaming and not self.paused:
+            self.resumeProducing()
+
+    def _next_block(self):
+        block = []
+        size = 0
 
-        except StopIteration as e:
-            self.consumer.unregisterProducer()
-            if self.deferred is not None:
-                self.deferred.callback(self.consumer)
-                self.deferred = None
+        for chunk in self.body:
+            block.append(chunk)
+            size += len(chunk)
+            if size >= self.write_size:
+                break
+
+        return ''.join(block)
+
+    def resumeProducing(self):
+        if self.deferred is None:
             return
 
-        self.consumer.write(chunk)
+        self.paused = False
+
+        while True:
+            try:
+                block = self._next_block()
+
+            except Exception as e:
+                self.consumer.unregisterProducer()
+                self.deferred, d = None, self.deferred
+                d.errback(e)
+                return
+
+            if len(block) == 0:
+                self.consumer.unregisterProducer()
+                self.deferred, d = None, self.deferred
+                d.callback(self.consumer)
+                return
+
+            self.consumer.write(block)
+
+            if self.paused or not self.streaming:
+                return
 
     def pauseProducing(self):
-        pass
+        self.paused = True
 
     def stopProducing(self):
+        self.paused = True
+
         if self.deferred is not None:
-            self.deferred.errback(
-                               Exception("Consumer asked us to stop producing"))
-        self.deferred = None
+            self.deferred, d = None, self.deferred
+            d.errback(ConnectionLost("Consumer asked us to stop producing"))
+
+
+class TwistedHttpRequest(Request):
+    """A request class that refuses request bodies longer than
+    :attr:`max_content_length` before they are buffered. Use it as the site's
+    request factory: ::
+
+        site = Site(TwistedWebResource(app))
+        site.requestFactory = TwistedHttpRequest
+    """
+
+    max_content_length = 2 * 1024 * 1024
+    """Maximum request body length, in bytes. Subclass to change it."""
+
+    _too_long = False
+    _content_length = 0
+
+    def gotLength(self, length):
+        if length is not None and length > self.max_content_length:
+            self._refuse()
+        else:
+            Request.gotLength(self, length)
+
+    def handleContentChunk(self, data):
+        if self._too_long:
+            return
+
+        self._content_length += len(data)
+        if self._content_length > self.max_content_length:
+            self._refuse()
+        else:
+            Request.handleContentChunk(self, data)
+
+    def requestReceived(self, command, path, version):
+        if not self._too_long:
+            Request.requestReceived(self, command, path, version)
+
+    def _refuse(self):
+        self._too_long = True
+        self.content = None
+
+        transport = self.channel.transport
+        transport.write("HTTP/1.1 %s\r\nContent-Length: 0\r\n"
+                        "Connection: close\r\n\r\n" % HTTP_413)
+        transport.loseConnection()
 
 
 class TwistedHttpTransportContext(HttpTransportContext):
@@ -149,6 +270,12 @@ class TwistedHttpTransportContext(HttpTransportContext):
         super(TwistedHttpTransportContext, self).set_mime_type(what)
         self.req.setHeader('Content-Type', what)
 
+    def get_request_method(self):
+        return self.req.method
+
+    def get_request_header(self, name):
+        return self.req.getHeader(name)
+
 
 class TwistedHttpMethodContext(HttpMethodContext):
 
@@ -156,6 +283,14 @@ class TwistedHttpMethodContext(HttpMethodContext):
 
 
 class TwistedHttpTransport(HttpBase):
+    supports_awaitables = ensureDeferred is not None
+    """Coroutines and asyncio futures returned by user functions are waited
+    for in the reactor. Needs Python 3.5+ and a Twisted version that has
+    ``ensureDeferred``. Asyncio futures also need the asyncio reactor."""
+
+    def call_in_executor(self, executor, func, *args):
+        return executor.defer(func, *args)
+
     @staticmethod
     def decompose_incoming_envelope(prot, ctx, message):
         """This function is only called by the HttpRpc protocol to have the
@@ -178,16 +313,22 @@ class TwistedHttpTransport(HttpBase):
 class TwistedWebResource(Resource):
     """A server transport that exposes the application as a twisted web
     Resource.
+
+    Twisted buffers request bodies before calling the resource, so
+    ``max_content_length`` is only checked after the fact here. See
+    :class:`TwistedHttpRequest` for refusing long requests earlier.
     """
 
     isLeaf = True
 
     def __init__(self, app, chunked=False, max_content_length=2 * 1024 * 1024,
-                                           block_length=8 * 1024):
+                    block_length=8 * 1024, compression=False,
+                    compression_level=6, compression_min_length=1024):
         Resource.__init__(self)
 
         self.http_transport = TwistedHttpTransport(app, chunked,
-                                            max_content_length, block_length)
+                            max_content_length, block_length, compression,
+                            compression_level, compression_min_length)
         self._wsdl = None
 
     def render_GET(self, request):
@@ -214,6 +355,7 @@ class TwistedWebResource(Resource):
 
         p_ctx.out_object = error
         self.http_transport.get_out_string(p_ctx)
+        self.__compress_out_string(p_ctx, request)
 
         retval = ''.join(p_ctx.out_string)
 
@@ -226,7 +368,7 @@ class TwistedWebResource(Resource):
     def handle_rpc(self, request):
         initial_ctx = TwistedHttpMethodContext(self.http_transport, request,
                                  self.http_transport.app.out_protocol.mime_type)
-        initial_ctx.in_string = [request.content.getvalue()]
+        initial_ctx.in_string = self.__content_to_iterable(request)
 
         contexts = self.http_transport.generate_contexts(initial_ctx)
         p_ctx, others = contexts[0], contexts[1:]
@@ -240,20 +382,46 @@ class TwistedWebResource(Resource):
             if p_ctx.in_error:
                 return self.handle_rpc_error(p_ctx, others, p_ctx.in_error, request)
 
-            else:
-                self.http_transport.get_out_object(p_ctx)
-                if p_ctx.out_error:
-                    return self.handle_rpc_error(p_ctx, others, p_ctx.out_error,
+            awaitable = self.http_transport.get_out_object(p_ctx)
+            if p_ctx.out_error:
+                return self.handle_rpc_error(p_ctx, others, p_ctx.out_error,
                                                                         request)
 
         def _cb_request_finished(request):
             request.finish()
             p_ctx.close()
 
-        def _eb_request_finished(request):
-            err(request)
+        def _eb_request_finished(reason):
             p_ctx.close()
-            request.finish()
+
+            # the client went away, twisted has already told the request.
+            if reason.check(ConnectionLost):
+                return
+
+            err(reason)
+
+            # the response is incomplete, so it can't be finished. the
+            # connection is closed instead and the request is told about it.
+            if request.channel is not None:
+                transport = request.channel.transport
+                request.connectionLost(reason)
+                transport.loseConnection()
+
+        def _produce():
+            self.__set_cache_headers(p_ctx, request)
+            self.__compress_out_string(p_ctx, request)
+
+            producer = _Producer(p_ctx.out_string, request,
+                                       self.http_transport.block_length,
+                                       length=p_ctx.out_string_length)
+            if producer.length is not UNKNOWN_LENGTH and \
+                       p_ctx.transport.resp_code != HTTP_304 and \
+                       not request.responseHeaders.hasHeader('Content-Length'):
+                request.setHeader('Content-Length', str(producer.length))
+
+            producer.deferred.addCallbacks(_cb_request_finished,
+                                                           _eb_request_finished)
+            producer.start(streaming=not request.queued)
 
         def _cb_deferred(retval, request, cb=True):
             if cb and len(p_ctx.descriptor.out_message._type_info) <= 1:
@@ -262,13 +430,11 @@ class TwistedWebResource(Resource):
                 p_ctx.out_object = retval
 
             self.http_transport.get_out_string(p_ctx)
+            self.http_transport.set_cached_response(p_ctx)
 
             process_contexts(self.http_transport, others, p_ctx)
 
-            producer = _Producer(p_ctx.out_string, request)
-            producer.deferred.addCallbacks(_cb_request_finished,
-                                                           _eb_request_finished)
-            request.registerProducer(producer, False)
+            _produce()
 
         def _eb_deferred(retval, request):
             p_ctx.out_error = retval.value
@@ -280,7 +446,45 @@ class TwistedWebResource(Resource):
             request.write(ret)
             request.finish()
 
-        ret = p_ctx.out_object[0]
+        def _cb_awaitable(retval):
+            app = self.http_transport.app
+            try:
+                app.process_return_object(p_ctx, retval)
+            except Exception as e:
+                app.process_exception(p_ctx, e)
+
+            if p_ctx.out_error is None:
+                _cb_deferred(p_ctx.out_object, request, cb=False)
+            else:
+                _write_error()
+
+        def _eb_awaitable(failure):
+            self.http_transport.app.process_exception(p_ctx, failure.value)
+            _write_error()
+
+        def _write_error():
+            ret = self.handle_rpc_error(p_ctx, others, p_ctx.out_error, request)
+            request.write(ret)
+            request.finish()
+
+        # the user function is a coroutine or returned an asyncio future.
+        if awaitable is not None:
+            try:
+                d = _awaitable_to_deferred(awaitable)
+            except Exception as e:
+                if hasattr(awaitable, 'close'):
+                    awaitable.close()
+                self.http_transport.app.process_exception(p_ctx, e)
+                return self.handle_rpc_error(p_ctx, others, p_ctx.out_error,
+                                                                        request)
+
+            d.addCallbacks(_cb_awaitable, _eb_awaitable)
+            return NOT_DONE_YET
+
+        # there's no out_object when the response was cached or memoized.
+        ret = p_ctx.out_object
+        if isinstance(ret, (list, tuple)):
+            ret = ret[0]
         if isinstance(ret, Deferred):
             ret.addCallback(_cb_deferred, request)
             ret.addErrback(_eb_deferred, request)
@@ -294,10 +498,7 @@ class TwistedWebResource(Resource):
             def _cb_push():
                 process_contexts(self.http_transport, others, p_ctx)
 
-                producer = _Producer(p_ctx.out_string, request)
-                producer.deferred.addCallbacks(_cb_request_finished,
-                                                           _eb_request_finished)
-                request.registerProducer(producer, False)
+                _produce()
 
             ret.init(p_ctx, request, gen, _cb_push, None)
 
@@ -306,6 +507,50 @@ class TwistedWebResource(Resource):
 
         return NOT_DONE_YET
 
+    def __set_cache_headers(self, p_ctx, request):
+        resp_headers = p_ctx.transport.resp_headers
+        for k in ('Cache-Control', 'ETag'):
+            if k in resp_headers:
+                request.setHeader(k, resp_headers[k])
+
+        if p_ctx.transport.resp_code == HTTP_304:
+            request.setResponseCode(304)
+
+    def __compress_out_string(self, p_ctx, request):
+        encoding = self.http_transport.compress_out_string(p_ctx,
+                                          request.getHeader('Accept-Encoding'))
+        if encoding is not None:
+            request.setHeader('Content-Encoding', encoding)
+            request.setHeader('Vary', 'Accept-Encoding')
+
+    def __content_to_iterable(self, request):
+        return self.http_transport.decode_in_string(
+                                        self.__read_content(request),
+                                        request.getHeader('Content-Encoding'))
+
+    def __read_content(self, request):
+        max_content_length = self.http_transport.max_content_length
+        block_length = self.http_transport.block_length
+
+        length = request.getHeader('Content-Length')
+        if length is not None and int(length) > max_content_length:
+            raise RequestTooLongError()
+
+        content = request.content
+        content.seek(0)
+
+        bytes_read = 0
+        while True:
+            data = content.read(block_length)
+            if not data:
+                break
+
+            bytes_read += len(data)
+            if bytes_read > max_content_length:
+                raise RequestTooLongError()
+
+            yield data
+
     def __handle_wsdl_request(self, request):
         ctx = TwistedHttpMethodContext(self.http_transport, request,
                                                       "text/xml; charset=utf-8")
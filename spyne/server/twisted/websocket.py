@@ -46,12 +46,17 @@ from __future__ import absolute_import
 import logging
 logger = logging.getLogger(__name__)
 
+from collections import deque
 from inspect import isgenerator
 
 from spyne.error import InternalError
 from twisted.python.log import err
 from twisted.internet.interfaces import IPullProducer
+from twisted.internet.interfaces import IPushProducer
+from twisted.internet.task import cooperate
 from twisted.internet.defer import Deferred
+from twisted.internet.defer import succeed
+from twisted.internet.error import ConnectionLost
 from twisted.internet.protocol import Factory
 from twisted.web.iweb import UNKNOWN_LENGTH
 from twisted.web.resource import Resource
@@ -66,6 +71,7 @@ from twisted.python import log
 from spyne.util._twisted_ws import WebSocketsProtocol
 from spyne.util._twisted_ws import WebSocketsResource
 from spyne.util._twisted_ws import CONTROLS
+from spyne.util._twisted_ws import _makeFrame
 
 from zope.interface import implements
 
@@ -81,37 +87,91 @@ from spyne.model.fault import Fault
 from spyne.server import ServerBase
 from spyne.server.http import HttpBase
 from spyne.server.http import HttpMethodContext
+from spyne.util import Break
+from spyne.util import coroutine
 
 
 class WebSocketTransportContext(TransportContext):
-    def __init__(self, parent, transport, type, client_handle, parent):
+    def __init__(self, parent, transport, type, client_handle):
         TransportContext.__init__(self, parent, transport, type)
 
         self.client_handle = client_handle
         """TwistedWebSocketProtocol instance."""
 
-        self.parent = parent
-        """Parent Context"""
+        self.request_id = None
+        """The id the client assigned to the request in multiplexed mode.
+        It's sent back with the response."""
 
 
 class WebSocketMethodContext(MethodContext):
-    def __init__(self, parent, transport, client_handle):
-        MethodContext.__init__(self, parent, transport)
+    def __init__(self, transport, client_handle):
+        MethodContext.__init__(self, transport)
 
-        self.transport = WebSocketTransportContext(transport, 'ws',
-                                                            client_handle, self)
+        self.transport = WebSocketTransportContext(self, transport, 'ws',
+                                                                 client_handle)
 
 
-class TwistedWebSocketProtocol(WebSocketsProtocol):
-    """A protocol that parses and generates messages in a WebSocket stream."""
+class TwistedWebSocketTransport(ServerBase):
+    def call_in_executor(self, executor, func, *args):
+        return executor.defer(func, *args)
 
-    def __init__(self, transport, bookkeep=False, _clients=None):
+
+# object is in the bases so that the app_id setter works with Twisted versions
+# whose protocol classes are old-style.
+class TwistedWebSocketProtocol(WebSocketsProtocol, object):
+    """A protocol that parses and generates messages in a WebSocket stream.
+
+    Every WebSocket message is a request, which can be split across many
+    frames. Responses are sent as one frame per chunk in ``ctx.out_string``.
+
+    In multiplexed mode, the request document is preceded by a request id and
+    a newline (``"42\\n<document>"``). The response to it is tagged the same
+    way. This lets the client have many requests in flight on the same
+    connection, and get responses in the order they complete.
+
+    When a method returns a :class:`spyne.model.PushBase`, every item it
+    receives is sent as a separate message, as soon as it's appended. An empty
+    message (only the request id in multiplexed mode) ends the stream.
+    """
+
+    implements(IPushProducer)
+
+    max_pending = 64
+    """Maximum number of broadcast frames to hold for a client that can't keep
+    up, see :func:`sendPreframed`."""
+
+    disconnect_slow_consumers = False
+    """What to do with broadcast frames for a client that has ``max_pending``
+    frames waiting already. When ``False``, the frame is dropped. When
+    ``True``, the client is disconnected."""
+
+    def __init__(self, transport, bookkeep=False, _clients=None,
+                                                  multiplex=False, _topics=None):
         self._spyne_transport = transport
         self._clients = _clients
+        self._topics = _topics
         self.__app_id = id(self)
-        if bookkeep:
-            self.connectionMade = self._connectionMade
-            self.connectionLost = self._connectionLost
+        self.bookkeep = bookkeep
+        self.multiplex = multiplex
+
+        self._message_opcode = None
+        self._fragments = []
+
+        self.topics = set()
+        """The topics this client is subscribed to."""
+
+        self.paused = False
+        """True when the transport's write buffer is full."""
+
+        self.pending = deque()
+        """Broadcast frames waiting for the transport's write buffer to
+        drain."""
+
+        self.dropped = 0
+        """Number of broadcast frames dropped because the client was too
+        slow."""
+
+        self._resume_waiters = []
 
     @property
     def app_id(self):
@@ -122,24 +182,130 @@ class TwistedWebSocketProtocol(WebSocketsProtocol):
         entry = self._clients.get(self.__app_id, None)
 
         if entry:
-            del self._clients[old_id]
+            del self._clients[self.__app_id]
             self._clients[what] = entry
 
         self.__app_id = what
 
-    def _connectionMade(self):
+    def connectionMade(self):
         WebSocketsProtocol.connectionMade(self)
 
-        self._clients[self.app_id] = self
+        # get told when the transport's write buffer fills up.
+        try:
+            self.transport.registerProducer(self, True)
+        except RuntimeError:
+            logger.debug("%r already has a producer, flow control for "
+                         "broadcasts is disabled.", self.transport)
+
+        if self.bookkeep:
+            self._clients[self.app_id] = self
+
+    def connectionLost(self, reason):
+        if self.bookkeep:
+            self._clients.pop(self.app_id, None)
+
+        # subscribe() works without bookkeeping as well.
+        for topic in self.topics:
+            subscribers = self._topics.get(topic, None)
+            if subscribers is not None:
+                subscribers.discard(self)
+                if len(subscribers) == 0:
+                    del self._topics[topic]
+
+        self.topics.clear()
+        self.pending.clear()
+
+    def subscribe(self, topic):
+        """Makes this client receive the objects propagated to the given
+        topic."""
+
+        self._topics.setdefault(topic, set()).add(self)
+        self.topics.add(topic)
+
+    def unsubscribe(self, topic):
+        subscribers = self._topics.get(topic, None)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if len(subscribers) == 0:
+                del self._topics[topic]
+
+        self.topics.discard(topic)
+
+    def sendPreframed(self, frame):
+        """Sends a frame that's already built. While the transport's write
+        buffer is full, frames are queued, up to :attr:`max_pending` of them.
+        """
+
+        if not self.paused:
+            self.transport.write(frame)
+
+        elif len(self.pending) < self.max_pending:
+            self.pending.append(frame)
+
+        elif self.disconnect_slow_consumers:
+            logger.warning("Disconnecting slow consumer %r.", self.app_id)
+            self.pending.clear()
+            self.transport.loseConnection()
+
+        else:
+            self.dropped += 1
+
+    def whenResumed(self):
+        """Returns a ``Deferred`` that fires when the transport's write buffer
+        is no longer full. It fires right away when it's not full to begin
+        with.
+
+        Callbacks of :class:`spyne.model.PushBase` objects can use this via
+        ``push.response.whenResumed()`` to stop producing items while the
+        client is not reading them."""
 
-    def _connectionLost(self, reason):
-        del self._clients[id(self)]
+        if not self.paused:
+            return succeed(None)
 
+        retval = Deferred()
+        self._resume_waiters.append(retval)
+        return retval
+
+    def pauseProducing(self):
+        self.paused = True
+
+    def resumeProducing(self):
+        self.paused = False
+
+        while len(self.pending) > 0 and not self.paused:
+            self.transport.write(self.pending.popleft())
+
+        waiters, self._resume_waiters = self._resume_waiters, []
+        for d in waiters:
+            d.callback(None)
+
+    def stopProducing(self):
+        self.paused = True
+        self.pending.clear()
+
+        waiters, self._resume_waiters = self._resume_waiters, []
+        for d in waiters:
+            d.errback(ConnectionLost())
 
     def frameReceived(self, opcode, data, fin):
+        if self._message_opcode is None:
+            self._message_opcode = opcode
+        self._fragments.append(data)
+
+        if not fin:
+            return
+
+        opcode, self._message_opcode = self._message_opcode, None
+        data, self._fragments = ''.join(self._fragments), []
+
+        self.messageReceived(opcode, data)
+
+    def messageReceived(self, opcode, data):
         tpt = self._spyne_transport
 
         initial_ctx = WebSocketMethodContext(tpt, client_handle=self)
+        if self.multiplex:
+            initial_ctx.transport.request_id, _, data = data.partition('\n')
         initial_ctx.in_string = [data]
 
         contexts = tpt.generate_contexts(initial_ctx)
@@ -166,7 +332,7 @@ class TwistedWebSocketProtocol(WebSocketsProtocol):
                 p_ctx.out_object = retval
 
             tpt.get_out_string(p_ctx)
-            self.sendFrame(opcode, ''.join(p_ctx.out_string), fin)
+            self.sendResponse(opcode, p_ctx)
             p_ctx.close()
             process_contexts(tpt, others, p_ctx)
 
@@ -176,7 +342,7 @@ class TwistedWebSocketProtocol(WebSocketsProtocol):
                 retval.printTraceback()
 
             tpt.get_out_string(p_ctx)
-            self.sendFrame(opcode, ''.join(p_ctx.out_string), fin)
+            self.sendResponse(opcode, p_ctx)
             p_ctx.close()
 
         ret = p_ctx.out_object
@@ -188,24 +354,82 @@ class TwistedWebSocketProtocol(WebSocketsProtocol):
             ret.addErrback(_eb_deferred)
 
         elif isinstance(ret, PushBase):
-            raise NotImplementedError()
+            prefix = ''
+            if p_ctx.transport.request_id is not None:
+                prefix = p_ctx.transport.request_id + '\n'
+
+            @coroutine
+            def _gen_push():
+                try:
+                    while True:
+                        item = (yield)
+
+                        p_ctx.out_object = [[item]]
+                        p_ctx.out_document = None
+                        p_ctx.out_string = None
+                        tpt.get_out_string(p_ctx)
+
+                        self.sendFrame(opcode,
+                                        prefix + ''.join(p_ctx.out_string), True)
+
+                except Break:
+                    pass
+
+            def _cb_push():
+                # an empty message marks the end of the stream.
+                self.sendFrame(opcode, prefix, True)
+                p_ctx.close()
+                process_contexts(tpt, others, p_ctx)
+
+            ret.init(p_ctx, self, _gen_push(), _cb_push, None)
 
         else:
             _cb_deferred(p_ctx.out_object, cb=False)
 
+    def sendResponse(self, opcode, p_ctx):
+        """Sends ``p_ctx.out_string`` as a WebSocket message, one frame per
+        chunk."""
+
+        # the last chunk is only known once the iterator is exhausted, so
+        # frames are sent one chunk behind.
+        pending = ''
+        if p_ctx.transport.request_id is not None:
+            pending = p_ctx.transport.request_id + '\n'
+
+        started = False
+        for chunk in p_ctx.out_string:
+            if not chunk:
+                continue
+
+            if started:
+                self.sendFrame(opcode, pending, False)
+                opcode = CONTROLS.CONTINUE
+                pending = chunk
+
+            else:
+                pending += chunk
+                started = True
+
+        self.sendFrame(opcode, pending, True)
+
 
 class TwistedWebSocketFactory(Factory):
-    def __init__(self, app, bookkeep=False, _clients=None):
+    def __init__(self, app, bookkeep=False, _clients=None, multiplex=False,
+                                                                 _topics=None):
         self.app = app
-        self.transport = ServerBase(app)
+        self.transport = TwistedWebSocketTransport(app)
         self.bookkeep = bookkeep
+        self.multiplex = multiplex
         self._clients = _clients
         if _clients is None:
             self._clients = {}
+        self._topics = _topics
+        if _topics is None:
+            self._topics = {}
 
     def buildProtocol(self, addr):
         return TwistedWebSocketProtocol(self.transport, self.bookkeep,
-                                                                self._clients)
+                                 self._clients, self.multiplex, self._topics)
 
 class _Fake(object):
     pass
@@ -231,17 +455,38 @@ class InvalidRequestError(Exception):
 
 
 class TwistedWebSocketResource(WebSocketsResource):
-    def __init__(self, app, bookkeep=False, clients=None):
+    """The WebSocket resource.
+
+    :param app: The application instance.
+    :param bookkeep: Keep track of the connected clients, which is needed for
+        :func:`propagate` to work.
+    :param clients: The dict that maps client ids to connected clients.
+    :param multiplex: See :class:`TwistedWebSocketProtocol`.
+    :param batch_size: Number of clients :func:`propagate` sends a frame to
+        before it checks whether it should let the reactor run.
+    """
+
+    def __init__(self, app, bookkeep=False, clients=None, multiplex=False,
+                                                               batch_size=100):
         self.app = app
         self.clients = clients
         if clients is None:
             self.clients = {}
 
+        self.topics = {}
+        """Maps topics to the sets of clients subscribed to them."""
+
+        self.batch_size = batch_size
+
+        self.cooperate = cooperate
+        """The function that runs the broadcast iterators. Defaults to
+        :func:`twisted.internet.task.cooperate`."""
+
         if bookkeep:
             self.propagate = self.do_propagate
 
         WebSocketsResource.__init__(self, TwistedWebSocketFactory(app,
-                                                       bookkeep, self.clients))
+                            bookkeep, self.clients, multiplex, self.topics))
 
     def propagate(self):
         raise InvalidRequestError("You must enable bookkeeping to have "
@@ -258,9 +503,27 @@ class TwistedWebSocketResource(WebSocketsResource):
 
         return ''.join(ctx.out_string)
 
-    def do_propagate(self, obj, cls=None):
-        doc = self.get_doc(obj, cls)
+    def do_propagate(self, obj, cls=None, topic=None):
+        """Sends the given object to all clients, or only to the ones
+        subscribed to the given topic.
+
+        The object is serialized and framed once. The clients are served in
+        batches of :attr:`batch_size` cooperatively, so that a big broadcast
+        does not block the reactor. Returns a ``Deferred`` that fires when the
+        frame was handed to all clients."""
+
+        frame = _makeFrame(self.get_doc(obj, cls), CONTROLS.TEXT, True)
+
+        if topic is None:
+            clients = list(self.clients.values())
+        else:
+            clients = list(self.topics.get(topic, ()))
+
+        def _send():
+            for i, c in enumerate(clients):
+                c.sendPreframed(frame)
+
+                if (i + 1) % self.batch_size == 0:
+                    yield None
 
-        for c in self.clients.itervalues():
-            print('sending to', c)
-            c.sendFrame(CONTROLS.TEXT, doc, True)
+        return self.cooperate(_send()).whenDone()
@@ -26,7 +26,6 @@ logic.
 import logging
 logger = logging.getLogger(__name__)
 
-import cgi
 import threading
 import itertools
 
@@ -51,12 +50,18 @@ from spyne.protocol.http import HttpPattern
 from spyne.server.http import HttpBase
 from spyne.server.http import HttpMethodContext
 from spyne.server.http import HttpTransportContext
+from spyne.server.http import _gen_etag
+from spyne.server.http import _etag_matches
 from spyne.util import reconstruct_url
+from spyne.util import _bytes_chunks
+from spyne.util.cache import LruCache
+from spyne.util.http import parse_header
 from spyne.util.odict import odict
 
 from spyne.const.ansi_color import LIGHT_GREEN
 from spyne.const.ansi_color import END_COLOR
 from spyne.const.http import HTTP_200
+from spyne.const.http import HTTP_304
 from spyne.const.http import HTTP_404
 from spyne.const.http import HTTP_500
 
@@ -67,6 +72,18 @@ except ImportError as e:
     def apply_mtom(*args, **kwargs):
         raise e
 
+MAP_ADAPTER_CACHE_SIZE = 64
+"""Maximum number of werkzeug map adapters, one per (host, script name) pair,
+that a :class:`WsgiApplication` keeps around. The least recently used one is
+dropped when there are more."""
+
+WSDL_CACHE_SIZE = 16
+"""Maximum number of wsdl documents, one per base url, that a
+:class:`WsgiApplication` keeps around. The least recently used one is dropped
+when there are more, so that requests with made-up ``Host`` headers can't
+evict the ones that are actually in use."""
+
+
 def _parse_qs(qs):
     pairs = (s2 for s1 in qs.split('&') for s2 in s1.split(';'))
     retval = odict()
@@ -129,6 +146,12 @@ class WsgiTransportContext(HttpTransportContext):
         self.req_method = req_env.get('REQUEST_METHOD', None)
         """HTTP Request verb, as a convenience to users."""
 
+    def get_request_method(self):
+        return self.req_method
+
+    def get_request_header(self, name):
+        return self.req_env.get('HTTP_' + name.upper().replace('-', '_'))
+
 
 class WsgiMethodContext(HttpMethodContext):
     """The WSGI-Specific method context. WSGI-Specific information is stored in
@@ -147,13 +170,16 @@ def _is_wsdl_request(req_env):
     # /stuff/stuff/stuff/serviceName.wsdl or
     # /stuff/stuff/stuff/serviceName/?wsdl
 
-    return (
-        req_env['REQUEST_METHOD'].upper() == 'GET'
-        and (
-               req_env['QUERY_STRING'].lower() == 'wsdl'
-            or req_env['PATH_INFO'].endswith('.wsdl')
-        )
-    )
+    # rpc requests are mostly POSTs, so bail out as early as possible.
+    method = req_env['REQUEST_METHOD']
+    if method != 'GET' and method.upper() != 'GET':
+        return False
+
+    qs = req_env.get('QUERY_STRING', '')
+    if len(qs) == 4 and qs.lower() == 'wsdl':
+        return True
+
+    return req_env.get('PATH_INFO', '').endswith('.wsdl')
 
 
 class WsgiApplication(HttpBase):
@@ -167,8 +193,10 @@ class WsgiApplication(HttpBase):
         wsgi_app.doc.wsdl11.build_interface_document("http://example.com")
 
     This is not strictly necessary -- if you don't do this, Spyne will get the
-    URL from the first request, build the wsdl on-the-fly and cache it as a
-    string in memory for later requests. However, if you want to make sure
+    URL from the request, build the wsdl on-the-fly and cache it as a string in
+    memory for later requests to the same base url. The wsdl is served with an
+    ``ETag`` header, so clients that send it back in ``If-None-Match`` get
+    a ``304 Not Modified`` response. However, if you want to make sure
     you only have this url on the WSDL, this is how to do it. Note that if
     your client takes the information in the Wsdl document seriously (not all
     do), all requests will go to the designated url above even when you get the
@@ -202,19 +230,31 @@ class WsgiApplication(HttpBase):
 
     def __init__(self, app, chunked=True,
                 max_content_length=2 * 1024 * 1024,
-                block_length=8 * 1024):
-        super(WsgiApplication, self).__init__(app, chunked, max_content_length, block_length)
+                block_length=8 * 1024,
+                compression=False, compression_level=6,
+                compression_min_length=1024):
+        super(WsgiApplication, self).__init__(app, chunked, max_content_length,
+                            block_length, compression, compression_level,
+                            compression_min_length)
 
         self._mtx_build_interface_document = threading.Lock()
 
+        self._wsdl = None
+        self._wsdl_etag = None
         if self.doc.wsdl11 is not None:
             self._wsdl = self.doc.wsdl11.get_interface_document()
+            if self._wsdl is not None:
+                self._wsdl_etag = _gen_etag(self._wsdl)
+
+        self._wsdl_cache = LruCache(WSDL_CACHE_SIZE)
+        self._wsdl_built = False
 
         # Initialize HTTP Patterns
         self._http_patterns = None
-        self._map_adapter = None
-        self._mtx_build_map_adapter = threading.Lock()
+        self._map_adapters = LruCache(MAP_ADAPTER_CACHE_SIZE)
+        self._exact_patterns = {}
 
+        has_host_patterns = False
         for k,v in self.app.interface.service_method_map.items():
             # p_ stands for primary
             p_method_descriptor = v[0]
@@ -230,6 +270,22 @@ class WsgiApplication(HttpBase):
 
                     self._http_patterns.add(r)
 
+                    if patt.host is not None:
+                        has_host_patterns = True
+
+                    elif not '<' in patt.address:
+                        self._exact_patterns.setdefault(patt.address, []) \
+                                                    .append((r.methods, r.endpoint))
+
+        if self._http_patterns is not None:
+            # sort the rules now instead of on the first request.
+            self._http_patterns.update()
+
+        # Werkzeug ranks rules with a fixed host before the ones that match any
+        # host, so the exact-match shortcut can't be trusted if there are any.
+        if has_host_patterns:
+            self._exact_patterns = {}
+
     @property
     def has_patterns(self):
         return self._http_patterns is not None
@@ -241,16 +297,53 @@ class WsgiApplication(HttpBase):
         method on the object returned by the get_handler() method.
         '''
 
-        url = wsgi_url
-        if url is None:
-            url = reconstruct_url(req_env).split('.wsdl')[0]
-
         if _is_wsdl_request(req_env):
-            return self.__handle_wsdl_request(req_env, start_response, url)
+            return self.__handle_wsdl_request(req_env, start_response,
+                                                                      wsgi_url)
 
         else:
             return self.handle_rpc(req_env, start_response)
 
+    def __get_wsdl(self, req_env, url):
+        """Returns the wsdl document for the given request along with its
+        entity tag. Builds it if needed."""
+
+        if self._wsdl is not None:
+            return self._wsdl, self._wsdl_etag
+
+        # the url is only needed here, so it's not reconstructed for every rpc
+        # request.
+        if url is None:
+            url = reconstruct_url(req_env, query_string=False) \
+                                                            .split('.wsdl')[0]
+
+        retval = self._wsdl_cache.get(url, None)
+        if retval is not None:
+            return retval
+
+        with self._mtx_build_interface_document:
+            # the user may have built the wsdl with a hard-coded url after this
+            # instance was created.
+            if self._wsdl is None and not self._wsdl_built:
+                wsdl = self.doc.wsdl11.get_interface_document()
+                if wsdl is not None:
+                    self._wsdl, self._wsdl_etag = wsdl, _gen_etag(wsdl)
+
+            if self._wsdl is not None:
+                return self._wsdl, self._wsdl_etag
+
+            retval = self._wsdl_cache.get(url, None)
+            if retval is None:
+                self._wsdl_built = True
+                self.doc.wsdl11.build_interface_document(url)
+
+                wsdl = self.doc.wsdl11.get_interface_document()
+                retval = wsdl, _gen_etag(wsdl)
+
+                self._wsdl_cache.put(url, retval)
+
+        return retval
+
     def __handle_wsdl_request(self, req_env, start_response, url):
         ctx = WsgiMethodContext(self, req_env, 'text/xml; charset=utf-8')
 
@@ -259,37 +352,36 @@ class WsgiApplication(HttpBase):
                                   _gen_http_headers(ctx.transport.resp_headers))
             return [HTTP_404]
 
-        if self._wsdl is None:
-            self._wsdl = self.doc.wsdl11.get_interface_document()
+        try:
+            wsdl, etag = self.__get_wsdl(req_env, url)
 
-        ctx.transport.wsdl = self._wsdl
+        except Exception as e:
+            logger.exception(e)
+            ctx.transport.wsdl_error = e
 
-        if ctx.transport.wsdl is None:
-            try:
-                self._mtx_build_interface_document.acquire()
+            self.event_manager.fire_event('wsdl_exception', ctx)
 
-                ctx.transport.wsdl = self._wsdl
+            start_response(HTTP_500,
+                                  _gen_http_headers(ctx.transport.resp_headers))
 
-                if ctx.transport.wsdl is None:
-                    self.doc.wsdl11.build_interface_document(url)
-                    ctx.transport.wsdl = self._wsdl = \
-                                        self.doc.wsdl11.get_interface_document()
+            return [HTTP_500]
 
-            except Exception as e:
-                logger.exception(e)
-                ctx.transport.wsdl_error = e
+        ctx.transport.wsdl = wsdl
+        self.event_manager.fire_event('wsdl', ctx)
 
-                self.event_manager.fire_event('wsdl_exception', ctx)
+        # event handlers are free to alter the document.
+        if not (ctx.transport.wsdl is wsdl):
+            etag = _gen_etag(ctx.transport.wsdl)
+        ctx.transport.resp_headers['ETag'] = etag
 
-                start_response(HTTP_500,
+        if _etag_matches(req_env.get('HTTP_IF_NONE_MATCH'), etag):
+            ctx.transport.resp_headers.pop('Content-Type', None)
+            start_response(HTTP_304,
                                   _gen_http_headers(ctx.transport.resp_headers))
 
-                return [HTTP_500]
-
-            finally:
-                self._mtx_build_interface_document.release()
+            ctx.close()
 
-        self.event_manager.fire_event('wsdl', ctx)
+            return []
 
         ctx.transport.resp_headers['Content-Length'] = \
                                                     str(len(ctx.transport.wsdl))
@@ -313,10 +405,10 @@ class WsgiApplication(HttpBase):
                 p_ctx.out_protocol.fault_to_http_response_code(error)
 
         self.get_out_string(p_ctx)
-        p_ctx.out_string = [''.join(p_ctx.out_string)]
+        self.compress_out_string(p_ctx,
+                            p_ctx.transport.req_env.get('HTTP_ACCEPT_ENCODING'))
+        self.__set_content_length(p_ctx)
 
-        p_ctx.transport.resp_headers['Content-Length'] = \
-                                                   str(len(p_ctx.out_string[0]))
         self.event_manager.fire_event('wsgi_exception', p_ctx)
 
         start_response(p_ctx.transport.resp_code,
@@ -356,6 +448,18 @@ class WsgiApplication(HttpBase):
             return self.handle_error(p_ctx, others, p_ctx.out_error,
                                                                  start_response)
 
+        return self.handle_rpc_return(p_ctx, others, start_response)
+
+    def handle_rpc_return(self, p_ctx, others, start_response):
+        """Serializes ``p_ctx.out_object`` and returns the response body as an
+        iterable of strings. This is the second half of :func:`handle_rpc`, run
+        once the return value of the user function is available.
+
+        :param p_ctx: Primary (non-aux) context.
+        :param others: List if auxiliary contexts (can be empty).
+        :param start_response: See the WSGI spec for more info.
+        """
+
         if p_ctx.transport.resp_code is None:
             p_ctx.transport.resp_code = HTTP_200
 
@@ -368,6 +472,8 @@ class WsgiApplication(HttpBase):
             return self.handle_error(p_ctx, others, p_ctx.out_error,
                                                                  start_response)
 
+        self.set_cached_response(p_ctx)
+
 
         if isinstance(p_ctx.out_protocol, HttpRpc) and \
                                                p_ctx.out_header_doc is not None:
@@ -388,33 +494,35 @@ class WsgiApplication(HttpBase):
                     p_ctx.descriptor.out_message._type_info.values(),
                     p_ctx.out_object,
                 )
+            p_ctx.out_string_length = None
 
+        out_string = p_ctx.out_string
         self.event_manager.fire_event('wsgi_return', p_ctx)
+        if p_ctx.out_string is not out_string:
+            p_ctx.out_string_length = None
+
+        self.compress_out_string(p_ctx,
+                            p_ctx.transport.req_env.get('HTTP_ACCEPT_ENCODING'))
 
         if self.chunked:
             # the user has not set a content-length, so we delete it as the
             # input is just an iterable.
             if 'Content-Length' in p_ctx.transport.resp_headers:
                 del p_ctx.transport.resp_headers['Content-Length']
-        else:
-            p_ctx.out_string = [''.join(p_ctx.out_string)]
 
-        # if the out_string is a generator function, this hack makes the user
-        # code run until first yield, which lets it set response headers and
-        # whatnot before calling start_response. Is there a better way?
-        try:
-            len(p_ctx.out_string) # generator?
-
-            # nope
-            p_ctx.transport.resp_headers['Content-Length'] = \
-                                    str(sum([len(a) for a in p_ctx.out_string]))
+        if not self.chunked or isinstance(p_ctx.out_string, (list, tuple)):
+            self.__set_content_length(p_ctx)
 
             start_response(p_ctx.transport.resp_code,
                                 _gen_http_headers(p_ctx.transport.resp_headers))
 
             retval = itertools.chain(p_ctx.out_string, self.__finalize(p_ctx))
 
-        except TypeError:
+        else:
+            # if the out_string is a generator function, this hack makes the
+            # user code run until first yield, which lets it set response
+            # headers and whatnot before calling start_response. Is there a
+            # better way?
             retval_iter = iter(p_ctx.out_string)
             try:
                 first_chunk = next(retval_iter)
@@ -435,6 +543,33 @@ class WsgiApplication(HttpBase):
 
         return retval
 
+    def __set_content_length(self, p_ctx):
+        """Makes ``p_ctx.out_string`` a sequence of byte strings and sets the
+        Content-Length response header. Lists of chunks are passed through
+        without being copied or joined, generators are consumed into a list.
+        The length reported by the protocol is used when it's known."""
+
+        out_string = p_ctx.out_string
+        length = p_ctx.out_string_length
+
+        # a 304 response doesn't have a body to measure.
+        if p_ctx.transport.resp_code == HTTP_304:
+            return
+
+        if not isinstance(out_string, (list, tuple)):
+            out_string = list(out_string)
+
+        out_string = _bytes_chunks(out_string)
+        if out_string is not p_ctx.out_string:
+            p_ctx.out_string = out_string
+            length = None
+
+        if length is None:
+            length = sum([len(a) for a in out_string])
+            p_ctx.out_string_length = length
+
+        p_ctx.transport.resp_headers['Content-Length'] = str(length)
+
     def __finalize(self, p_ctx):
         p_ctx.close()
         self.event_manager.fire_event('wsgi_close', p_ctx)
@@ -448,12 +583,13 @@ class WsgiApplication(HttpBase):
         charset = None
         if content_type is not None:
             # fyi, here's what the parse_header function returns:
-            # >>> import cgi; cgi.parse_header("text/xml; charset=utf-8")
+            # >>> parse_header("text/xml; charset=utf-8")
             # ('text/xml', {'charset': 'utf-8'})
-            content_type = cgi.parse_header(content_type)
+            content_type = parse_header(content_type)
             charset = content_type[1].get('charset', None)
 
-        return self.__wsgi_input_to_iterable(http_env), charset
+        return self.decode_in_string(self.__wsgi_input_to_iterable(http_env),
+                                http_env.get('HTTP_CONTENT_ENCODING')), charset
 
     def __wsgi_input_to_iterable(self, http_env):
         istream = http_env.get('wsgi.input')
@@ -483,20 +619,42 @@ class WsgiApplication(HttpBase):
             yield data
 
     def generate_map_adapter(self, ctx):
-        """This function runs on first request because it needs the
-        `'SERVER_NAME'` from the wsgi request environment.
+        """Returns the url map adapter for the host and the script name of the
+        incoming request. The most recently used
+        :const:`MAP_ADAPTER_CACHE_SIZE` adapters are cached.
         """
 
-        try:
-            self._mtx_build_map_adapter.acquire()
-            if self._map_adapter is None:
-                # If url map is not bound before, bind url_map
-                req_env = ctx.transport.req_env
-                self._map_adapter = self._http_patterns.bind(
-                                                    req_env['SERVER_NAME'], "/")
+        req_env = ctx.transport.req_env
+
+        host = req_env.get('HTTP_HOST')
+        if host is None:
+            host = req_env['SERVER_NAME']
+        else:
+            host = host.split(':', 1)[0]
+        host = host.lower()
+
+        script_name = req_env.get('SCRIPT_NAME') or '/'
 
-        finally:
-            self._mtx_build_map_adapter.release()
+        key = (host, script_name)
+        retval = self._map_adapters.get(key, None)
+        if retval is None:
+            retval = self._http_patterns.bind(host, script_name)
+            self._map_adapters.put(key, retval)
+
+        return retval
+
+    def match_exact_pattern(self, path_info, verb):
+        """Looks the request up in the dispatch table for patterns that don't
+        have any arguments. Returns the endpoint or ``None``.
+        """
+
+        candidates = self._exact_patterns.get(path_info, None)
+        if candidates is None:
+            return None
+
+        for methods, endpoint in candidates:
+            if methods is None or verb in methods:
+                return endpoint
 
     def decompose_incoming_envelope(self, prot, ctx, message):
         """This function is only called by the HttpRpc protocol to have the wsgi
@@ -506,19 +664,24 @@ class WsgiApplication(HttpBase):
         params = {}
 
         if self.has_patterns:
-            from werkzeug.exceptions import NotFound
-            if self._map_adapter is None:
-                self.generate_map_adapter(ctx)
+            path_info = ctx.in_document["PATH_INFO"]
+            verb = ctx.in_document["REQUEST_METHOD"].upper()
 
-            try:
-                #If PATH_INFO matches a url, Set method_request_string to mrs
-                mrs, params = self._map_adapter.match(
-                                            ctx.in_document["PATH_INFO"],
-                                            ctx.in_document["REQUEST_METHOD"])
+            mrs = self.match_exact_pattern(path_info, verb)
+            if mrs is not None:
                 ctx.method_request_string = mrs
 
-            except NotFound:
-                pass
+            else:
+                from werkzeug.exceptions import NotFound
+                map_adapter = self.generate_map_adapter(ctx)
+
+                try:
+                    #If PATH_INFO matches a url, Set method_request_string to mrs
+                    mrs, params = map_adapter.match(path_info, verb)
+                    ctx.method_request_string = mrs
+
+                except NotFound:
+                    pass
 
         if ctx.method_request_string is None:
             ctx.method_request_string = '{%s}%s' % (
@@ -553,15 +716,27 @@ class WsgiApplication(HttpBase):
                 mime_type = v.headers.get('Content-Type',
                                                      'application/octet-stream')
 
+                size = getattr(v.stream, 'size', None)
                 path = getattr(v.stream, 'name', None)
                 if path is None:
+                    data = v.stream.getvalue()
+                    if size is None:
+                        size = len(data)
+
                     val.append(File.Value(name=v.filename, type=mime_type,
-                                                    data=[v.stream.getvalue()]))
+                                                                  data=[data]))
                 else:
+                    if size is None:
+                        v.stream.seek(0, 2)
+                        size = v.stream.tell()
+                    ctx.transport.upload_bytes_spooled += size
+
                     v.stream.seek(0)
                     val.append(File.Value(name=v.filename, type=mime_type,
                                                     path=path, handle=v.stream))
 
+                ctx.transport.upload_bytes += size
+
                 ctx.in_body_doc[k] = val
 
             for k, v in ctx.in_body_doc.items():
@@ -17,10 +17,17 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
-"""The ``spyne.server.zeromq`` module contains a server implementation that
-uses ZeroMQ (zmq.REP) as transport.
+"""The ``spyne.server.zeromq`` module contains server implementations that
+use ZeroMQ as transport.
+
+:class:`ZeroMQServer` answers requests one at a time from a single ``zmq.REP``
+socket. :class:`ZeroMQThreadPoolServer` accepts requests from a ``zmq.ROUTER``
+socket and hands them to a pool of :class:`ZeroMQServer` workers through a
+``zmq.DEALER`` socket, so that a slow call does not stall the other clients.
 """
 
+import threading
+
 import zmq
 
 from spyne.auxproc import process_contexts
@@ -28,60 +35,178 @@ from spyne._base import MethodContext
 from spyne.server import ServerBase
 
 context = zmq.Context()
-"""The ZeroMQ context."""
+"""The default ZeroMQ context."""
+
 
 class ZmqMethodContext(MethodContext):
     def __init__(self, app):
         super(ZmqMethodContext, self).__init__(app)
         self.transport.type = 'zmq'
 
+
 class ZeroMQServer(ServerBase):
-    """The ZeroMQ server transport."""
+    """The ZeroMQ server transport.
+
+    :param app: The application instance.
+    :param app_url: The ZeroMQ endpoint to listen on.
+    :param wsdl_url: Unused.
+    :param connect: When ``True``, the socket connects to ``app_url`` instead
+        of binding it. This is how workers join a
+        :class:`ZeroMQThreadPoolServer`.
+    :param zmq_context: The ZeroMQ context. Defaults to the module-level one.
+    """
+
     transport = 'http://rfc.zeromq.org/'
 
-    def __init__(self, app, app_url, wsdl_url=None):
+    def __init__(self, app, app_url, wsdl_url=None, connect=False,
+                                                             zmq_context=None):
         super(ZeroMQServer, self).__init__(app)
 
         self.app_url = app_url
         self.wsdl_url = wsdl_url
 
-        self.zmq_socket = context.socket(zmq.REP)
-        self.zmq_socket.bind(app_url)
+        if zmq_context is None:
+            zmq_context = context
+
+        self.zmq_socket = zmq_context.socket(zmq.REP)
+        if connect:
+            self.zmq_socket.connect(app_url)
+        else:
+            self.zmq_socket.bind(app_url)
 
     def __handle_wsdl_request(self):
         return self.app.get_interface_document(self.url)
 
-    def serve_forever(self):
-        """Runs the ZeroMQ server."""
+    def handle_message(self, in_string):
+        """Processes a single request message and returns the response
+        message."""
+
+        error = None
 
-        while True:
-            error = None
+        initial_ctx = ZmqMethodContext(self)
+        initial_ctx.in_string = [in_string]
 
-            initial_ctx = ZmqMethodContext(self)
-            initial_ctx.in_string = [self.zmq_socket.recv()]
+        contexts = self.generate_contexts(initial_ctx)
+        p_ctx, others = contexts[0], contexts[1:]
+        if p_ctx.in_error:
+            p_ctx.out_object = p_ctx.in_error
+            error = p_ctx.in_error
+
+        else:
+            self.get_in_object(p_ctx)
 
-            contexts = self.generate_contexts(initial_ctx)
-            p_ctx, others = contexts[0], contexts[1:]
             if p_ctx.in_error:
                 p_ctx.out_object = p_ctx.in_error
                 error = p_ctx.in_error
-
             else:
-                self.get_in_object(p_ctx)
+                self.get_out_object(p_ctx)
+                if p_ctx.out_error:
+                    p_ctx.out_object = p_ctx.out_error
+                    error = p_ctx.out_error
+
+        self.get_out_string(p_ctx)
+
+        process_contexts(self, others, p_ctx, error=error)
 
-                if p_ctx.in_error:
-                    p_ctx.out_object = p_ctx.in_error
-                    error = p_ctx.in_error
-                else:
-                    self.get_out_object(p_ctx)
-                    if p_ctx.out_error:
-                        p_ctx.out_object = p_ctx.out_error
-                        error = p_ctx.out_error
+        retval = ''.join(p_ctx.out_string)
+
+        p_ctx.close()
+
+        return retval
+
+    def serve_forever(self):
+        """Runs the ZeroMQ server. Returns when the ZeroMQ context of the
+        socket is terminated."""
 
-            self.get_out_string(p_ctx)
+        try:
+            while True:
+                self.zmq_socket.send(self.handle_message(
+                                                      self.zmq_socket.recv()))
 
-            process_contexts(self, others, error)
+        except zmq.ZMQError as e:
+            if e.errno != zmq.ETERM:
+                raise
 
-            self.zmq_socket.send(''.join(p_ctx.out_string))
+        finally:
+            self.zmq_socket.close()
 
-            p_ctx.close()
+
+class ZeroMQThreadPoolServer(object):
+    """The ZeroMQ server transport with a pool of worker threads behind a
+    ``ROUTER``/``DEALER`` queue. Clients use it exactly like a
+    :class:`ZeroMQServer`.
+
+    Worker threads share the GIL, so they help with methods that block. To use
+    more than one core, bind the backend to an ``ipc://`` or ``tcp://``
+    endpoint with ``backend_url`` and run more workers in other processes: ::
+
+        ZeroMQServer(app, backend_url, connect=True).serve_forever()
+
+    :param app: The application instance.
+    :param app_url: The ZeroMQ endpoint the clients connect to.
+    :param pool_size: Number of worker threads.
+    :param wsdl_url: Unused.
+    :param backend_url: The endpoint the workers connect to. Defaults to a
+        private ``inproc://`` endpoint.
+    """
+
+    def __init__(self, app, app_url, pool_size=4, wsdl_url=None,
+                                                             backend_url=None):
+        self.app = app
+        self.app_url = app_url
+        self.wsdl_url = wsdl_url
+
+        if backend_url is None:
+            backend_url = 'inproc://spyne-backend-%x' % id(self)
+        self.backend_url = backend_url
+
+        self.zmq_context = zmq.Context()
+
+        self.frontend = self.zmq_context.socket(zmq.ROUTER)
+        self.frontend.bind(app_url)
+
+        self.backend = self.zmq_context.socket(zmq.DEALER)
+        self.backend.bind(backend_url)
+
+        self.control_url = 'inproc://spyne-control-%x' % id(self)
+        self.control = self.zmq_context.socket(zmq.PAIR)
+        self.control.bind(self.control_url)
+
+        self.workers = []
+        self.threads = []
+        for i in range(pool_size):
+            worker = ZeroMQServer(app, backend_url, connect=True,
+                                                 zmq_context=self.zmq_context)
+            thread = threading.Thread(target=worker.serve_forever,
+                                               name='spyne-zmq-worker-%d' % i)
+            thread.daemon = True
+
+            self.workers.append(worker)
+            self.threads.append(thread)
+
+    def serve_forever(self):
+        """Starts the workers and forwards messages between the clients and
+        the workers until :func:`stop` is called."""
+
+        for thread in self.threads:
+            thread.start()
+
+        try:
+            zmq.proxy_steerable(self.frontend, self.backend, None,
+                                                                 self.control)
+        finally:
+            self.frontend.close()
+            self.backend.close()
+            self.control.close()
+
+            # this makes the workers return from their serve_forever calls.
+            self.zmq_context.term()
+
+    def stop(self):
+        """Makes :func:`serve_forever` return. Can be called from any
+        thread."""
+
+        control = self.zmq_context.socket(zmq.PAIR)
+        control.connect(self.control_url)
+        control.send(b'TERMINATE')
+        control.close()
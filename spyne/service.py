@@ -150,6 +150,11 @@ class ServiceBase(object):
     defined under this service is set to this value. The _aux flag in the @srpc
     decorator overrides this."""
 
+    __executor__ = None
+    """The worker pool for the methods under this service. When set, the
+    ``executor`` property of every method defined under this service is set to
+    this value. The _executor flag in the @srpc decorator overrides this."""
+
     @classmethod
     def get_service_class_name(cls):
         return cls.__name__
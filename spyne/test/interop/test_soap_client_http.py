@@ -18,8 +18,13 @@
 #
 
 import unittest
+import threading
+
+from werkzeug.serving import make_server
+from werkzeug.serving import WSGIRequestHandler
 
 from spyne.client.http import HttpClient
+from spyne.server.wsgi import WsgiApplication
 from spyne.test.interop._test_soap_client_base import SpyneClientTestBase
 from spyne.test.interop.server.soap_http_basic import soap_application
 from spyne.util.etreeconv import root_dict_to_etree
@@ -32,5 +37,60 @@ class TestSpyneHttpClient(SpyneClientTestBase, unittest.TestCase):
         self.ns = "spyne.test.interop.server"
 
 
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class TestHttpClientKeepAlive(unittest.TestCase):
+    def test_keep_alive(self):
+        server = make_server('127.0.0.1', 0, WsgiApplication(soap_application),
+                                 threaded=True, request_handler=_KeepAliveHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            client = HttpClient('http://127.0.0.1:%d/' % server.port,
+                                                               soap_application)
+            for i in range(5):
+                assert client.service.echo_string('hey %d' % i) == 'hey %d' % i
+
+            assert client.pool.created == 1
+
+            client.close()
+
+        finally:
+            server.shutdown()
+
+    def test_map(self):
+        server = make_server('127.0.0.1', 0, WsgiApplication(soap_application),
+                                 threaded=True, request_handler=_KeepAliveHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            client = HttpClient('http://127.0.0.1:%d/' % server.port,
+                                                               soap_application)
+
+            strings = ['hey %d' % i for i in range(20)]
+            assert client.map('echo_string', strings, concurrency=4) == strings
+            assert client.pool.created <= 4
+
+            ret = client.map('echo_string', [('a',), {'s': 'b'}])
+            assert ret == ['a', 'b']
+
+            ret = client.map('soap_exception', [(), ()])
+            assert [r.faultcode for r in ret] == ['senv:Plausible', 'senv:Plausible']
+
+            client.close()
+
+        finally:
+            server.shutdown()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -17,12 +17,18 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
 #
 
+import os
+import tempfile
 import unittest
+from base64 import b64encode
 from lxml import etree
 
 from spyne.protocol.soap import Soap11
+from spyne.model.binary import File
 from spyne.model.binary import ByteArray
 from spyne.model.binary import _bytes_join
+from spyne.model.binary import BINARY_ENCODING_BASE64
+from spyne.protocol._model import file_to_string
 import spyne.const.xml_ns
 
 ns_xsd = spyne.const.xml_ns.xsd
@@ -42,5 +48,68 @@ class TestBinary(unittest.TestCase):
         a2 = Soap11().from_element(ByteArray, element)
         self.assertEquals(_bytes_join(self.data), _bytes_join(a2))
 
+    def test_chunked_base64(self):
+        # odd-sized chunks must not produce padding in the middle
+        data = [b'a', b'bcde', b'fghijklmnopq', b'r' * 0x10001, b'st']
+        encoded = ByteArray.to_base64(data)
+        self.assertEquals(encoded, b64encode(b''.join(data)))
+
+        # decode in fragments that aren't 4-char-aligned either.
+        fragments = [encoded[i:i + 7] for i in range(0, len(encoded), 7)]
+        decoded = ByteArray.from_base64(fragments)
+        self.assertEquals(b''.join(decoded), b''.join(data))
+
+        decoded = ByteArray.from_base64(encoded.decode('ascii'))
+        self.assertEquals(b''.join(decoded), b''.join(data))
+
+    def test_base64_whitespace(self):
+        encoded = b64encode(_bytes_join(self.data))
+        encoded = '\n'.join(encoded[i:i+76] for i in range(0, len(encoded), 76))
+        self.assertEquals(_bytes_join(ByteArray.from_base64(encoded)),
+                                                        _bytes_join(self.data))
+
+    def test_file_in_memory(self):
+        data = _bytes_join(self.data)
+        val = File.from_base64(b64encode(data))
+        assert val.handle is None
+        self.assertEquals(_bytes_join(val.data), data)
+
+    def test_file_spool(self):
+        data = _bytes_join(self.data) * 16
+        val = File.customize(spool_threshold=1024).from_base64(b64encode(data))
+        assert val.data is None
+        self.assertEquals(val.handle.read(), data)
+
+        self.assertEquals(''.join(File.to_base64(val)), b64encode(data))
+
+    def test_file_path_precedence(self):
+        # the handle is ignored when there's a path.
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b'path data')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        handle = tempfile.TemporaryFile()
+        handle.write(b'handle data')
+        self.addCleanup(handle.close)
+
+        val = File.Value(path=path, handle=handle)
+        cls = File.customize(encoding=BINARY_ENCODING_BASE64)
+        self.assertEquals(file_to_string(cls, val), b64encode(b'path data'))
+
+        val = File.Value(handle=handle)
+        self.assertEquals(file_to_string(cls, val), b64encode(b'handle data'))
+
+    def test_file_xml(self):
+        data = _bytes_join(self.data)
+        element = etree.Element('test')
+        Soap11().to_parent_element(File, File.Value(data=self.data), ns_test,
+                                                                        element)
+        element = element[0]
+        self.assertEquals(element.text, b64encode(data))
+
+        val = Soap11().from_element(File, element)
+        self.assertEquals(_bytes_join(val.data), data)
+
 if __name__ == '__main__':
     unittest.main()
@@ -589,6 +589,50 @@ class TestFlatDict(unittest.TestCase):
 
         assert len(d) == 2
 
+    def test_nested_none(self):
+        class CM(ComplexModel):
+            i = Integer
+            s = String(min_occurs=1)
+
+        class CCM(ComplexModel):
+            c = CM
+            d = CM.customize(min_occurs=1)
+            i = Integer
+
+        d = SimpleDictDocument().object_to_simple_dict(CCM, CCM(i=1))
+        pprint(d)
+
+        assert d == {'i': 1, 'd_s': None}
+
+    def test_self_reference(self):
+        class CM(ComplexModel):
+            i = Integer
+
+        CM._type_info['c'] = CM
+
+        val = CM(i=1, c=CM(i=2, c=CM(i=3)))
+        d = SimpleDictDocument().object_to_simple_dict(CM, val)
+        pprint(d)
+
+        assert d == {'i': 1, 'c_i': 2, 'c_c_i': 3}
+
+    def test_pairs(self):
+        class CM(ComplexModel):
+            i = Integer
+            s = String
+
+        class CCM(ComplexModel):
+            c = Array(CM)
+            i = Integer
+
+        val = CCM(i=5, c=[CM(i=1, s='a'), CM(i=2)])
+
+        pairs = SimpleDictDocument().object_to_simple_pairs(CCM, val)
+        assert not isinstance(pairs, dict)
+
+        assert sorted(pairs) == [('c[0]_i', 1), ('c[0]_s', 'a'),
+                                                      ('c[1]_i', 2), ('i', 5)]
+
 
 class TestSelfRefence(unittest.TestCase):
     def test_canonical_case(self):
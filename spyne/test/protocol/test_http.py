@@ -45,6 +45,7 @@ from spyne.const.http import HTTP_200
 from spyne.decorator import rpc
 from spyne.decorator import srpc
 from spyne.model.binary import ByteArray
+from spyne.model.binary import File
 from spyne.model.primitive import DateTime
 from spyne.model.primitive import Uuid
 from spyne.model.primitive import String
@@ -477,6 +478,54 @@ class Test(unittest.TestCase):
         s = ''.join(list(ctx.out_string))
         assert s == "CCM(i=1, c=[CM(i=1, s='a'), CM(i=2, s='b')], s='s')"
 
+    def test_nested_flatten_array_index_order(self):
+        class CM(ComplexModel):
+            _type_info = [
+                ("i", Integer),
+            ]
+
+        class CCM(ComplexModel):
+            _type_info = [
+                ("c", CM.customize(max_occurs=20)),
+            ]
+
+        class SomeService(ServiceBase):
+            @srpc(CCM, _returns=String)
+            def some_call(ccm):
+                return repr([c.i for c in ccm.c])
+
+        # indexes must be processed in numeric order, not lexicographic.
+        qs = '&'.join(['ccm_c[%d]_i=%d' % (i, i) for i in reversed(range(12))])
+        ctx = _test([SomeService], qs)
+
+        s = ''.join(list(ctx.out_string))
+        assert s == repr(list(range(12)))
+
+    def test_flat_key_index_append_field(self):
+        class CM(ComplexModel):
+            _type_info = [
+                ("i", Integer),
+            ]
+
+        class CCM(ComplexModel):
+            _type_info = [
+                ("c", CM),
+            ]
+
+        class SomeService(ServiceBase):
+            @srpc(CCM, _returns=String)
+            def some_call(ccm):
+                return repr((ccm.c.i, getattr(ccm.c, 's', None)))
+
+        ctx = _test([SomeService], 'ccm_c_i=1&ccm_c_s=a')
+        assert ''.join(list(ctx.out_string)) == repr((1, None))
+
+        # the cached index of the parent must see fields added to children.
+        CM.append_field('s', String)
+
+        ctx = _test([SomeService], 'ccm_c_i=1&ccm_c_s=a')
+        assert ''.join(list(ctx.out_string)) == repr((1, 'a'))
+
     def test_nested_flatten_with_complex_array(self):
         class CM(ComplexModel):
             _type_info = [
@@ -615,8 +664,15 @@ class Test(unittest.TestCase):
             assert len([s for s in string if ('Set-Cookie', s) in headers]) == len(string)
             assert dict(headers)['Expires'] == 'Tue, 01 Jan 2013 00:00:00 GMT'
 
-        ret = ''.join(wsgiref_validator(WsgiApplication(Application([SomeService], 'tns',
-            in_protocol=HttpRpc(), out_protocol=HttpRpc())))({
+        header_docs = []
+        def _wsgi_return(ctx):
+            header_docs.append(ctx.out_header_doc)
+
+        server = WsgiApplication(Application([SomeService], 'tns',
+                                 in_protocol=HttpRpc(), out_protocol=HttpRpc()))
+        server.event_manager.add_listener('wsgi_return', _wsgi_return)
+
+        ret = ''.join(wsgiref_validator(server)({
                 'SCRIPT_NAME': '',
                 'QUERY_STRING': '&s=foo',
                 'PATH_INFO': '/some_call',
@@ -634,6 +690,12 @@ class Test(unittest.TestCase):
 
         assert ret == ''
 
+        header_doc, = header_docs
+        assert sorted(header_doc) == [
+            ('Expires', 'Tue, 01 Jan 2013 00:00:00 GMT'),
+            ('Set-Cookie', string),
+        ]
+
 
 class TestHttpPatterns(unittest.TestCase):
     def test_rules(self):
@@ -677,6 +739,108 @@ class TestHttpPatterns(unittest.TestCase):
         server.get_out_object(ctx)
         assert ctx.out_error is None
 
+    def test_exact_rules(self):
+        class SomeService(ServiceBase):
+            @srpc(_returns=Integer, _patterns=[
+                                      HttpPattern('/some/path', verb='GET')])
+            def some_call():
+                return 42
+
+            @srpc(Integer, _returns=Integer, _patterns=[
+                                      HttpPattern('/some/<some_int>')])
+            def some_other_call(some_int):
+                return some_int
+
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                        out_protocol=HttpRpc())
+        server = WsgiApplication(app)
+
+        assert server.match_exact_pattern('/some/path', 'GET') == 'some_call'
+        assert server.match_exact_pattern('/some/path', 'HEAD') == 'some_call'
+        assert server.match_exact_pattern('/some/path', 'POST') is None
+        assert server.match_exact_pattern('/some/5', 'GET') is None
+
+        def _ctx(path_info, host):
+            return WsgiMethodContext(server, {
+                'QUERY_STRING': '',
+                'PATH_INFO': path_info,
+                'SERVER_NAME': "localhost",
+                'HTTP_HOST': host,
+                'REQUEST_METHOD': 'GET',
+            }, 'some-content-type')
+
+        ctx, = server.generate_contexts(_ctx('/some/path', 'a.example.com'))
+        assert ctx.descriptor.name == 'some_call'
+
+        ctx, = server.generate_contexts(_ctx('/some/5', 'a.example.com:8000'))
+        assert ctx.descriptor.name == 'some_other_call'
+        ctx, = server.generate_contexts(_ctx('/some/6', 'B.example.com'))
+        assert ctx.descriptor.name == 'some_other_call'
+
+        assert len(server._map_adapters) == 2
+        assert server._map_adapters.get(('a.example.com', '/')) is not None
+        assert server._map_adapters.get(('b.example.com', '/')) is not None
+
+
+class TestFileUpload(unittest.TestCase):
+    def _upload(self, data, **kwargs):
+        class SomeService(ServiceBase):
+            @rpc(File, _returns=Integer)
+            def some_call(ctx, f):
+                ctx.udc = f
+                if f.data is None:
+                    return len(f.handle.read())
+                return len(''.join(f.data))
+
+        app = Application([SomeService], 'tns',
+                             in_protocol=HttpRpc(**kwargs), out_protocol=HttpRpc())
+        server = WsgiApplication(app)
+
+        boundary = 'spyneboundary'
+        body = '\r\n'.join([
+            '--' + boundary,
+            'Content-Disposition: form-data; name="f"; filename="f.bin"',
+            'Content-Type: application/octet-stream',
+            '',
+            data,
+            '--' + boundary + '--',
+            '',
+        ])
+
+        initial_ctx = WsgiMethodContext(server, {
+            'QUERY_STRING': '',
+            'PATH_INFO': '/some_call',
+            'REQUEST_METHOD': 'POST',
+            'SERVER_NAME': "localhost",
+            'CONTENT_TYPE': 'multipart/form-data; boundary=%s' % boundary,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': StringIO(body),
+        }, 'some-content-type')
+
+        ctx, = server.generate_contexts(initial_ctx)
+        server.get_in_object(ctx)
+        assert ctx.in_error is None
+        server.get_out_object(ctx)
+        assert ctx.out_error is None
+        assert ctx.out_object == [len(data)]
+
+        return ctx
+
+    def test_small_upload_in_memory(self):
+        ctx = self._upload('x' * 100, tmp_spool_threshold=1024)
+
+        assert ctx.udc.path is None
+        assert ctx.udc.data == ['x' * 100]
+        assert ctx.transport.upload_bytes == 100
+        assert ctx.transport.upload_bytes_spooled == 0
+
+    def test_large_upload_spooled(self):
+        ctx = self._upload('x' * 4096, tmp_spool_threshold=1024)
+
+        assert ctx.udc.path is not None
+        assert ctx.transport.upload_bytes == 4096
+        assert ctx.transport.upload_bytes_spooled == 4096
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -361,6 +361,26 @@ class TestSoap(unittest.TestCase):
         ret = Soap11().from_element(Fault, element[0][0])
         assert ret.faultcode == "soap:Client"
 
+    def test_gen_envelope(self):
+        app = Application([TestService], 'tns', in_protocol=Soap11(),
+                                                          out_protocol=Soap11())
+        soap = app.out_protocol
+
+        e1 = soap.gen_envelope()
+        e1.append(etree.Element('{tns}child'))
+        e2 = soap.gen_envelope()
+
+        # every call returns an independent element
+        assert len(e2) == 0
+        assert e2.nsmap['tns'] == 'tns'
+
+        app.interface.nsmap['new_prefix'] = 'some_new_namespace'
+        assert soap.gen_envelope().nsmap['new_prefix'] == 'some_new_namespace'
+
+        # changing the value of a prefix in place invalidates it as well.
+        app.interface.nsmap['new_prefix'] = 'other_namespace'
+        assert soap.gen_envelope().nsmap['new_prefix'] == 'other_namespace'
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import zlib
+import unittest
+import threading
+
+try:
+    import asyncio
+    from spyne.server.asgi import AsgiApplication
+    from spyne.server.asgi import _scope_to_environ
+except (ImportError, SyntaxError):
+    AsgiApplication = None
+
+from spyne.application import Application
+from spyne.decorator import rpc
+from spyne.service import ServiceBase
+from spyne.model.fault import Fault
+from spyne.model.primitive import Integer
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.json import JsonDocument
+from spyne.server.http import HttpCache
+from spyne.server.wsgi import WsgiApplication
+from spyne.server.wsgi import WsgiMethodContext
+from spyne.util.pool import WorkerPool
+
+
+def _call(app, path, query_string=b'', method='GET', body=(b'',),
+                                                 headers=(), raw_headers=False):
+    """Runs the given ASGI app for one request and returns the response status,
+    headers and the list of body chunks. Headers are returned as a dict unless
+    ``raw_headers`` is true."""
+
+    loop = asyncio.new_event_loop()
+    messages = [{'type': 'http.request', 'body': b, 'more_body': True}
+                                                                  for b in body]
+    messages[-1]['more_body'] = False
+    sent = []
+
+    def _done(value=None):
+        retval = loop.create_future()
+        retval.set_result(value)
+        return retval
+
+    def receive():
+        return _done(messages.pop(0))
+
+    def send(message):
+        sent.append(message)
+        return _done()
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': query_string, 'headers': list(headers),
+        'server': ('localhost', 8000), 'http_version': '1.1',
+    }
+
+    try:
+        loop.run_until_complete(app(scope, receive, send))
+    finally:
+        loop.close()
+
+    assert sent[0]['type'] == 'http.response.start'
+    assert sent[-1]['more_body'] is False
+
+    resp_headers = sent[0]['headers']
+    if not raw_headers:
+        resp_headers = dict(resp_headers)
+
+    return sent[0]['status'], resp_headers, \
+                                    [m['body'] for m in sent[1:] if m['body']]
+
+
+@unittest.skipIf(AsgiApplication is None, "asyncio is not available")
+class TestAsgi(unittest.TestCase):
+    def _get_app(self, **kwargs):
+        class SomeService(ServiceBase):
+            @rpc(Integer, _returns=Integer)
+            def double(ctx, i):
+                return i * 2
+
+            @rpc(Integer, _returns=Integer)
+            def double_later(ctx, i):
+                loop = asyncio.get_event_loop()
+                retval = loop.create_future()
+                loop.call_soon(retval.set_result, i * 2)
+                return retval
+
+            @rpc(_returns=Integer)
+            def fail_later(ctx):
+                loop = asyncio.get_event_loop()
+                retval = loop.create_future()
+                loop.call_soon(retval.set_exception, Fault('Client.Later'))
+                return retval
+
+        return AsgiApplication(Application([SomeService], 'tns',
+                in_protocol=HttpRpc(), out_protocol=JsonDocument()), **kwargs)
+
+    def test_sync(self):
+        status, headers, body = _call(self._get_app(), '/double', b'i=21')
+
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert b''.join(body) == b'42'
+
+    def test_awaitable(self):
+        status, headers, body = _call(self._get_app(), '/double_later', b'i=21')
+
+        assert status == 200
+        assert b''.join(body) == b'42'
+
+    def test_awaitable_fault(self):
+        status, headers, body = _call(self._get_app(), '/fail_later')
+
+        assert status == 400
+        assert b'Client.Later' in b''.join(body)
+
+    def test_awaitable_events(self):
+        app = self._get_app()
+        events = []
+
+        def _on_return(ctx):
+            events.append(('return', ctx.out_object))
+
+        def _on_exception(ctx):
+            events.append(('exception', ctx.out_error.faultcode))
+
+        app.app.event_manager.add_listener('method_return_object', _on_return)
+        app.app.event_manager.add_listener('method_exception_object',
+                                                                  _on_exception)
+
+        _call(app, '/double_later', b'i=21')
+        _call(app, '/fail_later')
+
+        assert events == [('return', [42]), ('exception', 'Client.Later')]
+
+    def test_wsgi_rejects_awaitable(self):
+        app = self._get_app().app
+        server = WsgiApplication(app)
+
+        ctx, = server.generate_contexts(WsgiMethodContext(server, {
+            'QUERY_STRING': 'i=21',
+            'PATH_INFO': '/double_later',
+            'REQUEST_METHOD': 'GET',
+            'SERVER_NAME': 'localhost',
+        }, 'some-content-type'))
+
+        server.get_in_object(ctx)
+        assert server.get_out_object(ctx) is None
+        assert ctx.out_error.faultcode == 'Server'
+
+    def test_executor(self):
+        pool = WorkerPool(size=1, max_queue_size=0)
+        release = threading.Event()
+        threads = []
+
+        class SomeService(ServiceBase):
+            __executor__ = pool
+
+            @rpc(Integer, _returns=Integer)
+            def double(ctx, i):
+                threads.append(threading.current_thread().name)
+                return i * 2
+
+        app = AsgiApplication(Application([SomeService], 'tns',
+                          in_protocol=HttpRpc(), out_protocol=JsonDocument()))
+
+        status, headers, body = _call(app, '/double', b'i=21')
+
+        assert status == 200
+        assert b''.join(body) == b'42'
+        assert threads == ['spyne-worker-0']
+
+        pool.submit(lambda success, result: None, release.wait)
+        try:
+            status, headers, body = _call(app, '/double', b'i=21')
+        finally:
+            release.set()
+            pool.close()
+
+        assert status == 503
+        assert b'ServiceUnavailable' in b''.join(body)
+        assert pool.rejected == 1
+
+    def test_post(self):
+        status, headers, body = _call(self._get_app(), '/double',
+                method='POST', body=[b'i=', b'21'], headers=[
+                    (b'content-type', b'application/x-www-form-urlencoded')])
+
+        assert status == 200
+        assert b''.join(body) == b'42'
+
+    def test_too_long(self):
+        status, headers, body = _call(self._get_app(max_content_length=4),
+                    '/double', method='POST', body=[b'i=', b'21', b'0000'])
+
+        assert status == 413
+        assert b'RequestTooLong' in b''.join(body)
+
+    def test_compression(self):
+        status, headers, body = _call(
+                self._get_app(compression=True, compression_min_length=1),
+                '/double', b'i=21', headers=[(b'accept-encoding', b'gzip')])
+
+        assert status == 200
+        assert headers[b'content-encoding'] == b'gzip'
+        assert zlib.decompress(b''.join(body), 16 + zlib.MAX_WBITS) == b'42'
+
+    def test_http_cache(self):
+        calls = []
+
+        class SomeService(ServiceBase):
+            @rpc(Integer, _returns=Integer, _http_cache=HttpCache(60))
+            def double(ctx, i):
+                calls.append(i)
+                return i * 2
+
+        app = AsgiApplication(Application([SomeService], 'tns',
+                in_protocol=HttpRpc(), out_protocol=JsonDocument()))
+
+        status, headers, body = _call(app, '/double', b'i=21')
+        assert status == 200
+        etag = headers[b'etag']
+
+        status, headers, body = _call(app, '/double', b'i=21',
+                                           headers=[(b'if-none-match', etag)])
+        assert status == 304
+        assert body == []
+        assert calls == [21]
+
+    def test_repeated_headers(self):
+        class SomeService(ServiceBase):
+            @rpc(_returns=Integer)
+            def login(ctx):
+                ctx.transport.resp_headers['Set-Cookie'] = ['a=1', 'b=2']
+                return 0
+
+        app = AsgiApplication(Application([SomeService], 'tns',
+                in_protocol=HttpRpc(), out_protocol=JsonDocument()))
+
+        status, headers, body = _call(app, '/login', raw_headers=True)
+        assert status == 200
+        cookies = [v for k, v in headers if k == b'set-cookie']
+        assert cookies == [b'a=1', b'b=2']
+
+    def test_path_encoding(self):
+        req_env = _scope_to_environ({'type': 'http', 'method': 'GET',
+                        'path': u'/\u00fc', 'root_path': u'/\u00e7'}, [])
+
+        # native strings that hold the utf8 bytes, as PEP 3333 says.
+        assert req_env['PATH_INFO'] == '/\xc3\xbc'
+        assert req_env['SCRIPT_NAME'] == '/\xc3\xa7'
+
+    def test_generator_body(self):
+        app = self._get_app()
+        threads = []
+
+        def _body():
+            threads.append(threading.current_thread())
+            yield b'4'
+            threads.append(threading.current_thread())
+            yield b'2'
+
+        def _stream(ctx):
+            ctx.out_string = _body()
+            ctx.out_string_length = None
+        app.event_manager.add_listener('wsgi_return', _stream)
+
+        status, headers, body = _call(app, '/double', b'i=21')
+        assert status == 200
+        assert body == [b'4', b'2']
+
+        # the wsgi layer pulls the first chunk itself so that the headers can
+        # be set. the rest is consumed outside of the event loop's thread.
+        assert len(threads) == 2
+        assert not (threads[1] is threading.current_thread())
+
+
+if __name__ == '__main__':
+    unittest.main()
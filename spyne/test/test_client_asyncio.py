@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import unittest
+
+from io import BytesIO
+
+try:
+    import asyncio
+    from spyne.client.asyncio import AsyncioHttpClient
+    from spyne.client.asyncio import _read_response
+    from spyne.client.http import HttpError
+except (ImportError, SyntaxError):
+    AsyncioHttpClient = None
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.fault import Fault
+from spyne.model.primitive import Integer
+from spyne.model.primitive import Unicode
+from spyne.protocol.soap import Soap11
+from spyne.server.wsgi import WsgiApplication
+
+
+class SomeService(ServiceBase):
+    @srpc(Unicode, Integer, _returns=Unicode)
+    def repeat(s, i):
+        return s * i
+
+    @srpc()
+    def fail():
+        raise Fault('Client.Failed')
+
+
+app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                  out_protocol=Soap11())
+
+
+class _WsgiProtocol(object):
+    """A minimal HTTP/1.1 server protocol that runs a wsgi app in the event
+    loop. Only handles requests with a Content-Length header."""
+
+    def __init__(self, wsgi_app, connections):
+        self.wsgi_app = wsgi_app
+        self.connections = connections
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connections.append(transport)
+
+    def connection_lost(self, exc):
+        pass
+
+    def eof_received(self):
+        pass
+
+    def data_received(self, data):
+        self.buffer += data
+
+        while b'\r\n\r\n' in self.buffer:
+            head, rest = self.buffer.split(b'\r\n\r\n', 1)
+            lines = head.decode('latin1').split('\r\n')
+            headers = dict([(k.strip().lower(), v.strip()) for k, v in
+                                    [l.split(':', 1) for l in lines[1:]]])
+
+            length = int(headers['content-length'])
+            if len(rest) < length:
+                return
+
+            body, self.buffer = rest[:length], rest[length:]
+            self.respond(lines[0].split(' ')[:2], headers, body)
+
+    def respond(self, request_line, headers, body):
+        method, path = request_line
+        status = []
+
+        def start_response(s, h):
+            status.append(s)
+
+        out = self.wsgi_app({
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+            'CONTENT_TYPE': headers['content-type'],
+            'CONTENT_LENGTH': str(len(body)), 'wsgi.input': BytesIO(body),
+            'wsgi.url_scheme': 'http',
+        }, start_response)
+
+        data = b''.join([(s if isinstance(s, bytes) else s.encode('utf8'))
+                                                                 for s in out])
+        self.transport.write(('HTTP/1.1 %s\r\nContent-Length: %d\r\n\r\n' %
+                    (self.get_status(status[0]), len(data))).encode('latin1')
+                                                                        + data)
+
+    def get_status(self, status):
+        return status
+
+
+class _BadGatewayProtocol(_WsgiProtocol):
+    """Sends the response of the wsgi app with a 502 status code."""
+
+    def get_status(self, status):
+        return '502 Bad Gateway'
+
+
+class _SilentProtocol(_WsgiProtocol):
+    """Accepts connections but never responds."""
+
+    def data_received(self, data):
+        pass
+
+
+class _TruncatingProtocol(_WsgiProtocol):
+    """Responds to the first request only. Every other request gets a
+    truncated response, after which the connection is closed. The request
+    lines are appended to ``requests``."""
+
+    def __init__(self, wsgi_app, connections, requests):
+        super(_TruncatingProtocol, self).__init__(wsgi_app, connections)
+        self.requests = requests
+
+    def respond(self, request_line, headers, body):
+        self.requests.append(request_line)
+        if len(self.requests) == 1:
+            return super(_TruncatingProtocol, self).respond(request_line,
+                                                                 headers, body)
+
+        self.transport.write(b'HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n')
+        self.transport.close()
+
+
+def _start_server(loop, protocol_factory):
+    """Returns the server and the port it listens on."""
+
+    server = loop.run_until_complete(loop.create_server(protocol_factory,
+                                                             '127.0.0.1', 0))
+    return server, server.sockets[0].getsockname()[1]
+
+
+@unittest.skipIf(AsyncioHttpClient is None, "asyncio is not available")
+class TestAsyncioHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.connections = []
+        wsgi_app = WsgiApplication(app)
+        self.server, port = _start_server(self.loop,
+                        lambda: _WsgiProtocol(wsgi_app, self.connections))
+        self.url = 'http://127.0.0.1:%d/' % port
+
+    def tearDown(self):
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_call(self):
+        client = AsyncioHttpClient(self.url, app)
+
+        for i in range(3):
+            assert self._run(client.service.repeat('ab', i)) == 'ab' * i
+
+        assert client.pool.created == 1
+        assert len(self.connections) == 1
+
+        client.close()
+
+    def test_fault(self):
+        client = AsyncioHttpClient(self.url, app)
+
+        try:
+            self._run(client.service.fail())
+        except Fault as e:
+            assert e.faultcode == 'senv:Client.Failed'
+        else:
+            raise Exception("must fail")
+
+        # the connection is reused after a fault as well.
+        assert self._run(client.service.repeat('a', 2)) == 'aa'
+        assert client.pool.created == 1
+
+        client.close()
+
+    def test_closed_idle_connection(self):
+        client = AsyncioHttpClient(self.url, app)
+        assert self._run(client.service.repeat('a', 1)) == 'a'
+
+        # the server closes the pooled connection.
+        self.connections[0].close()
+        self._run(asyncio.sleep(0.01))
+
+        assert self._run(client.service.repeat('a', 2)) == 'aa'
+        assert client.pool.created == 2
+
+        client.close()
+
+    def test_truncated_response(self):
+        requests = []
+        server, port = _start_server(self.loop, lambda: _TruncatingProtocol(
+                                           WsgiApplication(app), [], requests))
+        url = 'http://127.0.0.1:%d/' % port
+        client = AsyncioHttpClient(url, app)
+
+        try:
+            assert self._run(client.service.repeat('a', 1)) == 'a'
+
+            # the server may have processed the request, so it's not retried.
+            self.assertRaises(asyncio.IncompleteReadError, self._run,
+                                                client.service.repeat('a', 2))
+            assert len(requests) == 2
+
+        finally:
+            client.close()
+            server.close()
+            self._run(server.wait_closed())
+
+    def test_error_status(self):
+        server, port = _start_server(self.loop,
+                          lambda: _BadGatewayProtocol(WsgiApplication(app), []))
+        client = AsyncioHttpClient('http://127.0.0.1:%d/' % port, app)
+
+        try:
+            try:
+                self._run(client.service.repeat('a', 1))
+            except HttpError as e:
+                assert e.code == 502
+                assert e.reason == 'Bad Gateway'
+            else:
+                raise Exception("must fail")
+
+        finally:
+            client.close()
+            server.close()
+            self._run(server.wait_closed())
+
+    def _read(self, data, method='POST'):
+        reader = asyncio.StreamReader(loop=self.loop)
+        reader.feed_data(data)
+
+        # the connection stays open, so reading to eof would hang.
+        return self._run(asyncio.wait_for(_read_response(reader, method), 1))
+
+    def test_bodyless_responses(self):
+        for status in (b'204 No Content', b'304 Not Modified'):
+            code, reason, body, will_close = self._read(
+                                        b'HTTP/1.1 ' + status + b'\r\n\r\n')
+            assert body == []
+            assert not will_close
+
+        code, reason, body, will_close = self._read(
+                b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\n', 'HEAD')
+        assert (code, body) == (200, [])
+
+        code, reason, body, will_close = self._read(
+                b'HTTP/1.1 100 Continue\r\n\r\n'
+                b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+        assert (code, reason, body) == (200, 'OK', [b'ok'])
+
+    def test_timeout(self):
+        server, port = _start_server(self.loop,
+                                      lambda: _SilentProtocol(None, []))
+        url = 'http://127.0.0.1:%d/' % port
+        client = AsyncioHttpClient(url, app, timeout=0.1)
+
+        try:
+            self.assertRaises(asyncio.TimeoutError, self._run,
+                                                client.service.repeat('a', 1))
+            assert len(client.pool._idle) == 0
+
+        finally:
+            client.close()
+            server.close()
+            self._run(server.wait_closed())
+
+    def test_map(self):
+        client = AsyncioHttpClient(self.url, app)
+
+        ret = self._run(client.map('repeat', [('a', 1), {'s': 'b', 'i': 2}],
+                                                                concurrency=2))
+        assert ret == ['a', 'bb']
+
+        ret = self._run(client.map('fail', [(), ()]))
+        assert [r.faultcode for r in ret] == ['senv:Client.Failed'] * 2
+
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import socket
+import threading
+import unittest
+
+from io import BytesIO
+
+from spyne.application import Application
+from spyne.client.http import HttpClient
+from spyne.client.http import HttpError
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.primitive import Integer
+from spyne.model.primitive import Unicode
+from spyne.protocol.soap import Soap11
+from spyne.server.wsgi import WsgiApplication
+
+
+class SomeService(ServiceBase):
+    @srpc(Unicode, Integer, _returns=Unicode)
+    def repeat(s, i):
+        return s * i
+
+
+class StreamService(ServiceBase):
+    @srpc(Unicode, _returns=Unicode)
+    def echo(s):
+        return s
+
+
+def _stream(ctx):
+    # makes the request body an iterable of unknown length.
+    ctx.out_string = iter(list(ctx.out_string))
+
+StreamService.event_manager.add_listener('method_return_string', _stream)
+
+
+app = Application([SomeService, StreamService], 'tns', in_protocol=Soap11(),
+                                                  out_protocol=Soap11())
+
+
+class _ScriptedServer(object):
+    """A minimal HTTP/1.1 server that runs a wsgi app. What happens to every
+    request is taken from the ``actions`` list:
+
+        * ``'respond'``: responds and keeps the connection open.
+        * ``'respond_close'``: responds and closes the connection.
+        * ``'drop'``: closes the connection without responding.
+        * ``'hang'``: never responds.
+        * ``'bad_gateway'``: responds with a 502 status code.
+    """
+
+    def __init__(self, wsgi_app, actions):
+        self.wsgi_app = wsgi_app
+        self.actions = list(actions)
+        self.requests = 0
+        self.chunked = []
+        self.closed = threading.Event()
+
+        self.socket = socket.socket()
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.listen(5)
+        self.url = 'http://127.0.0.1:%d/' % self.socket.getsockname()[1]
+
+        self._hung = []
+        self._thread = threading.Thread(target=self._accept)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self.socket.close()
+        for conn in self._hung:
+            conn.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.socket.accept()
+            except socket.error:
+                return
+
+            thread = threading.Thread(target=self._serve, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, conn):
+        rfile = conn.makefile('rb')
+
+        while True:
+            line = rfile.readline()
+            if not line:
+                break
+
+            headers = {}
+            while True:
+                line = rfile.readline().strip()
+                if not line:
+                    break
+                k, v = line.decode('latin1').split(':', 1)
+                headers[k.strip().lower()] = v.strip()
+
+            if headers.get('transfer-encoding') == 'chunked':
+                body = self._read_chunked(rfile)
+                self.chunked.append(True)
+            else:
+                body = rfile.read(int(headers['content-length']))
+                self.chunked.append(False)
+            self.requests += 1
+
+            action = self.actions.pop(0)
+            if action == 'hang':
+                self._hung.append(conn)
+                return
+
+            if action == 'drop':
+                break
+
+            status = None
+            if action == 'bad_gateway':
+                status = '502 Bad Gateway'
+
+            conn.sendall(self._respond(headers, body, status))
+            if action == 'respond_close':
+                break
+
+        rfile.close()
+        conn.close()
+        self.closed.set()
+
+    @staticmethod
+    def _read_chunked(rfile):
+        retval = []
+        while True:
+            size = int(rfile.readline().split(b';', 1)[0], 16)
+            if size == 0:
+                rfile.readline()
+                return b''.join(retval)
+
+            retval.append(rfile.read(size))
+            rfile.readline()
+
+    def _respond(self, headers, body, status_override=None):
+        status = []
+
+        def start_response(s, h):
+            status.append(s)
+
+        out = self.wsgi_app({
+            'REQUEST_METHOD': 'POST', 'PATH_INFO': '/', 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+            'CONTENT_TYPE': headers['content-type'],
+            'CONTENT_LENGTH': str(len(body)), 'wsgi.input': BytesIO(body),
+            'wsgi.url_scheme': 'http',
+        }, start_response)
+
+        data = b''.join([(s if isinstance(s, bytes) else s.encode('utf8'))
+                                                                 for s in out])
+        head = 'HTTP/1.1 %s\r\nContent-Length: %d\r\n\r\n' % (
+                                    status_override or status[0], len(data))
+        return head.encode('latin1') + data
+
+
+class TestHttpClient(unittest.TestCase):
+    def _get_server(self, actions):
+        server = _ScriptedServer(WsgiApplication(app), actions)
+        self.addCleanup(server.close)
+        return server
+
+    def test_reuse(self):
+        server = self._get_server(['respond'] * 3)
+        client = HttpClient(server.url, app)
+
+        for i in range(3):
+            assert client.service.repeat('ab', i) == 'ab' * i
+
+        assert client.pool.created == 1
+        client.close()
+
+    def test_procedure_reuse(self):
+        client = HttpClient('http://127.0.0.1:1/', app)
+
+        procedure = client.service.repeat
+        assert client.service.repeat is procedure
+
+        (c1,), (c2,) = procedure.contexts, procedure.contexts
+        assert not (c1 is c2)
+        assert c1.descriptor is c2.descriptor
+
+        client.service.out_header = object()
+        assert not (client.service.repeat is procedure)
+        assert client.service.repeat.out_header is client.service.out_header
+
+    def test_closed_idle_connection(self):
+        # the server closes the pooled connection before the request is sent.
+        server = self._get_server(['respond_close', 'respond'])
+        client = HttpClient(server.url, app)
+
+        assert client.service.repeat('a', 1) == 'a'
+        assert server.closed.wait(5)
+
+        assert client.service.repeat('a', 2) == 'aa'
+        assert client.pool.created == 2
+        assert server.requests == 2
+        client.close()
+
+    def test_dropped_request(self):
+        # the server closes the pooled connection without responding.
+        server = self._get_server(['respond', 'drop', 'respond'])
+        client = HttpClient(server.url, app)
+
+        assert client.service.repeat('a', 1) == 'a'
+        assert client.service.repeat('a', 2) == 'aa'
+        assert client.pool.created == 2
+        assert server.requests == 3
+        client.close()
+
+    def test_chunked_request(self):
+        server = self._get_server(['respond', 'drop', 'respond'])
+        client = HttpClient(server.url, app)
+
+        assert client.service.repeat('a', 1) == 'a'
+        assert client.service.echo('b' * 10000) == 'b' * 10000
+        assert server.chunked == [False, True, True]
+
+        # the request was sent again in full on a new connection.
+        assert client.pool.created == 2
+        client.close()
+
+    def test_error_status(self):
+        # the response body is no fault, but the status code is an error.
+        server = self._get_server(['bad_gateway'])
+        client = HttpClient(server.url, app)
+
+        try:
+            client.service.repeat('a', 1)
+        except HttpError as e:
+            assert e.code == 502
+        else:
+            raise Exception("must fail")
+
+        client.close()
+
+    def test_timeout(self):
+        # a request that timed out may have been processed, so it must not be
+        # sent again.
+        server = self._get_server(['respond', 'hang', 'respond'])
+        client = HttpClient(server.url, app, timeout=0.2)
+
+        assert client.service.repeat('a', 1) == 'a'
+        self.assertRaises(socket.timeout, client.service.repeat, 'a', 2)
+        assert server.requests == 2
+        assert client.pool.created == 1
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
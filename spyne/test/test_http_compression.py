@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import gzip
+import zlib
+import unittest
+
+from io import BytesIO
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.primitive import Integer
+from spyne.model.primitive import Unicode
+from spyne.protocol.json import JsonDocument
+from spyne.server.http import HttpBase
+from spyne.server.wsgi import WsgiApplication
+
+
+class SomeService(ServiceBase):
+    @srpc(Unicode, Integer, _returns=Unicode)
+    def repeat(s, i):
+        return s * i
+
+
+app = Application([SomeService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+
+
+def _gzip(data):
+    stream = BytesIO()
+    f = gzip.GzipFile(fileobj=stream, mode='wb')
+    f.write(data)
+    f.close()
+    return stream.getvalue()
+
+
+def _call(wsgi_app, body, **headers):
+    """Returns the response status, headers and body."""
+
+    req_env = {
+        'REQUEST_METHOD': 'POST', 'PATH_INFO': '/', 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)), 'wsgi.input': BytesIO(body),
+        'wsgi.url_scheme': 'http',
+    }
+    for k, v in headers.items():
+        req_env['HTTP_' + k.upper()] = v
+
+    response = []
+
+    def start_response(status, headers):
+        response.append((status, dict(headers)))
+
+    data = b''.join([(s if isinstance(s, bytes) else s.encode('utf8'))
+                                   for s in wsgi_app(req_env, start_response)])
+    return response[0][0], response[0][1], data
+
+
+class TestContentEncoding(unittest.TestCase):
+    def test_negotiation(self):
+        http = HttpBase(app, compression=True)
+
+        assert http.get_content_encoding(None) is None
+        assert http.get_content_encoding('identity') is None
+        assert http.get_content_encoding('gzip, deflate') == 'gzip'
+        assert http.get_content_encoding('deflate') == 'deflate'
+        assert http.get_content_encoding('gzip;q=0.5, deflate') == 'deflate'
+        assert http.get_content_encoding('*') == 'gzip'
+        assert http.get_content_encoding('*, gzip;q=0') == 'deflate'
+
+        http.compression = False
+        assert http.get_content_encoding('gzip') is None
+
+
+class TestWsgiCompression(unittest.TestCase):
+    def test_gzip_response(self):
+        wsgi_app = WsgiApplication(app, compression=True)
+        status, headers, body = _call(wsgi_app, b'{"repeat": ["ab", 1000]}',
+                                                        accept_encoding='gzip')
+
+        assert status.startswith('200')
+        assert headers['Content-Encoding'] == 'gzip'
+        assert headers['Vary'] == 'Accept-Encoding'
+        assert len(body) < 100
+
+        data = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        assert data == b'"' + b'ab' * 1000 + b'"'
+
+    def test_deflate_response(self):
+        wsgi_app = WsgiApplication(app, chunked=False, compression=True)
+        status, headers, body = _call(wsgi_app, b'{"repeat": ["ab", 1000]}',
+                                                     accept_encoding='deflate')
+
+        assert headers['Content-Encoding'] == 'deflate'
+        assert headers['Content-Length'] == str(len(body))
+        assert zlib.decompress(body) == b'"' + b'ab' * 1000 + b'"'
+
+    def test_short_response(self):
+        wsgi_app = WsgiApplication(app, compression=True)
+        status, headers, body = _call(wsgi_app, b'{"repeat": ["ab", 2]}',
+                                                        accept_encoding='gzip')
+
+        assert not ('Content-Encoding' in headers)
+        assert body == b'"abab"'
+
+    def test_disabled(self):
+        wsgi_app = WsgiApplication(app)
+        status, headers, body = _call(wsgi_app, b'{"repeat": ["ab", 1000]}',
+                                                        accept_encoding='gzip')
+
+        assert not ('Content-Encoding' in headers)
+        assert len(body) == 2002
+
+    def test_gzip_request(self):
+        wsgi_app = WsgiApplication(app, block_length=16)
+        status, headers, body = _call(wsgi_app,
+                                _gzip(b'{"repeat": ["ab", 2]}'),
+                                content_encoding='gzip')
+
+        assert status.startswith('200')
+        assert body == b'"abab"'
+
+    def test_unsupported_request_encoding(self):
+        wsgi_app = WsgiApplication(app)
+        status, headers, body = _call(wsgi_app, b'{"repeat": ["ab", 2]}',
+                                                         content_encoding='br')
+
+        assert status.startswith('400')
+
+    def test_request_too_long(self):
+        wsgi_app = WsgiApplication(app, max_content_length=1024)
+
+        # compresses to well below the limit.
+        data = b'{"repeat": ["' + b'a' * 10000 + b'", 1]}'
+        status, headers, body = _call(wsgi_app, _gzip(data),
+                                                       content_encoding='gzip')
+
+        assert status.startswith('413')
+
+
+if __name__ == '__main__':
+    unittest.main()
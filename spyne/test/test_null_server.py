@@ -101,5 +101,25 @@ class TestNullServer(unittest.TestCase):
         ostr_server.service.send_message("zobaaa", s="hobaa")
         assert set([("hobaa", None)]) == queue
 
+    def test_foreign_awaitable(self):
+        # awaitables that asyncio can't wait for (e.g. twisted deferreds) are
+        # regular return values.
+        class SomeAwaitable(object):
+            def __await__(self):
+                yield self
+
+        retval = SomeAwaitable()
+
+        class SomeService(ServiceBase):
+            @srpc(_returns=String)
+            def some_call():
+                return retval
+
+        application = Application([SomeService], 'some_tns',
+                        in_protocol=XmlDocument(), out_protocol=XmlDocument())
+
+        server = NullServer(application)
+        assert server.service.some_call() is retval
+
 if __name__ == '__main__':
     unittest.main()
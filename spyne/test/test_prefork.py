@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import os
+import time
+import signal
+import unittest
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+from wsgiref.simple_server import WSGIRequestHandler
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.primitive import Integer
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.soap import Soap11
+from spyne.server.prefork import PreforkServer
+from spyne.server.wsgi import WsgiApplication
+from spyne.util.test import call_wsgi_app
+
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(not hasattr(os, 'fork'), "os.fork() is not available")
+class TestPrefork(unittest.TestCase):
+    def test_serve(self):
+        class SomeService(ServiceBase):
+            @srpc(Integer, _returns=Integer)
+            def some_call(i):
+                return os.getpid()
+
+        app = Application([SomeService], 'tns', in_protocol=HttpRpc(),
+                                                        out_protocol=HttpRpc())
+
+        server = PreforkServer(WsgiApplication(app), port=0, workers=2,
+                                handler_class=_QuietHandler, poll_interval=0.05)
+        server.bind()
+        url = 'http://127.0.0.1:%d/some_call?i=1' % server.port
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+
+        server.server.server_close()
+
+        try:
+            pids = set()
+            for _ in range(4):
+                pids.add(int(urlopen(url).read()))
+
+            assert server.request_count == 4
+            assert not (pid in pids)
+
+            os.kill(pid, signal.SIGHUP)
+
+            # wait for the new workers to take over.
+            for _ in range(100):
+                new_pid = int(urlopen(url).read())
+                if not (new_pid in pids):
+                    break
+                time.sleep(0.05)
+            else:
+                raise Exception("workers were not replaced")
+
+            assert server.request_count > 4
+
+        finally:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+    def test_warm_up(self):
+        class SomeService(ServiceBase):
+            @srpc(Integer, _returns=Integer)
+            def some_call(i):
+                return i
+
+        wsgi_app = WsgiApplication(Application([SomeService], 'tns',
+                                in_protocol=Soap11(), out_protocol=Soap11()))
+
+        built = []
+        build = wsgi_app.doc.wsdl11.build_interface_document
+        def _build(url):
+            built.append(url)
+            return build(url)
+        wsgi_app.doc.wsdl11.build_interface_document = _build
+
+        # without a public url, there's nothing to build upfront.
+        PreforkServer(wsgi_app).warm_up()
+        assert built == []
+
+        PreforkServer(wsgi_app, public_url='https://example.com/soap').warm_up()
+        assert built == ['https://example.com/soap']
+
+        # requests for the public url are served from the warmed-up cache.
+        wsdl = call_wsgi_app(wsgi_app, mn='soap', headers={
+            'QUERY_STRING': 'wsdl',
+            'HTTP_HOST': 'example.com',
+            'wsgi.url_scheme': 'https',
+        })
+        assert built == ['https://example.com/soap']
+        assert 'location="https://example.com/soap"' in wsdl
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import json
+import time
+import zlib
+import unittest
+
+try:
+    from twisted.internet import defer
+    from twisted.internet import reactor
+    from twisted.internet.error import ConnectionDone
+    from twisted.internet.error import ConnectionLost
+    from twisted.python.failure import Failure
+    from twisted.test.proto_helpers import StringTransport
+    from twisted.web.iweb import UNKNOWN_LENGTH
+    from twisted.web.server import Site
+
+    from spyne.server.twisted.http import _Producer
+    from spyne.server.twisted import TwistedWebResource
+    from spyne.server.twisted import TwistedHttpRequest
+except (ImportError, SyntaxError):
+    TwistedWebResource = None
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.complex import Iterable
+from spyne.model.fault import Fault
+from spyne.model.primitive import Integer
+from spyne.model.primitive import Unicode
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.soap import Soap11
+from spyne.server.http import HttpCache
+from spyne.util.pool import WorkerPool
+
+
+_pool = WorkerPool(size=1)
+
+
+class SomeService(ServiceBase):
+    @srpc(Integer, _returns=Iterable(Unicode))
+    def some_call(n):
+        return [u'%05d' % i for i in range(n)]
+
+    @srpc(Unicode, _returns=Integer)
+    def count(s):
+        return len(s)
+
+    @srpc(Integer, _returns=Integer)
+    def deferred(i):
+        return defer.succeed(i * 2)
+
+    @srpc(_returns=Integer, _executor=_pool)
+    def fail_in_executor():
+        raise Fault('Client.InExecutor', 'failed')
+
+    @srpc(Integer, _returns=Integer, _http_cache=HttpCache(60))
+    def cached(i):
+        _calls.append(i)
+        return i * 2
+
+    @srpc(_returns=Unicode)
+    def broken_stream():
+        return u'a'
+
+
+def _break_stream(ctx):
+    if ctx.descriptor.name != 'broken_stream':
+        return
+
+    def _body():
+        yield 'a' * 10
+        raise ValueError("serialization failed")
+    ctx.out_string = _body()
+
+SomeService.event_manager.add_listener('method_return_string', _break_stream)
+
+
+_calls = []
+
+
+def _chunks():
+    for i in range(10):
+        yield 'x' * 3
+
+
+@unittest.skipIf(TwistedWebResource is None, "twisted is not available")
+class TestProducer(unittest.TestCase):
+    def test_push(self):
+        transport = StringTransport()
+        writes = []
+        transport.write = writes.append
+
+        producer = _Producer(_chunks(), transport, write_size=8)
+        assert producer.length is UNKNOWN_LENGTH
+
+        # the consumer pauses the producer after the second write.
+        def _write(data):
+            writes.append(data)
+            if len(writes) == 2:
+                producer.pauseProducing()
+        transport.write = _write
+
+        done = []
+        producer.deferred.addCallback(done.append)
+        producer.start()
+        assert writes == ['x' * 9, 'x' * 9]
+        assert transport.producer is producer
+
+        producer.resumeProducing()
+        assert writes == ['x' * 9] * 3 + ['x' * 3]
+        assert done == [transport]
+        assert transport.producer is None
+
+    def test_pull(self):
+        transport = StringTransport()
+        producer = _Producer(['ab', 'cd', 'ef'], transport, write_size=4)
+        assert producer.length == 6
+
+        producer.start(streaming=False)
+        assert transport.value() == ''
+
+        producer.resumeProducing()
+        assert transport.value() == 'abcd'
+
+        producer.resumeProducing()
+        producer.resumeProducing()
+        assert transport.value() == 'abcdef'
+        assert transport.producer is None
+
+    def test_error(self):
+        def _body():
+            yield 'a'
+            raise ValueError()
+
+        transport = StringTransport()
+        producer = _Producer(_body(), transport)
+        errors = []
+        producer.deferred.addErrback(errors.append)
+
+        producer.start()
+        assert errors[0].check(ValueError)
+        assert transport.producer is None
+
+    def test_stop(self):
+        transport = StringTransport()
+        producer = _Producer(['a', 'b'], transport)
+        errors = []
+        producer.deferred.addErrback(errors.append)
+
+        producer.stopProducing()
+        assert errors[0].check(ConnectionLost)
+
+
+@unittest.skipIf(TwistedWebResource is None, "twisted is not available")
+class TestTwistedWebResource(unittest.TestCase):
+    def _connect(self, out_protocol, in_protocol=None, request_factory=None,
+                                                                     **kwargs):
+        if in_protocol is None:
+            in_protocol = HttpRpc()
+
+        app = Application([SomeService], 'tns', in_protocol=in_protocol,
+                                                    out_protocol=out_protocol)
+        site = Site(TwistedWebResource(app, **kwargs))
+        if request_factory is not None:
+            site.requestFactory = request_factory
+
+        channel = site.buildProtocol(None)
+        transport = StringTransport()
+        channel.makeConnection(transport)
+
+        # the channel's idle timeout is scheduled on the global reactor.
+        self.addCleanup(channel.connectionLost, Failure(ConnectionDone()))
+
+        return channel, transport
+
+    def _post(self, channel, body):
+        channel.dataReceived('POST / HTTP/1.1\r\nHost: localhost\r\n'
+                             'Content-Length: %d\r\n\r\n' % len(body))
+        channel.dataReceived(body)
+
+    def test_request_body(self):
+        channel, transport = self._connect(JsonDocument(), JsonDocument(),
+                                                              block_length=16)
+
+        self._post(channel, '{"count": ["%s"]}' % ('a' * 100))
+
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert head.startswith('HTTP/1.1 200')
+        assert '100' in body
+
+    def test_compression(self):
+        channel, transport = self._connect(JsonDocument(), JsonDocument(),
+                                                             compression=True)
+
+        body = zlib.compress('{"count": ["%s"]}' % ('a' * 100))
+        channel.dataReceived('POST / HTTP/1.1\r\nHost: localhost\r\n'
+                             'Accept-Encoding: gzip\r\n'
+                             'Content-Encoding: deflate\r\n'
+                             'Content-Length: %d\r\n\r\n' % len(body))
+        channel.dataReceived(body)
+
+        head, body = transport.value().split('\r\n\r\n', 1)
+        transport.clear()
+        assert head.startswith('HTTP/1.1 200')
+        assert not ('Content-Encoding' in head)
+
+        body = '{"some_call": [1000]}'
+        channel.dataReceived('POST / HTTP/1.1\r\nHost: localhost\r\n'
+                             'Accept-Encoding: gzip\r\n'
+                             'Content-Length: %d\r\n\r\n' % len(body))
+        channel.dataReceived(body)
+
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert 'Content-Encoding: gzip' in head
+        assert 'Transfer-Encoding: chunked' in head
+
+        data = ''
+        while True:
+            size, body = body.split('\r\n', 1)
+            if int(size, 16) == 0:
+                break
+            data += body[:int(size, 16)]
+            body = body[int(size, 16) + 2:]
+
+        assert json.loads(zlib.decompress(data, 16 + zlib.MAX_WBITS)) == \
+                                          [u'%05d' % i for i in range(1000)]
+
+    def test_http_cache(self):
+        del _calls[:]
+        channel, transport = self._connect(HttpRpc())
+
+        channel.dataReceived('GET /cached?i=2 HTTP/1.1\r\n'
+                             'Host: localhost\r\n\r\n')
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert head.startswith('HTTP/1.1 200')
+        assert 'Cache-Control: public, max-age=60' in head
+        assert body == '4'
+
+        etag, = [l.split(': ', 1)[1] for l in head.split('\r\n')
+                                                     if l.startswith('ETag: ')]
+
+        transport.clear()
+        channel.dataReceived('GET /cached?i=2 HTTP/1.1\r\nHost: localhost\r\n'
+                             'If-None-Match: %s\r\n\r\n' % etag)
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert head.startswith('HTTP/1.1 304')
+        assert body == ''
+        assert _calls == [2]
+
+    def test_deferred(self):
+        channel, transport = self._connect(HttpRpc())
+
+        channel.dataReceived('GET /deferred?i=2 HTTP/1.1\r\n'
+                             'Host: localhost\r\n\r\n')
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert head.startswith('HTTP/1.1 200')
+        assert body == '4'
+
+    def test_executor_error(self):
+        channel, transport = self._connect(JsonDocument())
+
+        channel.dataReceived('GET /fail_in_executor HTTP/1.1\r\n'
+                             'Host: localhost\r\n\r\n')
+
+        # the worker thread hands the outcome over via callFromThread.
+        deadline = time.time() + 5
+        while transport.value() == '' and time.time() < deadline:
+            time.sleep(0.01)
+            reactor.runUntilCurrent()
+
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert head.startswith('HTTP/1.1 400')
+        assert 'Client.InExecutor' in body
+
+    def test_error_mid_stream(self):
+        requests = []
+
+        class _Request(TwistedHttpRequest):
+            def __init__(self, *args, **kwargs):
+                TwistedHttpRequest.__init__(self, *args, **kwargs)
+                requests.append(self)
+                self.notifyFinish().addErrback(errors.append)
+
+        errors = []
+        channel, transport = self._connect(HttpRpc(), request_factory=_Request)
+
+        channel.dataReceived('GET /broken_stream HTTP/1.1\r\n'
+                             'Host: localhost\r\n\r\n')
+
+        # the incomplete response can't be finished, but the request is told.
+        assert transport.disconnecting
+        assert not requests[0].finished
+        assert errors[0].check(ValueError)
+
+    def test_request_too_long(self):
+        channel, transport = self._connect(JsonDocument(), JsonDocument(),
+                                                       max_content_length=64)
+
+        self._post(channel, '{"count": ["%s"]}' % ('a' * 100))
+        assert transport.value().startswith('HTTP/1.1 413')
+
+    def test_request_refused_early(self):
+        class _Request(TwistedHttpRequest):
+            max_content_length = 64
+
+        channel, transport = self._connect(JsonDocument(), JsonDocument(),
+                                                    request_factory=_Request)
+
+        channel.dataReceived('POST / HTTP/1.1\r\nHost: localhost\r\n'
+                             'Content-Length: 1000\r\n\r\n')
+        assert transport.value().startswith('HTTP/1.1 413')
+        assert transport.disconnecting
+
+        # the rest of the body is ignored.
+        transport.clear()
+        channel.dataReceived('a' * 1000)
+        assert transport.value() == ''
+
+    def test_content_length(self):
+        channel, transport = self._connect(Soap11())
+
+        channel.dataReceived('GET /some_call?n=1000 HTTP/1.1\r\n'
+                             'Host: localhost\r\n\r\n')
+
+        head, body = transport.value().split('\r\n\r\n', 1)
+        assert 'Content-Length: %d' % len(body) in head
+        assert body.count('<tns:string>') == 1000
+
+    def test_chunked(self):
+        channel, transport = self._connect(JsonDocument())
+
+        for _ in range(2):
+            channel.dataReceived('GET /some_call?n=1000 HTTP/1.1\r\n'
+                                 'Host: localhost\r\n\r\n')
+
+            # json documents are generated lazily, so their length is not
+            # known in advance.
+            head, body = transport.value().split('\r\n\r\n', 1)
+            transport.clear()
+            assert 'Transfer-Encoding: chunked' in head
+
+            size, rest = body.split('\r\n', 1)
+            assert rest[int(size, 16):] == '\r\n0\r\n\r\n'
+            assert json.loads(rest[:int(size, 16)]) == \
+                                          [u'%05d' % i for i in range(1000)]
+
+        assert not transport.disconnecting
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import unittest
 import pytz
+import threading
 import decimal
 
 from pprint import pprint
@@ -12,12 +13,14 @@ from lxml import etree
 from spyne.const import MAX_STRING_FIELD_LENGTH
 
 from spyne.decorator import srpc
+from spyne.error import ServiceUnavailableError
 from spyne.application import Application
 
 from spyne.model.complex import XmlAttribute
 from spyne.model.complex import ComplexModel
 from spyne.model.complex import Iterable
 from spyne.model.complex import Array
+from spyne.model.fault import Fault
 from spyne.model.primitive import Decimal
 from spyne.model.primitive import DateTime
 from spyne.model.primitive import Integer
@@ -27,6 +30,11 @@ from spyne.service import ServiceBase
 
 from spyne.util import AttrDict, AttrDictColl
 
+from spyne.util.cache import LruCache
+from spyne.util.cache import MemoCache
+from spyne.util.cache import get_canonical_key
+from spyne.util.http import parse_header
+from spyne.util.pool import WorkerPool
 from spyne.util.protocol import deserialize_request_string
 
 from spyne.util.dictdoc import get_dict_as_object, get_object_as_yaml, \
@@ -271,6 +279,181 @@ class TestDictDoc(unittest.TestCase):
             print(c)
             assert o == c
 
+class TestWorkerPool(unittest.TestCase):
+    def test_submit(self):
+        pool = WorkerPool(size=2)
+        done = threading.Event()
+        results = []
+
+        def _cb(success, result):
+            results.append((success, result))
+            if len(results) == 2:
+                done.set()
+
+        pool.submit(_cb, lambda a, b: a + b, 1, 2)
+        pool.submit(_cb, lambda: 1 / 0)
+
+        assert done.wait(5)
+        pool.close()
+
+        assert (True, 3) in results
+        failure, = [r for s, r in results if not s]
+        assert failure[0] is ZeroDivisionError
+        assert pool.submitted == pool.completed == 2
+        assert pool.active == pool.queue_depth == 0
+
+    def test_saturation(self):
+        pool = WorkerPool(size=1, max_queue_size=1)
+        release = threading.Event()
+        done = threading.Event()
+        results = []
+
+        def _cb(success, result):
+            results.append(result)
+            if len(results) == 2:
+                done.set()
+
+        pool.submit(_cb, release.wait)
+        pool.submit(_cb, release.wait)
+        assert pool.saturated
+
+        try:
+            pool.submit(_cb, release.wait)
+        except ServiceUnavailableError:
+            pass
+        else:
+            raise Exception("must fail")
+
+        assert pool.rejected == 1
+        assert pool.max_queue_depth >= 1
+
+        release.set()
+        assert done.wait(5)
+        pool.close()
+
+        assert not pool.saturated
+        assert pool.completed == 2
+
+
+class TestCache(unittest.TestCase):
+    def test_lru(self):
+        cache = LruCache(size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+
+        # 'b' is the least recently used one now.
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+    def test_ttl(self):
+        cache = LruCache(ttl=0)
+        cache.put('a', 1)
+        assert cache.get('a', 'missing') == 'missing'
+
+    def test_canonical_key(self):
+        class SomeClass(ComplexModel):
+            i = Integer
+            s = Array(Unicode)
+
+        k1 = get_canonical_key([SomeClass(i=1, s=['a', 'b']), {'x': 1, 'y': 2}])
+        k2 = get_canonical_key([SomeClass(s=['a', 'b'], i=1), {'y': 2, 'x': 1}])
+        k3 = get_canonical_key([SomeClass(i=2, s=['a', 'b']), {'x': 1, 'y': 2}])
+
+        assert k1 == k2
+        assert hash(k1) == hash(k2)
+        assert k1 != k3
+
+        self.assertRaises(TypeError, get_canonical_key, [iter([1])])
+
+    def test_memo(self):
+        from spyne.protocol.soap import Soap11
+        from spyne.server.null import NullServer
+
+        calls = []
+        memo = MemoCache(ttl=60)
+
+        class SomeService(ServiceBase):
+            @srpc(Integer, _returns=Integer, _memo=memo)
+            def some_call(i):
+                calls.append(i)
+                return i * 2
+
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+
+        events = []
+        def _hit(ctx):
+            events.append('hit')
+        def _miss(ctx):
+            events.append('miss')
+        app.event_manager.add_listener('method_memo_hit', _hit)
+        app.event_manager.add_listener('method_memo_miss', _miss)
+
+        server = NullServer(app, ostr=True)
+        ret1 = b''.join(server.service.some_call(2))
+        ret2 = b''.join(server.service.some_call(2))
+        ret3 = b''.join(server.service.some_call(3))
+
+        assert ret1 == ret2
+        assert b'>4<' in ret1
+        assert b'>6<' in ret3
+        assert calls == [2, 3]
+        assert memo.hits == 1
+        assert memo.misses == 2
+        assert events == ['miss', 'hit', 'miss']
+
+        # there's no object to return from the memo cache.
+        assert NullServer(app).service.some_call(2) == 4
+        assert calls == [2, 3, 2]
+
+    def test_memo_method_call(self):
+        from spyne.protocol.soap import Soap11
+        from spyne.server.null import NullServer
+
+        memo = MemoCache(ttl=60)
+
+        class SomeService(ServiceBase):
+            @srpc(Integer, _returns=Integer, _memo=memo)
+            def some_call(i):
+                return i * 2
+
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+
+        callers = []
+        def _authenticate(ctx):
+            callers.append(ctx)
+            if len(callers) > 1:
+                raise Fault('Client.Unauthorized')
+        SomeService.event_manager.add_listener('method_call', _authenticate)
+
+        server = NullServer(app, ostr=True)
+        assert b'>4<' in b''.join(server.service.some_call(2))
+
+        # the memoized response must not bypass the listener.
+        try:
+            server.service.some_call(2)
+        except Fault as e:
+            assert e.faultcode == 'Client.Unauthorized'
+        else:
+            raise Exception("must fail")
+
+        assert memo.hits == 0
+
+
+class TestParseHeader(unittest.TestCase):
+    def test_parse_header(self):
+        assert parse_header('text/xml') == ('text/xml', {})
+        assert parse_header('text/xml; charset=utf-8') == \
+                                            ('text/xml', {'charset': 'utf-8'})
+        assert parse_header('multipart/related; Type="a;b"; start=x') == \
+                     ('multipart/related', {'type': 'a;b', 'start': 'x'})
+
+
 class TestAttrDict(unittest.TestCase):
     def test_attr_dict(self):
         assert AttrDict(a=1)['a'] == 1
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import unittest
+
+try:
+    from twisted.internet.defer import Deferred
+    from twisted.internet.task import Cooperator
+    from twisted.test.proto_helpers import StringTransport
+
+    from spyne.server.twisted.websocket import TwistedWebSocketFactory
+    from spyne.server.twisted.websocket import TwistedWebSocketResource
+    from spyne.util._twisted_ws import CONTROLS
+    from spyne.util._twisted_ws import _makeFrame
+    from spyne.util._twisted_ws import _parseFrames
+except (ImportError, SyntaxError):
+    TwistedWebSocketFactory = None
+
+from spyne.application import Application
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model import PushBase
+from spyne.model.complex import ComplexModel
+from spyne.model.complex import Iterable
+from spyne.model.primitive import Unicode
+from spyne.protocol.json import JsonDocument
+
+
+_later = []
+_pushes = []
+
+
+class Message(ComplexModel):
+    text = Unicode
+
+
+class SomeService(ServiceBase):
+    @srpc(Unicode, _returns=Unicode)
+    def echo(s):
+        return s
+
+    @srpc(_returns=Unicode)
+    def later():
+        retval = Deferred()
+        _later.append(retval)
+        return retval
+
+    @srpc(_returns=Iterable(Unicode))
+    def stream():
+        return PushBase(_pushes.append)
+
+
+class SplitService(ServiceBase):
+    @srpc(Unicode, _returns=Unicode)
+    def split_echo(s):
+        return s
+
+
+def _split(ctx):
+    ctx.out_string = list(''.join(ctx.out_string))
+
+SplitService.event_manager.add_listener('method_return_string', _split)
+
+
+def _connect(**kwargs):
+    app = Application([SomeService, SplitService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+    factory = TwistedWebSocketFactory(app, **kwargs)
+
+    protocol = factory.buildProtocol(None)
+    transport = StringTransport()
+    protocol.makeConnection(transport)
+
+    return app, protocol, transport
+
+
+def _send(protocol, data, opcode=None, fin=True):
+    if opcode is None:
+        opcode = CONTROLS.TEXT
+    protocol.dataReceived(_makeFrame(data, opcode, fin, mask='abcd'))
+
+
+def _received(transport):
+    retval = list(_parseFrames([transport.value()], needMask=False))
+    transport.clear()
+    return retval
+
+
+@unittest.skipIf(TwistedWebSocketFactory is None, "twisted is not available")
+class TestWebSocket(unittest.TestCase):
+    def test_fragmented_request(self):
+        app, protocol, transport = _connect()
+
+        _send(protocol, '{"echo": ', fin=False)
+        assert _received(transport) == []
+
+        _send(protocol, '["a"]}', CONTROLS.CONTINUE)
+        assert _received(transport) == [(CONTROLS.TEXT, '"a"', True)]
+
+    def test_multiplex(self):
+        app, protocol, transport = _connect(multiplex=True)
+        del _later[:]
+
+        _send(protocol, '1\n{"later": []}')
+        _send(protocol, '2\n{"echo": ["a"]}')
+
+        # the second request completes first.
+        assert _received(transport) == [(CONTROLS.TEXT, '2\n"a"', True)]
+
+        _later[0].callback('b')
+        assert _received(transport) == [(CONTROLS.TEXT, '1\n"b"', True)]
+
+    def test_push(self):
+        app, protocol, transport = _connect(multiplex=True)
+        del _pushes[:]
+
+        _send(protocol, '4\n{"stream": []}')
+        assert _received(transport) == []
+
+        push, = _pushes
+        assert push.response is protocol
+
+        push.append(u'a')
+        assert _received(transport) == [(CONTROLS.TEXT, '4\n["a"]', True)]
+
+        # another response can go out while the stream is open.
+        _send(protocol, '5\n{"echo": ["b"]}')
+        push.append(u'c')
+        push.close()
+
+        assert _received(transport) == [
+            (CONTROLS.TEXT, '5\n"b"', True),
+            (CONTROLS.TEXT, '4\n["c"]', True),
+            (CONTROLS.TEXT, '4\n', True),
+        ]
+
+    def test_when_resumed(self):
+        app, protocol, transport = _connect()
+        resumed = []
+
+        protocol.whenResumed().addCallback(resumed.append)
+        assert resumed == [None]
+
+        protocol.pauseProducing()
+        protocol.whenResumed().addCallback(resumed.append)
+        assert resumed == [None]
+
+        protocol.resumeProducing()
+        assert resumed == [None, None]
+
+    def test_fragmented_response(self):
+        app, protocol, transport = _connect(multiplex=True)
+
+        _send(protocol, '3\n{"split_echo": ["ab"]}')
+
+        assert _received(transport) == [
+            (CONTROLS.TEXT, '3\n"', False),
+            (CONTROLS.CONTINUE, 'a', False),
+            (CONTROLS.CONTINUE, 'b', False),
+            (CONTROLS.CONTINUE, '"', True),
+        ]
+
+
+@unittest.skipIf(TwistedWebSocketFactory is None, "twisted is not available")
+class TestWebSocketBroadcast(unittest.TestCase):
+    def setUp(self):
+        app = Application([SomeService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+        self.resource = TwistedWebSocketResource(app, bookkeep=True,
+                                                                  batch_size=2)
+
+        # run the broadcasts one batch per explicit step.
+        self.steps = []
+        self.resource.cooperate = Cooperator(
+                    terminationPredicateFactory=lambda: lambda: True,
+                    scheduler=self.steps.append).cooperate
+
+    def _connect(self):
+        protocol = self.resource._factory.buildProtocol(None)
+        transport = StringTransport()
+        protocol.makeConnection(transport)
+        return protocol, transport
+
+    def _run(self):
+        while len(self.steps) > 0:
+            self.steps.pop(0)()
+
+    def test_propagate(self):
+        clients = [self._connect() for _ in range(5)]
+        d = self.resource.propagate(Message(text=u'a'))
+        done = []
+        d.addCallback(done.append)
+
+        # the first batch is sent right away, the rest later.
+        self.steps.pop(0)()
+        assert [len(_received(t)) for p, t in clients] == [1, 1, 0, 0, 0]
+        assert done == []
+
+        self._run()
+        for p, t in clients[2:]:
+            assert _received(t) == [(CONTROLS.TEXT, '{"text": "a"}', True)]
+        assert len(done) == 1
+
+    def test_topic(self):
+        (p1, t1), (p2, t2) = self._connect(), self._connect()
+        p1.subscribe('news')
+
+        self.resource.propagate(Message(text=u'a'), topic='news')
+        self._run()
+        assert _received(t1) == [(CONTROLS.TEXT, '{"text": "a"}', True)]
+        assert _received(t2) == []
+
+        p1.connectionLost(None)
+        assert self.resource.topics == {}
+        assert list(self.resource.clients.values()) == [p2]
+
+    def test_topic_without_bookkeeping(self):
+        resource = TwistedWebSocketResource(self.resource.app, bookkeep=False)
+        protocol = resource._factory.buildProtocol(None)
+        protocol.makeConnection(StringTransport())
+
+        protocol.subscribe('news')
+        assert resource.topics == {'news': set([protocol])}
+
+        protocol.connectionLost(None)
+        assert resource.topics == {}
+
+    def test_slow_consumer(self):
+        p, t = self._connect()
+        p.max_pending = 2
+
+        p.pauseProducing()
+        for s in (u'a', u'b', u'c'):
+            self.resource.propagate(Message(text=s))
+            self._run()
+
+        assert t.value() == ''
+        assert p.dropped == 1
+
+        p.resumeProducing()
+        assert [d for _, d, _ in _received(t)] == ['{"text": "a"}',
+                                                   '{"text": "b"}']
+
+        p.disconnect_slow_consumers = True
+        p.pauseProducing()
+        for s in (u'a', u'b', u'c'):
+            self.resource.propagate(Message(text=s))
+            self._run()
+        assert t.disconnecting
+
+    def test_app_id(self):
+        p, t = self._connect()
+        p.app_id = 'x'
+        assert self.resource.clients == {'x': p}
+
+
+if __name__ == '__main__':
+    unittest.main()
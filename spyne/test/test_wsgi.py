@@ -0,0 +1,479 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+
+import unittest
+
+from io import BytesIO
+
+from spyne.application import Application
+from spyne.const.http import HTTP_201
+from spyne.decorator import rpc
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.complex import ComplexModel
+from spyne.model.fault import Fault
+from spyne.model.primitive import Integer
+from spyne.model.primitive import Unicode
+from spyne.protocol.http import HttpRpc
+from spyne.protocol.json import JsonDocument
+from spyne.protocol.soap import Soap11
+from spyne.server.http import HttpCache
+from spyne.server.wsgi import WsgiApplication
+from spyne.server.wsgi import WSDL_CACHE_SIZE
+from spyne.server.wsgi import _is_wsdl_request
+from spyne.util.cache import MemoCache
+
+
+class SomeService(ServiceBase):
+    @srpc(Unicode, Integer, _returns=Unicode)
+    def repeat(s, i):
+        return s * i
+
+
+def _call(wsgi_app, body, content_type='application/json'):
+    """Returns the response status, headers and the iterable the wsgi
+    application returned."""
+
+    req_env = {
+        'REQUEST_METHOD': 'POST', 'PATH_INFO': '/', 'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)), 'wsgi.input': BytesIO(body),
+        'wsgi.url_scheme': 'http',
+    }
+
+    response = []
+
+    def start_response(status, headers):
+        response.append((status, dict(headers)))
+
+    ret = wsgi_app(req_env, start_response)
+    return response[0][0], response[0][1], ret
+
+
+class TestWsgiOutString(unittest.TestCase):
+    def test_chunks_are_not_joined(self):
+        app = Application([SomeService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+        wsgi_app = WsgiApplication(app, chunked=False)
+
+        chunks = []
+        def _split(ctx):
+            ctx.out_string = [b'"ab', b'ab"']
+            chunks.append(ctx.out_string)
+        wsgi_app.event_manager.add_listener('wsgi_return', _split)
+
+        status, headers, ret = _call(wsgi_app, b'{"repeat": ["ab", 2]}')
+
+        assert status.startswith('200')
+        assert headers['Content-Length'] == '6'
+        assert list(ret) == chunks[0]
+
+    def test_generator(self):
+        app = Application([SomeService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+        wsgi_app = WsgiApplication(app, chunked=False)
+
+        status, headers, ret = _call(wsgi_app, b'{"repeat": ["ab", 3]}')
+
+        data = b''.join(ret)
+        assert headers['Content-Length'] == str(len(data))
+        assert data == b'"ababab"'
+
+    def test_known_length(self):
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+        wsgi_app = WsgiApplication(app, chunked=False)
+
+        lengths = []
+        def _check(ctx):
+            lengths.append(ctx.out_string_length)
+        wsgi_app.event_manager.add_listener('wsgi_return', _check)
+
+        status, headers, ret = _call(wsgi_app, b'''
+            <senv:Envelope
+                    xmlns:senv="http://schemas.xmlsoap.org/soap/envelope/"
+                    xmlns:tns="tns">
+                <senv:Body>
+                    <tns:repeat><tns:s>ab</tns:s><tns:i>2</tns:i></tns:repeat>
+                </senv:Body>
+            </senv:Envelope>''', 'text/xml')
+
+        data = b''.join(ret)
+        assert lengths[0] == len(data)
+        assert headers['Content-Length'] == str(len(data))
+        assert b'abab' in data
+
+    def test_replaced_stream(self):
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+        wsgi_app = WsgiApplication(app, chunked=False)
+
+        def _replace(ctx):
+            ctx.out_string = [b'abc']
+        wsgi_app.event_manager.add_listener('wsgi_return', _replace)
+
+        status, headers, ret = _call(wsgi_app, b'''
+            <senv:Envelope
+                    xmlns:senv="http://schemas.xmlsoap.org/soap/envelope/"
+                    xmlns:tns="tns">
+                <senv:Body>
+                    <tns:repeat><tns:s>ab</tns:s><tns:i>2</tns:i></tns:repeat>
+                </senv:Body>
+            </senv:Envelope>''', 'text/xml')
+
+        assert headers['Content-Length'] == '3'
+        assert b''.join(ret) == b'abc'
+
+
+def _get_wsdl(wsgi_app, host='localhost', path='/', qs='wsdl', **headers):
+    req_env = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': qs,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': host,
+        'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+    }
+    for k, v in headers.items():
+        req_env['HTTP_' + k.upper()] = v
+
+    response = []
+
+    def start_response(status, headers):
+        response.append((status, dict(headers)))
+
+    data = b''.join(wsgi_app(req_env, start_response))
+    return response[0][0], response[0][1], data
+
+
+class TestWsgiWsdl(unittest.TestCase):
+    def setUp(self):
+        app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+        self.wsgi_app = WsgiApplication(app)
+
+    def test_is_wsdl_request(self):
+        def _env(method, path, qs):
+            return {'REQUEST_METHOD': method, 'PATH_INFO': path,
+                                                            'QUERY_STRING': qs}
+
+        assert _is_wsdl_request(_env('GET', '/', 'wsdl'))
+        assert _is_wsdl_request(_env('GET', '/', 'WSDL'))
+        assert _is_wsdl_request(_env('get', '/', 'wsdl'))
+        assert _is_wsdl_request(_env('GET', '/Service.wsdl', ''))
+        assert not _is_wsdl_request(_env('POST', '/', 'wsdl'))
+        assert not _is_wsdl_request(_env('GET', '/', 'wsdl=1'))
+        assert not _is_wsdl_request(_env('GET', '/', ''))
+
+    def test_url_is_not_reconstructed_for_rpc(self):
+        import spyne.server.wsgi
+
+        def _fail(*args, **kwargs):
+            raise Exception("must not be called")
+
+        orig, spyne.server.wsgi.reconstruct_url = \
+                                     spyne.server.wsgi.reconstruct_url, _fail
+        try:
+            app = Application([SomeService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+            status, headers, ret = _call(WsgiApplication(app, chunked=False),
+                                                     b'{"repeat": ["ab", 2]}')
+            assert status.startswith('200')
+            assert b''.join(ret) == b'"abab"'
+
+        finally:
+            spyne.server.wsgi.reconstruct_url = orig
+
+    def test_cache_per_url(self):
+        status, headers, wsdl_a = _get_wsdl(self.wsgi_app, 'a.example.com')
+        assert status.startswith('200')
+        assert b'http://a.example.com/' in wsdl_a
+        assert headers['Content-Length'] == str(len(wsdl_a))
+
+        status, headers, wsdl_b = _get_wsdl(self.wsgi_app, 'b.example.com')
+        assert b'http://b.example.com/' in wsdl_b
+        assert not (b'http://a.example.com/' in wsdl_b)
+
+        built = []
+        def _built(doc):
+            built.append(doc)
+        self.wsgi_app.doc.wsdl11.event_manager.add_listener(
+                                                  'wsdl_document_built', _built)
+
+        status, headers, data = _get_wsdl(self.wsgi_app, 'a.example.com')
+        assert data == wsdl_a
+        assert built == []
+
+    def test_cache_eviction(self):
+        built = []
+        def _built(doc):
+            built.append(doc)
+        self.wsgi_app.doc.wsdl11.event_manager.add_listener(
+                                                  'wsdl_document_built', _built)
+
+        _get_wsdl(self.wsgi_app, 'a.example.com')
+
+        # made-up hosts must not evict the wsdl that's actually in use.
+        for i in range(WSDL_CACHE_SIZE * 2):
+            _get_wsdl(self.wsgi_app, 'x%d.example.com' % i)
+            _get_wsdl(self.wsgi_app, 'a.example.com')
+
+        assert len(built) == 1 + WSDL_CACHE_SIZE * 2
+        assert len(self.wsgi_app._wsdl_cache) == WSDL_CACHE_SIZE
+
+    def test_etag(self):
+        status, headers, wsdl = _get_wsdl(self.wsgi_app)
+        etag = headers['ETag']
+
+        status, headers, data = _get_wsdl(self.wsgi_app, if_none_match=etag)
+        assert status.startswith('304')
+        assert headers['ETag'] == etag
+        assert data == b''
+
+        status, headers, data = _get_wsdl(self.wsgi_app,
+                                          if_none_match='"x", W/' + etag)
+        assert status.startswith('304')
+
+        status, headers, data = _get_wsdl(self.wsgi_app, if_none_match='"x"')
+        assert status.startswith('200')
+        assert data == wsdl
+
+        # the wsdl for another url has a different etag.
+        status, headers, data = _get_wsdl(self.wsgi_app, 'b.example.com',
+                                                            if_none_match=etag)
+        assert status.startswith('200')
+        assert headers['ETag'] != etag
+
+    def test_hard_coded_url(self):
+        self.wsgi_app.doc.wsdl11.build_interface_document(
+                                                   'http://example.com/soap')
+
+        status, headers, data = _get_wsdl(self.wsgi_app, 'a.example.com')
+        assert b'http://example.com/soap' in data
+        assert not (b'a.example.com' in data)
+
+
+class TestWsgiHttpCache(unittest.TestCase):
+    def _get(self, wsgi_app, qs, method='GET', **headers):
+        req_env = {
+            'REQUEST_METHOD': method, 'PATH_INFO': '/get', 'QUERY_STRING': qs,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+            'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+        }
+        for k, v in headers.items():
+            req_env['HTTP_' + k.upper()] = v
+
+        response = []
+
+        def start_response(status, headers):
+            response.append((status, dict(headers)))
+
+        data = b''.join(wsgi_app(req_env, start_response))
+        return response[0][0], response[0][1], data
+
+    def _app(self, **kwargs):
+        calls = []
+
+        class CachedService(ServiceBase):
+            @srpc(Integer, _returns=Integer,
+                                          _http_cache=HttpCache(60, **kwargs))
+            def get(i):
+                calls.append(i)
+                return i * 2
+
+        app = Application([CachedService], 'tns', in_protocol=HttpRpc(),
+                                                        out_protocol=HttpRpc())
+        return WsgiApplication(app), calls
+
+    def test_conditional_get(self):
+        wsgi_app, calls = self._app()
+
+        status, headers, data = self._get(wsgi_app, 'i=2')
+        assert status.startswith('200')
+        assert data == b'4'
+        assert headers['Cache-Control'] == 'public, max-age=60'
+        etag = headers['ETag']
+
+        status, headers, data = self._get(wsgi_app, 'i=2', if_none_match=etag)
+        assert status.startswith('304')
+        assert headers['ETag'] == etag
+        assert not ('Content-Length' in headers)
+        assert data == b''
+        assert calls == [2]
+
+        # other arguments, other response.
+        status, headers, data = self._get(wsgi_app, 'i=3', if_none_match=etag)
+        assert status.startswith('200')
+        assert data == b'6'
+        assert calls == [2, 3]
+
+        # the response is not stored, so the user code is called again.
+        status, headers, data = self._get(wsgi_app, 'i=2')
+        assert data == b'4'
+        assert headers['ETag'] == etag
+        assert calls == [2, 3, 2]
+
+    def test_store(self):
+        wsgi_app, calls = self._app(store=True, private=True)
+
+        for _ in range(3):
+            status, headers, data = self._get(wsgi_app, 'i=2')
+            assert status.startswith('200')
+            assert data == b'4'
+            assert headers['Content-Length'] == '1'
+            assert headers['Cache-Control'] == 'private, max-age=60'
+
+        assert calls == [2]
+
+    def test_vary_by_args(self):
+        wsgi_app, calls = self._app(store=True, vary_by_args=False)
+
+        assert self._get(wsgi_app, 'i=2')[2] == b'4'
+        assert self._get(wsgi_app, 'i=3')[2] == b'4'
+        assert calls == [2]
+
+    def test_method_call_rejects(self):
+        wsgi_app, calls = self._app(store=True)
+
+        callers = []
+        def _authenticate(ctx):
+            callers.append(ctx)
+            if len(callers) > 1:
+                raise Fault('Client.Unauthorized')
+        wsgi_app.app.event_manager.add_listener('method_call', _authenticate)
+
+        status, headers, data = self._get(wsgi_app, 'i=2')
+        assert data == b'4'
+
+        # the stored response must not bypass the listener.
+        status, headers, data = self._get(wsgi_app, 'i=2')
+        assert not status.startswith('200')
+        assert not (b'4' == data)
+        assert calls == [2]
+
+    def test_identity(self):
+        wsgi_app, calls = self._app(store=True)
+
+        assert self._get(wsgi_app, 'i=2')[2] == b'4'
+        assert self._get(wsgi_app, 'i=2')[2] == b'4'
+        assert calls == [2]
+
+        # responses to identified clients are neither shared nor stored.
+        status, headers, data = self._get(wsgi_app, 'i=2',
+                                                    authorization='secret')
+        assert data == b'4'
+        assert headers['Cache-Control'] == 'private, max-age=60'
+        assert calls == [2, 2]
+        etag = headers['ETag']
+
+        # the credentials are not kept in the cache keys.
+        cache = wsgi_app.app.interface.service_method_map[
+                                        '{tns}get'][0].http_cache
+        assert not ('secret' in repr(list(cache.entries._data)))
+
+        assert self._get(wsgi_app, 'i=2', cookie='s=b')[2] == b'4'
+        assert calls == [2, 2, 2]
+
+        # but they can still be revalidated.
+        status, headers, data = self._get(wsgi_app, 'i=2',
+                                authorization='secret', if_none_match=etag)
+        assert status.startswith('304')
+        assert calls == [2, 2, 2]
+
+    def test_post(self):
+        wsgi_app, calls = self._app(store=True)
+
+        for _ in range(2):
+            status, headers, data = self._get(wsgi_app, 'i=2', method='POST')
+            assert data == b'4'
+            assert not ('ETag' in headers)
+
+        assert calls == [2, 2]
+
+
+class TestWsgiMemo(unittest.TestCase):
+    def test_memo(self):
+        calls = []
+        memo = MemoCache()
+
+        class MemoService(ServiceBase):
+            @srpc(Unicode, Integer, _returns=Unicode, _memo=memo)
+            def repeat(s, i):
+                calls.append((s, i))
+                return s * i
+
+        app = Application([MemoService], 'tns', in_protocol=JsonDocument(),
+                                                  out_protocol=JsonDocument())
+        wsgi_app = WsgiApplication(app)
+
+        for _ in range(2):
+            status, headers, ret = _call(wsgi_app, b'{"repeat": ["ab", 2]}')
+            assert status.startswith('200')
+            assert headers['Content-Length'] == '6'
+            assert b''.join(ret) == b'"abab"'
+
+        assert calls == [('ab', 2)]
+        assert (memo.hits, memo.misses) == (1, 1)
+
+    def test_memo_response_headers(self):
+        calls = []
+        memo = MemoCache()
+
+        class ResponseHeader(ComplexModel):
+            _type_info = {'X-Out': Unicode}
+
+        class MemoService(ServiceBase):
+            __out_header__ = ResponseHeader
+
+            @rpc(Integer, _returns=Integer, _memo=memo)
+            def get(ctx, i):
+                calls.append(i)
+                ctx.transport.resp_code = HTTP_201
+                ctx.transport.resp_headers['X-Transport'] = 'a'
+                ctx.out_header = ResponseHeader(**{'X-Out': 'b'})
+                return i * 2
+
+        app = Application([MemoService], 'tns', in_protocol=HttpRpc(),
+                                                        out_protocol=HttpRpc())
+        wsgi_app = WsgiApplication(app)
+
+        for _ in range(2):
+            response = []
+            def start_response(status, headers):
+                response.append((status, dict(headers)))
+
+            data = b''.join(wsgi_app({
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': '/get',
+                'QUERY_STRING': 'i=2', 'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80', 'wsgi.input': BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }, start_response))
+
+            status, headers = response[0]
+            assert data == b'4'
+            assert status == HTTP_201
+            assert headers['X-Transport'] == 'a'
+            assert headers['X-Out'] == 'b'
+            assert headers['Content-Type'].startswith('text/plain')
+
+        assert calls == [2]
+        assert (memo.hits, memo.misses) == (1, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+import time
+import unittest
+import threading
+
+try:
+    import zmq
+    from spyne.server.zeromq import ZeroMQThreadPoolServer
+    from spyne.client.zeromq import ZeroMQClient
+    from spyne.client.zeromq import RequestTimeout
+except ImportError:
+    zmq = None
+
+from spyne.application import Application
+from spyne.auxproc.sync import SyncAuxProc
+from spyne.decorator import rpc
+from spyne.decorator import srpc
+from spyne.service import ServiceBase
+from spyne.model.fault import Fault
+from spyne.model.primitive import Float
+from spyne.model.primitive import Unicode
+from spyne.protocol.soap import Soap11
+
+
+class SomeService(ServiceBase):
+    @srpc(Float, _returns=Unicode)
+    def sleep(seconds):
+        time.sleep(seconds)
+        return threading.current_thread().name
+
+    @srpc(Unicode, _returns=Unicode)
+    def echo(s):
+        if s == 'fail':
+            raise Fault('Client.Failed')
+        return s
+
+
+app = Application([SomeService], 'tns', in_protocol=Soap11(),
+                                                        out_protocol=Soap11())
+
+
+@unittest.skipIf(zmq is None, "pyzmq is not available")
+class TestZeroMQThreadPoolServer(unittest.TestCase):
+    def test_concurrent_calls(self):
+        url = 'inproc://test_concurrent_calls'
+        server = ZeroMQThreadPoolServer(app, url, pool_size=4)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.start()
+
+        responses = []
+        def _call():
+            client = ZeroMQClient(url, app, zmq_context=server.zmq_context)
+            responses.append(client.service.sleep(0.2))
+            client.close()
+
+        try:
+            start = time.time()
+            clients = [threading.Thread(target=_call) for _ in range(4)]
+            for t in clients:
+                t.start()
+            for t in clients:
+                t.join()
+
+            # the calls ran in parallel, each in its own worker
+            assert time.time() - start < 0.6
+            assert len(set(responses)) == 4
+
+        finally:
+            server.stop()
+            server_thread.join(5)
+
+        assert not server_thread.is_alive()
+        assert not any([t.is_alive() for t in server.threads])
+
+    def test_aux(self):
+        data = []
+
+        class AuxService(ServiceBase):
+            __aux__ = SyncAuxProc()
+
+            @rpc(Unicode, _returns=Unicode)
+            def echo(ctx, s):
+                data.append((s, ctx.aux.parent.in_object.s, ctx.aux.error))
+
+        aux_app = Application([SomeService, AuxService], 'tns',
+                                in_protocol=Soap11(), out_protocol=Soap11())
+
+        url = 'inproc://test_aux'
+        server = ZeroMQThreadPoolServer(aux_app, url, pool_size=1)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.start()
+
+        try:
+            client = ZeroMQClient(url, app, zmq_context=server.zmq_context)
+            assert client.service.echo('a') == 'a'
+            client.close()
+
+        finally:
+            server.stop()
+            server_thread.join(5)
+
+        assert data == [('a', 'a', None)]
+
+
+@unittest.skipIf(zmq is None, "pyzmq is not available")
+class TestZeroMQClient(unittest.TestCase):
+    def setUp(self):
+        self.url = 'inproc://test_zeromq_client_%x' % id(self)
+        self.server = ZeroMQThreadPoolServer(app, self.url, pool_size=2)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.server_thread.join(5)
+
+    def _get_client(self, **kwargs):
+        return ZeroMQClient(self.url, app,
+                                 zmq_context=self.server.zmq_context, **kwargs)
+
+    def test_socket_reuse(self):
+        client = self._get_client()
+
+        assert client.service.echo('a') == 'a'
+        socket = client.socket
+        assert client.service.echo('b') == 'b'
+        assert client.socket is socket
+
+        client.close()
+
+    def test_timeout(self):
+        client = self._get_client(timeout=0.1)
+
+        self.assertRaises(RequestTimeout, client.service.sleep, 0.3)
+
+        # the late response to the first call is not mistaken for this one's.
+        time.sleep(0.3)
+        assert client.service.echo('a') == 'a'
+
+        client.close()
+
+    def test_map(self):
+        client = self._get_client()
+
+        ret = client.map('echo', ['a', 'fail', ('c',), {'s': 'd'}],
+                                                                 concurrency=2)
+
+        assert ret[0] == 'a'
+        assert ret[1].faultcode == 'senv:Client.Failed'
+        assert ret[2:] == ['c', 'd']
+
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -167,11 +167,23 @@ def sanitize_args(a):
 
 if sys.version > '3':
     def _bytes_join(val, joiner=''):
-        return bytes(joiner).join(val)
+        if not isinstance(joiner, bytes):
+            joiner = joiner.encode('ascii')
+        return joiner.join([(v if isinstance(v, bytes) else v.encode('utf8'))
+                                                                for v in val])
+
+    def _bytes_chunks(val):
+        if all([isinstance(v, bytes) for v in val]):
+            return val
+        return [(v if isinstance(v, bytes) else v.encode('utf8')) for v in val]
+
 else:
     def _bytes_join(val, joiner=''):
         return joiner.join(val)
 
+    def _bytes_chunks(val):
+        return val
+
 if hasattr(datetime.timedelta, 'total_seconds'):
     total_seconds = datetime.timedelta.total_seconds
 
@@ -120,7 +120,7 @@ def _makeFrame(buf, opcode, fin, mask=None):
     if fin:
         header = 0x80
     else:
-        header = 0x01
+        header = 0x00
 
     header = chr(header | opcode.value)
     if mask is not None:
@@ -0,0 +1,186 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.cache`` module contains a thread-safe lru cache, the
+function that turns deserialized input into cache keys and the memoization
+support for methods.
+
+Pass a :class:`MemoCache` instance as the ``_memo`` argument to the ``@rpc``
+decorator to have the serialized responses of a method memoized: ::
+
+    class SomeService(ServiceBase):
+        @rpc(Integer, _returns=Unicode, _memo=MemoCache(ttl=60))
+        def get_name(ctx, id):
+            return lookup_name(id)
+
+This works with every transport that sends ``ctx.out_string`` to its peer.
+"""
+
+import time
+import uuid
+import datetime
+import decimal
+import threading
+
+from collections import OrderedDict
+
+from spyne.model import ComplexModelBase
+from spyne.util import six
+
+
+_SCALAR_TYPES = six.string_types + six.integer_types + (six.binary_type,
+        float, bool, decimal.Decimal, datetime.date, datetime.time,
+        datetime.timedelta, uuid.UUID, type(None))
+
+
+def get_canonical_key(value):
+    """Returns a hashable representation of the given deserialized value,
+    suitable for use as a cache key. Equal values get equal keys regardless of
+    things like dict ordering. Raises ``TypeError`` for values that can't be
+    represented this way, e.g. file uploads or generators."""
+
+    if isinstance(value, _SCALAR_TYPES):
+        return value
+
+    if isinstance(value, ComplexModelBase):
+        cls = value.__class__
+        return (cls,) + tuple([get_canonical_key(getattr(value, k, None))
+                                        for k in cls.get_flat_type_info(cls)])
+
+    if isinstance(value, (list, tuple)):
+        return tuple([get_canonical_key(v) for v in value])
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset([get_canonical_key(v) for v in value])
+
+    if isinstance(value, dict):
+        return tuple(sorted([(k, get_canonical_key(v))
+                                                    for k, v in value.items()]))
+
+    raise TypeError("%r can't be used as a cache key" % type(value))
+
+
+class LruCache(object):
+    """A dict-like container that holds up to ``size`` items, dropping the
+    least recently used one when it's full. It's safe to use from more than one
+    thread.
+
+    :param size: Maximum number of items.
+    :param ttl: Number of seconds an item is valid for, or None for no limit.
+    """
+
+    def __init__(self, size=256, ttl=None):
+        self.size = size
+        self.ttl = ttl
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Returns the value for ``key`` or ``default`` if it's missing or
+        expired."""
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                return default
+
+            # move it to the end.
+            self._data[key] = entry
+
+        return value
+
+    def put(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.time() + self.ttl
+
+        with self._lock:
+            self._data.pop(key, None)
+            while len(self._data) >= self.size > 0:
+                self._data.popitem(last=False)
+
+            if self.size > 0:
+                self._data[key] = (expires, value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoCache(object):
+    """Keeps the serialized responses of a method, keyed by its deserialized
+    input and the output protocol. When there's a fresh response for a
+    request, :class:`spyne.application.Application` skips the user code, the
+    serialization and ``create_out_string`` entirely.
+
+    The ``method_call`` events are fired for memoized responses as well, so
+    their listeners can still reject the request. Only use this for methods
+    that don't have side effects. The response is read completely before it's
+    stored, so it's not streamed. The response code and headers set by the
+    user code are stored with it and restored on a hit.
+
+    :param ttl: Number of seconds a response is valid for, or None for no
+        limit.
+    :param size: Maximum number of responses to keep.
+    :param vary_by_header: When True, the incoming header is part of the key
+        as well. Only turn this off when the response doesn't depend on the
+        header, e.g. on credentials passed in it.
+    """
+
+    def __init__(self, ttl=None, size=256, vary_by_header=True):
+        self.vary_by_header = vary_by_header
+
+        self.entries = LruCache(size, ttl=ttl)
+        """Maps cache keys to ``(out_string, length, resp_code, resp_headers,
+        out_header, out_header_doc)`` tuples."""
+
+        self.hits = 0
+        """Number of requests served from the cache."""
+
+        self.misses = 0
+        """Number of requests that had to call the user code."""
+
+        self._lock = threading.Lock()
+
+    def count_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def get_key(self, ctx):
+        """Returns the cache key for the response to the given context. Raises
+        ``TypeError`` when the input can't be used as a cache key."""
+
+        retval = (ctx.descriptor.key, ctx.out_protocol,
+                                            get_canonical_key(ctx.in_object))
+        if self.vary_by_header:
+            retval += (get_canonical_key(ctx.in_header),)
+
+        return retval
@@ -26,6 +26,46 @@ from time import strftime
 from time import gmtime
 from collections import deque
 
+
+def _parse_params(s):
+    while s[:1] == ';':
+        s = s[1:]
+        end = s.find(';')
+        while end > 0 and (s.count('"', 0, end) - s.count('\\"', 0, end)) % 2:
+            end = s.find(';', end + 1)
+        if end < 0:
+            end = len(s)
+        yield s[:end].strip()
+        s = s[end:]
+
+
+def parse_header(line):
+    """Parses a header like ``Content-Type``. Returns the main value and a
+    dict of parameters, e.g.: ::
+
+        >>> parse_header('text/xml; charset=utf-8')
+        ('text/xml', {'charset': 'utf-8'})
+
+    Same as the ``cgi.parse_header`` function, which is gone in Python 3.13.
+    """
+
+    params = _parse_params(';' + line)
+    key = next(params)
+
+    retval = {}
+    for p in params:
+        i = p.find('=')
+        if i >= 0:
+            name = p[:i].strip().lower()
+            value = p[i + 1:].strip()
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+                value = value.replace('\\\\', '\\').replace('\\"', '"')
+            retval[name] = value
+
+    return key, retval
+
+
 # This is a modified version of twisted's addCookie
 def generate_cookie(k, v, max_age=None, domain=None, path=None,
                                        comment=None, secure=False):
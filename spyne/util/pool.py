@@ -0,0 +1,213 @@
+
+#
+# spyne - Copyright (C) Spyne contributors.
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301
+#
+
+"""The ``spyne.util.pool`` module contains a bounded thread pool that
+asynchronous transports use to run blocking user code without stalling their
+event loops.
+
+Pass a :class:`WorkerPool` instance as the ``_executor`` argument to the
+``@rpc`` decorator or set it as the ``__executor__`` attribute of a
+:class:`spyne.service.ServiceBase` subclass: ::
+
+    pool = WorkerPool(size=8, max_queue_size=32)
+
+    class SomeService(ServiceBase):
+        @rpc(Integer, _returns=Integer, _executor=pool)
+        def some_call(ctx, i):
+            return blocking_lookup(i)
+
+Synchronous transports like :class:`spyne.server.wsgi.WsgiApplication` run such
+methods in the request thread as usual.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+import sys
+import threading
+
+try:
+    from queue import Queue
+except ImportError: # Python 2
+    from Queue import Queue
+
+from spyne.error import ServiceUnavailableError
+
+
+class WorkerPool(object):
+    """A pool of ``size`` worker threads that can hold up to ``max_queue_size``
+    calls waiting for a free worker. Calls beyond that are rejected with
+    :class:`spyne.error.ServiceUnavailableError`, which the http transports
+    report as ``503 Service Unavailable``.
+
+    Threads are started on first use.
+
+    :param size: Number of worker threads.
+    :param max_queue_size: Maximum number of calls that can wait for a free
+        worker.
+    :param name: Prefix for the names of the worker threads.
+    """
+
+    def __init__(self, size=4, max_queue_size=16, name='spyne-worker'):
+        self.size = size
+        self.max_queue_size = max_queue_size
+        self.name = name
+
+        self.submitted = 0
+        """Number of calls accepted by this pool."""
+
+        self.completed = 0
+        """Number of calls that have finished running, successfully or not."""
+
+        self.rejected = 0
+        """Number of calls that were rejected because the pool was
+        saturated."""
+
+        self.active = 0
+        """Number of calls that are currently running."""
+
+        self.max_queue_depth = 0
+        """The highest value :attr:`queue_depth` has reached so far."""
+
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    @property
+    def queue_depth(self):
+        """Number of calls waiting for a free worker."""
+
+        return self.submitted - self.completed - self.active
+
+    @property
+    def saturated(self):
+        return self.submitted - self.completed >= \
+                                                self.size + self.max_queue_size
+
+    def submit(self, callback, func, *args, **kwargs):
+        """Schedules ``func(*args, **kwargs)`` to run in a worker thread. Once
+        it's finished, ``callback(True, return_value)`` or
+        ``callback(False, exc_info)`` is called from the same worker thread.
+
+        Raises :class:`spyne.error.ServiceUnavailableError` when the pool is
+        saturated.
+        """
+
+        with self._lock:
+            if self.saturated:
+                self.rejected += 1
+                raise ServiceUnavailableError()
+
+            self.submitted += 1
+            queue_depth = self.queue_depth
+            if queue_depth > self.max_queue_depth:
+                self.max_queue_depth = queue_depth
+
+            if len(self._threads) < self.size:
+                self._start_worker()
+
+        self._queue.put((callback, func, args, kwargs))
+
+    def defer(self, func, *args, **kwargs):
+        """Returns a twisted ``Deferred`` that fires with the result of
+        ``func(*args, **kwargs)`` once it's run in a worker thread."""
+
+        from twisted.internet import reactor
+        from twisted.internet.defer import Deferred
+        from twisted.python.failure import Failure
+
+        retval = Deferred()
+
+        def _cb(success, result):
+            if success:
+                reactor.callFromThread(retval.callback, result)
+            else:
+                reactor.callFromThread(retval.errback,
+                                    Failure(result[1], result[0], result[2]))
+
+        self.submit(_cb, func, *args, **kwargs)
+
+        return retval
+
+    def wrap_future(self, loop, func, *args, **kwargs):
+        """Returns an asyncio ``Future`` bound to the given event loop that is
+        resolved with the result of ``func(*args, **kwargs)`` once it's run
+        in a worker thread."""
+
+        retval = loop.create_future()
+
+        def _set(success, result):
+            if retval.cancelled():
+                return
+
+            if success:
+                retval.set_result(result)
+            else:
+                retval.set_exception(result[1])
+
+        self.submit(lambda success, result:
+                 loop.call_soon_threadsafe(_set, success, result),
+                                                         func, *args, **kwargs)
+
+        return retval
+
+    def close(self):
+        """Stops the worker threads once they're done with the calls that are
+        already queued."""
+
+        with self._lock:
+            threads, self._threads = self._threads, []
+
+        for _ in threads:
+            self._queue.put(None)
+
+    def _start_worker(self):
+        thread = threading.Thread(target=self._work, name='%s-%d' %
+                                              (self.name, len(self._threads)))
+        thread.daemon = True
+        self._threads.append(thread)
+        thread.start()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            callback, func, args, kwargs = job
+
+            with self._lock:
+                self.active += 1
+
+            try:
+                result = func(*args, **kwargs)
+                success = True
+
+            except Exception:
+                result = sys.exc_info()
+                success = False
+
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+            try:
+                callback(success, result)
+            except Exception as e:
+                logger.exception(e)